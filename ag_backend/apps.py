@@ -0,0 +1,8 @@
+from django.apps import AppConfig
+
+
+class AgBackendConfig(AppConfig):
+    name = "ag_backend"
+
+    def ready(self):
+        from . import permissions, signals  # noqa: F401  conectar os receivers
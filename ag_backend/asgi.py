@@ -1,7 +1,8 @@
 """
 ASGI config for ag_backend project.
 
-It exposes the ASGI callable as a module-level variable named ``application``.
+It exposes the ASGI callable as a module-level variable named ``application``. HTTP requests go to Django and the
+GraphQL subscriptions are served over WebSocket at ``/graphql/ws/``.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/5.0/howto/deployment/asgi/
@@ -13,4 +14,9 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "ag_backend.settings")
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+from ag_backend.schema import schema  # noqa: E402  depois do setup do Django
+from ag_backend.subscriptions import GraphQLWebSocketApp, websocket_router  # noqa: E402
+
+application = websocket_router({"/graphql/ws/": GraphQLWebSocketApp(schema)}, django_application)
@@ -0,0 +1,60 @@
+import graphene
+from django.conf import settings
+from django.core.exceptions import ValidationError
+
+from .cache import object_cache
+
+
+class BulkItemError(graphene.ObjectType):
+    """
+    Error of a bulk mutation. ``index`` is the position of the item in the input list, or null when the error
+    rejects the whole request (authentication, too many items).
+    """
+
+    index = graphene.Int()
+    errors = graphene.String(required=True)
+
+
+def get_bulk_options():
+    options = getattr(settings, "GRAPHQL_BULK_MUTATIONS", {})
+    return {"MAX_ITEMS": options.get("MAX_ITEMS", 5000), "BATCH_SIZE": options.get("BATCH_SIZE", 500)}
+
+
+def check_bulk_request(user, items):
+    """
+    Returns the errors that reject the whole request before any item is processed.
+    """
+
+    if user is None or not user.is_authenticated:
+        return [BulkItemError(errors="Authentication required.")]
+
+    max_items = get_bulk_options()["MAX_ITEMS"]
+    if len(items) > max_items:
+        return [BulkItemError(errors=f"Too many items, the maximum is {max_items}.")]
+    return []
+
+
+def to_pk(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def clean_instance(instance, exclude=()):
+    """
+    ``full_clean()`` without the per-row queries: foreign keys in ``exclude`` were already resolved in batch by the
+    caller and the bulk models have no unique fields besides the primary key. Returns the error message or ``None``.
+    """
+
+    try:
+        instance.full_clean(exclude=list(exclude), validate_unique=False, validate_constraints=False)
+    except ValidationError as e:
+        return str(e)
+    return None
+
+
+def invalidate_objects(model, pks):
+    # bulk_update não dispara post_save, invalidar o cache de objetos manualmente
+    for pk in pks:
+        object_cache.invalidate(model, pk)
@@ -0,0 +1,207 @@
+import copy
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+
+from .loaders import get_loaders
+
+_MISSING = object()
+
+
+class LRUCache:
+    """
+    Thread-safe in-process LRU cache whose entries expire ``ttl`` seconds after being stored (never when ``None``).
+    """
+
+    def __init__(self, maxsize, ttl):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return default
+            expires_at, value = entry
+            if expires_at is not None and expires_at < time.monotonic():
+                del self._entries[key]
+                return default
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl if self.ttl is not None else None, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class ObjectCache:
+    """
+    Two-tier cache of model instances keyed by model and primary key: an in-process LRU in front of a shared Django
+    cache backend (LocMemCache locally, Redis or Memcached in production). Entries are invalidated by the
+    ``post_save``/``post_delete`` receivers in ``ag_backend.signals``; the TTL bounds how long other processes can
+    keep serving an instance from their own LRU after a change.
+    """
+
+    def __init__(self, maxsize=1024, ttl=30, backend="default"):
+        self.local = LRUCache(maxsize, ttl)
+        self.ttl = ttl
+        self.backend = backend
+        self._lock = threading.Lock()
+        self.reset_stats()
+
+    @classmethod
+    def from_settings(cls):
+        options = getattr(settings, "GRAPHQL_OBJECT_CACHE", {})
+        return cls(maxsize=options.get("MAXSIZE", 1024), ttl=options.get("TTL", 30), backend=options.get("BACKEND", "default"))
+
+    @property
+    def shared(self):
+        return caches[self.backend] if self.backend else None
+
+    @staticmethod
+    def make_key(model, pk):
+        return f"graphql:object:{model._meta.label_lower}:{pk}"
+
+    def _count(self, name):
+        with self._lock:
+            self._stats[name] += 1
+
+    def get(self, model, pk):
+        key = self.make_key(model, pk)
+
+        instance = self.local.get(key, _MISSING)
+        if instance is not _MISSING:
+            self._count("local_hits")
+            return copy.copy(instance)  # cópia com _state próprio, o cache local é compartilhado entre threads
+        self._count("local_misses")
+
+        if self.shared is not None:
+            instance = self.shared.get(key, _MISSING)
+            if instance is not _MISSING:
+                self._count("shared_hits")
+                self.local.set(key, instance)
+                return copy.copy(instance)
+            self._count("shared_misses")
+
+        instance = model._default_manager.filter(pk=pk).first()
+        if instance is not None:  # não guardar ausências, o objeto pode ser criado em seguida
+            self.set(instance)
+        return instance
+
+    def set(self, instance):
+        key = self.make_key(instance._meta.concrete_model, instance.pk)
+        self.local.set(key, copy.copy(instance))
+        if self.shared is not None:
+            self.shared.set(key, instance, self.ttl)
+
+    async def aget(self, model, pk):
+        """
+        Async variant of ``get`` for the ASGI view, going through the async cache and ORM APIs.
+        """
+
+        key = self.make_key(model, pk)
+
+        instance = self.local.get(key, _MISSING)
+        if instance is not _MISSING:
+            self._count("local_hits")
+            return copy.copy(instance)
+        self._count("local_misses")
+
+        if self.shared is not None:
+            instance = await self.shared.aget(key, _MISSING)
+            if instance is not _MISSING:
+                self._count("shared_hits")
+                self.local.set(key, instance)
+                return copy.copy(instance)
+            self._count("shared_misses")
+
+        instance = await model._default_manager.filter(pk=pk).afirst()
+        if instance is not None:
+            self.local.set(key, copy.copy(instance))
+            if self.shared is not None:
+                await self.shared.aset(key, instance, self.ttl)
+        return instance
+
+    def invalidate(self, model, pk):
+        key = self.make_key(model, pk)
+        self.local.delete(key)
+        if self.shared is not None:
+            self.shared.delete(key)
+
+    def clear(self):
+        self.local.clear()
+        if self.shared is not None:
+            self.shared.clear()
+
+    def reset_stats(self):
+        with self._lock:
+            self._stats = {"local_hits": 0, "local_misses": 0, "shared_hits": 0, "shared_misses": 0}
+
+    def stats(self):
+        """
+        Hit/miss counters of this process, plus the hit ratio of each tier and the current LRU size.
+        """
+
+        with self._lock:
+            stats = dict(self._stats)
+        for tier in ("local", "shared"):
+            lookups = stats[f"{tier}_hits"] + stats[f"{tier}_misses"]
+            stats[f"{tier}_hit_ratio"] = stats[f"{tier}_hits"] / lookups if lookups else 0.0
+        stats["local_size"] = len(self.local)
+        stats["local_maxsize"] = self.local.maxsize
+        return stats
+
+
+object_cache = ObjectCache.from_settings()
+
+
+def get_cached_object(info, model, pk):
+    """
+    Resolves ``model`` by primary key going through the request (instances already loaded by the loaders), the
+    in-process LRU and the shared cache before hitting the database. Returns ``None`` when it does not exist.
+    """
+
+    pk = model._meta.pk.to_python(pk)
+    loaders = get_loaders(info)
+
+    instance = loaders.seen(model._meta.concrete_model).get(pk)
+    if instance is None:
+        instance = object_cache.get(model, pk)
+        if instance is not None:
+            loaders.remember([instance])
+    return instance
+
+
+async def aget_cached_object(info, model, pk):
+    """
+    Async variant of ``get_cached_object``.
+    """
+
+    pk = model._meta.pk.to_python(pk)
+    loaders = get_loaders(info)
+
+    instance = loaders.seen(model._meta.concrete_model).get(pk)
+    if instance is None:
+        instance = await object_cache.aget(model, pk)
+        if instance is not None:
+            loaders.remember([instance])
+    return instance
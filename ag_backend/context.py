@@ -0,0 +1,24 @@
+import threading
+
+_lock = threading.Lock()
+
+
+def get_request_scoped(context, name, factory):
+    """
+    Returns the object stored under ``name`` in the GraphQL context, creating it with ``factory`` on first access.
+    The context can be the ``HttpRequest`` given by ``GraphQLView`` or the plain dict used by the tests. Safe to call
+    from the worker threads of ``AsyncExecutionContext``: every field of the request gets the same object.
+    """
+
+    if isinstance(context, dict):
+        if name not in context:
+            with _lock:  # dois campos em threads não podem criar cada um o seu
+                if name not in context:
+                    context[name] = factory()
+        return context[name]
+
+    if not hasattr(context, name):
+        with _lock:
+            if not hasattr(context, name):
+                setattr(context, name, factory())
+    return getattr(context, name)
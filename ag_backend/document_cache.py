@@ -0,0 +1,83 @@
+import hashlib
+import threading
+import time
+
+from django.conf import settings
+from graphql import print_schema
+
+from .cache import LRUCache
+from .persisted_queries import hash_query
+
+
+class DocumentCache:
+    """
+    Bounded LRU of parsed and validated ``DocumentNode`` objects keyed by schema version, validation rules and query
+    text, so repeated operations skip straight to execution. Only valid documents are stored. ``stats()`` reports the
+    hit ratio and the parse + validate time saved by the hits.
+    """
+
+    def __init__(self, maxsize=500):
+        self.documents = LRUCache(maxsize, ttl=None)
+        self._versions = {}
+        self._lock = threading.Lock()
+        self.reset_stats()
+
+    @classmethod
+    def from_settings(cls):
+        options = getattr(settings, "GRAPHQL_DOCUMENT_CACHE", {})
+        return cls(maxsize=options.get("MAXSIZE", 500))
+
+    def schema_version(self, schema):
+        version = self._versions.get(id(schema))
+        if version is None:  # o schema não muda durante o processo, calcular uma única vez
+            version = self._versions[id(schema)] = hashlib.sha256(print_schema(schema).encode("utf-8")).hexdigest()[:16]
+        return version
+
+    def get(self, schema, query, validation_rules, parse_and_validate):
+        """
+        Returns ``(document, errors)`` for ``query``, calling ``parse_and_validate()`` only on a miss.
+        """
+
+        rules = tuple(f"{rule.__module__}.{rule.__qualname__}" for rule in validation_rules or ())
+        key = (self.schema_version(schema), rules, hash_query(query))
+
+        entry = self.documents.get(key)
+        if entry is not None:
+            document, cost = entry
+            with self._lock:
+                self._stats["hits"] += 1
+                self._stats["time_saved"] += cost
+            return document, []
+
+        started = time.perf_counter()
+        document, errors = parse_and_validate()
+        cost = time.perf_counter() - started
+
+        with self._lock:
+            self._stats["misses"] += 1
+            self._stats["time_spent"] += cost
+        if not errors:
+            self.documents.set(key, (document, cost))
+        return document, errors
+
+    def clear(self):
+        self.documents.clear()
+
+    def reset_stats(self):
+        with self._lock:
+            self._stats = {"hits": 0, "misses": 0, "time_saved": 0.0, "time_spent": 0.0}
+
+    def stats(self):
+        """
+        Hits, misses, hit ratio, seconds spent parsing/validating on misses and seconds saved by hits.
+        """
+
+        with self._lock:
+            stats = dict(self._stats)
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_ratio"] = stats["hits"] / lookups if lookups else 0.0
+        stats["size"] = len(self.documents)
+        return stats
+
+
+document_cache = DocumentCache.from_settings()
@@ -0,0 +1,57 @@
+import asyncio
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import connections
+from graphql import ExecutionContext
+from graphql.execution.execute import get_field_def
+
+
+def in_event_loop():
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return False
+    return True
+
+
+def run_in_thread(func):
+    """
+    Wraps ``func`` to run in a worker thread. With ``GRAPHQL_ASYNC["PARALLEL_SYNC_FIELDS"]`` every call gets its
+    own thread and database connection, closed at the end, so sync root fields of the same operation run in
+    parallel; otherwise they share the request's sync thread like the async ORM does.
+    """
+
+    if not getattr(settings, "GRAPHQL_ASYNC", {}).get("PARALLEL_SYNC_FIELDS", False):
+        return sync_to_async(func)
+
+    @wraps(func)
+    def run(*args, **kwargs):
+        try:
+            return func(*args, **kwargs)
+        finally:
+            connections.close_all()  # conexões de threads do pool não são fechadas pelo request_finished
+
+    return sync_to_async(run, thread_sensitive=False)
+
+
+class AsyncExecutionContext(ExecutionContext):
+    """
+    Execution context of ``AsyncGraphQLView``. Root fields with async resolvers run on the event loop and the root
+    fields of a query are awaited together, so independent fields resolve concurrently. graphene-django's fields
+    and the nested resolvers use the synchronous ORM, which cannot be called from the event loop: root fields with
+    sync resolvers are resolved and completed in a worker thread, and so is the subtree below an async resolver.
+    """
+
+    def execute_field(self, parent_type, source, field_nodes, path):
+        if path.prev is None and in_event_loop():
+            field_def = get_field_def(self.schema, parent_type, field_nodes[0])
+            if field_def is not None and not iscoroutinefunction(field_def.resolve):
+                return run_in_thread(super().execute_field)(parent_type, source, field_nodes, path)
+        return super().execute_field(parent_type, source, field_nodes, path)
+
+    def complete_value(self, return_type, field_nodes, info, path, result):
+        if path.prev is None and in_event_loop():  # resultado de um resolver async, completar fora do event loop
+            return run_in_thread(super().complete_value)(return_type, field_nodes, info, path, result)
+        return super().complete_value(return_type, field_nodes, info, path, result)
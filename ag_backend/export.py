@@ -0,0 +1,105 @@
+import csv
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import JsonResponse, StreamingHttpResponse
+from django.views import View
+from graphene.utils.str_converters import to_snake_case
+
+from apps.activities.schema import ActivityType
+from apps.projects.schema import ProjectType
+from apps.tasks.schema import TaskType
+
+from .fields import FilterConnectionField
+from .permissions import get_context_permissions
+
+# tipo GraphQL (filter_fields e modelo) e o caminho até o projeto de cada recurso exportável
+EXPORTS = {
+    "projects": (ProjectType, "pk"),
+    "tasks": (TaskType, "project"),
+    "activities": (ActivityType, "project"),
+}
+CONTENT_TYPES = {"csv": "text/csv; charset=utf-8", "ndjson": "application/x-ndjson"}
+
+
+class Echo:
+    """
+    File-like object whose ``write`` returns the value, so ``csv.writer`` encodes one row at a time.
+    """
+
+    def write(self, value):
+        return value
+
+
+def encode_csv(columns, rows):
+    writer = csv.writer(Echo())
+    yield writer.writerow(columns)
+    for row in rows:
+        yield writer.writerow(row)
+
+
+def encode_ndjson(columns, rows):
+    encoder = DjangoJSONEncoder(ensure_ascii=False)
+    for row in rows:
+        yield encoder.encode(dict(zip(columns, row))) + "\n"
+
+
+def batch_lines(lines, size):
+    """
+    Joins ``size`` encoded rows per chunk, so the response is not written one row at a time.
+    """
+
+    batch = []
+    for line in lines:
+        batch.append(line)
+        if len(batch) >= size:
+            yield "".join(batch).encode("utf-8")
+            batch = []
+    if batch:
+        yield "".join(batch).encode("utf-8")
+
+
+async def iterate_in_thread(chunks):
+    # o cursor do servidor pertence à conexão da thread síncrona, consumir sempre na mesma thread
+    sentinel = object()
+    while True:
+        chunk = await sync_to_async(next, thread_sensitive=True)(chunks, sentinel)
+        if chunk is sentinel:
+            break
+        yield chunk
+
+
+class ExportView(View):
+    """
+    Streams every project, task or activity the user can see as CSV or NDJSON (``/export/tasks.csv?projectId=1``).
+    The query string accepts the ``filter_fields`` of the GraphQL type, in snake or camel case. Rows are read with a
+    server-side cursor (``QuerySet.iterator``) and written in chunks, so memory stays constant whatever the size of
+    the table. Under ASGI the chunks are produced in the sync thread and streamed by an async iterator, since Django
+    buffers sync iterators of streaming responses served by ASGI.
+    """
+
+    def get(self, request, resource, fmt):
+        if not request.user.is_authenticated:
+            return JsonResponse({"errors": [{"message": "Authentication required."}]}, status=401)
+
+        object_type, project_lookup = EXPORTS[resource]
+        model = object_type._meta.model
+        filterset_class = FilterConnectionField(object_type).filterset_class
+        filterset = filterset_class(data={to_snake_case(key): value for key, value in request.GET.items()}, queryset=model.objects.all(), request=request)
+        if not filterset.is_valid():
+            errors = [{"message": " ".join(messages), "field": name} for name, messages in filterset.errors.items()]
+            return JsonResponse({"errors": errors}, status=400)
+
+        queryset = get_context_permissions(request).filter(filterset.qs, project_lookup)  # apenas os projetos do usuário
+
+        options = getattr(settings, "DATA_EXPORT", {})
+        chunk_size = options.get("CHUNK_SIZE", 2000)
+        columns = [field.attname for field in model._meta.concrete_fields]
+        rows = queryset.order_by("pk").values_list(*columns).iterator(chunk_size=chunk_size)
+        chunks = batch_lines((encode_csv if fmt == "csv" else encode_ndjson)(columns, rows), chunk_size)
+
+        response = StreamingHttpResponse(iterate_in_thread(chunks) if isinstance(request, ASGIRequest) else chunks, content_type=CONTENT_TYPES[fmt])
+        response["Content-Disposition"] = f'attachment; filename="{resource}.{fmt}"'
+        return response
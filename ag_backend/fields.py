@@ -0,0 +1,195 @@
+from base64 import b64decode, b64encode
+from functools import partial
+import json
+
+import graphene
+from django.core.exceptions import ValidationError
+from django.db.models import F, Field, Func, QuerySet, Value
+from graphene.relay.connection import PageInfo
+from graphene_django.filter import DjangoFilterConnectionField
+from graphene_django.settings import graphene_settings
+
+from .loaders import get_loaders, page_bound
+from .optimizer import optimize_queryset
+
+
+class FilterConnectionField(DjangoFilterConnectionField):
+    """
+    DjangoFilterConnectionField integrated with the per-request loaders and the query optimizer. Filtered querysets
+    get their joins, prefetches and columns planned from the selection set before pagination, the nodes of every
+    page are remembered so their relations can be batched, and reverse relations queried without filters are
+    served by one batched query for all the parents instead of one query per parent.
+    """
+
+    @classmethod
+    def resolve_queryset(cls, connection, iterable, info, args, filtering_args, filterset_class, required_columns=()):
+        is_related_manager = hasattr(iterable, "core_filters") and hasattr(iterable, "instance")
+        has_filters = any(args.get(name) is not None for name in filtering_args)
+
+        if is_related_manager and not has_filters:  # página limitada por pai, sem carregar a relação inteira
+            limit = page_bound(args, graphene_settings.RELAY_CONNECTION_MAX_LIMIT)
+            return get_loaders(info).load(iterable.instance, iterable.field.remote_field.name, limit)
+
+        queryset = super().resolve_queryset(connection, iterable, info, args, filtering_args, filterset_class)
+        if isinstance(queryset, QuerySet):
+            queryset = optimize_queryset(queryset, info, required_columns)  # planejar joins, prefetches e colunas antes de paginar
+        return queryset
+
+    @classmethod
+    def connection_resolver(cls, resolver, connection, default_manager, queryset_resolver, max_limit, enforce_first_or_last, root, info, **args):
+        resolved = super().connection_resolver(
+            resolver, connection, default_manager, queryset_resolver, max_limit, enforce_first_or_last, root, info, **args
+        )
+        get_loaders(info).remember(edge.node for edge in resolved.edges)
+        return resolved
+
+
+def as_instance(model, row):
+    """
+    Copies the loaded columns and cached relations of ``row`` (an instance of a model with the same columns, like an
+    archive table) into an instance of ``model``, keeping the deferred columns deferred.
+    """
+
+    loaded = [field.attname for field in model._meta.concrete_fields if field.attname in row.__dict__]
+    instance = model.from_db(row._state.db, loaded, [row.__dict__[name] for name in loaded])
+    instance._state.fields_cache = row._state.fields_cache
+    if hasattr(row, "_prefetched_objects_cache"):
+        instance._prefetched_objects_cache = row._prefetched_objects_cache
+    return instance
+
+
+class RowValue(Func):
+    """
+    Row value constructor ``(a, b)``, compared as a tuple by both PostgreSQL and SQLite.
+    """
+
+    template = "(%(expressions)s)"
+    output_field = Field()
+
+
+class KeysetConnectionField(FilterConnectionField):
+    """
+    FilterConnectionField paginated by keyset instead of offsets. Rows are ordered by ``(sort_key, pk)``, the cursor
+    carries the values of the last row and the next page is fetched with ``WHERE (sort_key, id) > (...)``, so deep
+    pages cost the same as the first one. ``hasNextPage`` comes from fetching one extra row; the ``COUNT(*)`` used to
+    fill ``connection.length`` only runs when ``count=True``. ``sort_key`` must be a non-nullable column, prefixed
+    with ``-`` for descending order. With ``archive`` (a model with the same columns and ids that do not collide) the
+    field gets an ``includeArchived`` argument: the same filters and keyset run on both tables and the two pages are
+    merged, the archived rows returned as instances of the node's model.
+    """
+
+    cursor_prefix = "keyset"
+
+    def __init__(self, type_, *args, sort_key="pk", count=False, archive=None, **kwargs):
+        self.sort_key = sort_key
+        self.count = count
+        self.archive = archive
+        if archive is not None:
+            kwargs.setdefault("include_archived", graphene.Boolean(default_value=False))
+        super().__init__(type_, *args, **kwargs)
+        self._base_args.pop("offset", None)  # offset não faz sentido com keyset
+
+    def get_queryset_resolver(self):
+        return partial(super().get_queryset_resolver(), required_columns=[self.sort_key.lstrip("-")])
+
+    def get_key_fields(self, model):
+        name = self.sort_key.lstrip("-")
+        sort_field = model._meta.pk if name == "pk" else model._meta.get_field(name)
+        return [sort_field, model._meta.pk]
+
+    def encode_cursor(self, node, key_fields):
+        values = [field.value_to_string(node) for field in key_fields]
+        return b64encode(f"{self.cursor_prefix}:{json.dumps(values)}".encode()).decode()
+
+    def decode_cursor(self, cursor, key_fields):
+        try:
+            prefix, _, payload = b64decode(cursor).decode().partition(":")
+            values = json.loads(payload)
+            if prefix != self.cursor_prefix or len(values) != len(key_fields):
+                raise ValueError
+            return [field.to_python(value) for field, value in zip(key_fields, values)]
+        except (ValueError, TypeError, ValidationError):
+            raise ValueError("Invalid cursor.")
+
+    def keyset_resolver(self, resolver, connection, default_manager, queryset_resolver, max_limit, enforce_first_or_last, root, info, **args):
+        first = args.get("first")
+        last = args.get("last")
+
+        if enforce_first_or_last:
+            assert first or last, ("You must provide a `first` or `last` value to properly paginate the `{}` connection.").format(info.field_name)
+
+        if max_limit:
+            assert (first or 0) <= max_limit and (last or 0) <= max_limit, (
+                "Requesting more records on the `{}` connection than the limit of {} records."
+            ).format(info.field_name, max_limit)
+
+        iterable = resolver(root, info, **args)
+        if iterable is None:
+            iterable = default_manager
+        queryset = queryset_resolver(connection, iterable, info, args)
+
+        if not isinstance(queryset, QuerySet):  # lista já agrupada pelos loaders, paginar por offset
+            resolved = self.resolve_connection(connection, args, queryset, max_limit=max_limit)
+            get_loaders(info).remember(edge.node for edge in resolved.edges)
+            return resolved
+
+        key_fields = self.get_key_fields(queryset.model)
+        backwards = last is not None and first is None  # last sem first: paginar a partir do fim
+        descending = self.sort_key.startswith("-") != backwards
+        cursor = args.get("before") if backwards else args.get("after")
+        values = self.decode_cursor(cursor, key_fields) if cursor else None
+        limit = last if backwards else (first or max_limit)
+
+        rows = self.fetch_page(queryset, key_fields, values, descending, limit)
+        archived = None
+        if self.archive is not None and args.get("include_archived"):
+            archived = queryset_resolver(connection, self.archive._default_manager, info, args)
+            rows = self.merge_pages(rows, self.fetch_page(archived, key_fields, values, descending, limit), queryset.model, key_fields, descending)
+            rows = rows[: limit + 1] if limit is not None else rows
+
+        has_more = limit is not None and len(rows) > limit
+        rows = rows[:limit]
+        if backwards:
+            rows.reverse()
+
+        edges = [connection.Edge(node=row, cursor=self.encode_cursor(row, key_fields)) for row in rows]
+        resolved = connection(
+            edges=edges,
+            page_info=PageInfo(
+                start_cursor=edges[0].cursor if edges else None,
+                end_cursor=edges[-1].cursor if edges else None,
+                has_previous_page=has_more if backwards else bool(cursor),
+                has_next_page=bool(cursor) if backwards else has_more,
+            ),
+        )
+        resolved.iterable = queryset
+        resolved.length = (queryset.count() + (archived.count() if archived is not None else 0)) if self.count else None
+        get_loaders(info).remember(rows)
+        return resolved
+
+    def fetch_page(self, queryset, key_fields, values, descending, limit):
+        """
+        Returns up to ``limit + 1`` rows of ``queryset`` after the cursor ``values``, in keyset order.
+        """
+
+        names = [key_fields[0].name, "pk"]
+        page = queryset.order_by(*[f"-{name}" if descending else name for name in names])
+        if values is not None:
+            boundary = RowValue(*[Value(value, output_field=field) for field, value in zip(key_fields, values)])
+            page = page.alias(keyset=RowValue(*[F(name) for name in names])).filter(**{"keyset__lt" if descending else "keyset__gt": boundary})
+        return list(page[: limit + 1]) if limit is not None else list(page)
+
+    def merge_pages(self, rows, archived_rows, model, key_fields, descending):
+        rows = rows + [as_instance(model, row) for row in archived_rows]
+        return sorted(rows, key=lambda row: tuple(getattr(row, field.attname) for field in key_fields), reverse=descending)
+
+    def wrap_resolve(self, parent_resolver):
+        return partial(
+            self.keyset_resolver,
+            parent_resolver,
+            self.connection_type,
+            self.get_manager(),
+            self.get_queryset_resolver(),
+            self.max_limit,
+            self.enforce_first_or_last,
+        )
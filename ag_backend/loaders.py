@@ -0,0 +1,192 @@
+import threading
+from collections import defaultdict
+
+from django.db.models import F, Window
+from django.db.models.functions import RowNumber
+from graphql_relay import cursor_to_offset
+
+from .context import get_request_scoped
+
+
+def page_bound(args, max_limit=None):
+    """
+    Number of rows of each parent needed to serve a page of a reverse connection with the pagination ``args``: the
+    rows skipped by ``offset``/``after``, the page itself and one more row for ``hasNextPage``. ``None`` when every row
+    is needed (``last`` without ``first``, no limit at all or an invalid cursor).
+    """
+
+    first, last = args.get("first"), args.get("last")
+    if first is None:
+        if last is not None:
+            return None
+        first = max_limit  # o graphene-django aplica o limite máximo quando nem first nem last são informados
+    if first is None:
+        return None
+
+    start = args.get("offset") or 0
+    if args.get("after"):
+        after = cursor_to_offset(args["after"])
+        if after is None:
+            return None
+        start += after + 1
+    return start + first + 1
+
+
+def limit_per_parent(queryset, fk_attname, limit):
+    """
+    Keeps the first ``limit`` rows of each value of ``fk_attname`` in the order of ``queryset`` (which must be
+    ordered), numbering them with ``ROW_NUMBER() OVER (PARTITION BY fk ...)``.
+    """
+
+    ordering = list(queryset.query.order_by or queryset.model._meta.ordering)
+    window = Window(RowNumber(), partition_by=F(fk_attname), order_by=ordering)
+    return queryset.annotate(parent_row=window).filter(parent_row__lte=limit)
+
+
+class RelationLoader:
+    """
+    Batches the lookups of one relation of a model during a single GraphQL request. The keys of every instance of
+    the model already seen in the request are collected on the first load, so the whole page is resolved by one
+    ``IN (...)`` query and later loads are answered from the cache.
+    """
+
+    def __init__(self, registry, model, field, limit=None):
+        self.registry = registry
+        self.model = model
+        self.field = field
+        self.limit = limit
+        self._cache = {}
+
+    def key_for(self, instance):
+        raise NotImplementedError
+
+    def fetch(self, keys):
+        raise NotImplementedError
+
+    def load(self, instance):
+        key = self.key_for(instance)
+        if key is None:
+            return None
+
+        with self.registry.lock:
+            if key in self._cache:
+                return self._cache[key]
+            keys = {key}
+            for sibling in self.registry.seen(self.model).values():  # agrupar as chaves de todas as instâncias já carregadas
+                sibling_key = self.key_for(sibling)
+                if sibling_key is not None and sibling_key not in self._cache:
+                    keys.add(sibling_key)
+
+        # consulta fora do lock: campos em outras threads continuam enquanto o lote é carregado
+        results = self.fetch(keys)
+        with self.registry.lock:
+            for batch_key in keys:
+                self._cache.setdefault(batch_key, results.get(batch_key))
+            return self._cache[key]
+
+
+class ForwardLoader(RelationLoader):
+    """
+    Loads the object referenced by a ``ForeignKey`` (e.g. ``Project.owner``, ``Task.activity``).
+    """
+
+    def key_for(self, instance):
+        return getattr(instance, self.field.attname)
+
+    def fetch(self, keys):
+        related_model = self.field.related_model
+        target = self.field.target_field.attname
+        results = {}
+
+        if self.field.target_field.primary_key:  # reaproveitar instâncias já carregadas por outra relação
+            known = self.registry.seen(related_model._meta.concrete_model)
+            results = {key: known[key] for key in keys if key in known}
+
+        missing = [key for key in keys if key not in results]
+        if missing:
+            objects = list(related_model._default_manager.filter(**{f"{target}__in": missing}))
+            self.registry.remember(objects)
+            results.update((getattr(obj, target), obj) for obj in objects)
+        return results
+
+
+class ReverseLoader(RelationLoader):
+    """
+    Loads the objects pointing to an instance through a ``ForeignKey`` (e.g. ``Project.tasks``), grouped by owner.
+    With ``limit`` only the first ``limit`` rows of each owner are fetched, numbered by ``ROW_NUMBER()`` per owner.
+    """
+
+    def key_for(self, instance):
+        return getattr(instance, self.field.field.target_field.attname)
+
+    def fetch(self, keys):
+        remote_field = self.field.field
+        queryset = self.field.related_model._default_manager.filter(**{f"{remote_field.name}__in": keys})
+        if not queryset.ordered:
+            queryset = queryset.order_by("pk")  # ordem estável para os cursores da connection
+        if self.limit is not None:  # apenas as linhas da página de cada pai, não a relação inteira
+            queryset = limit_per_parent(queryset, remote_field.attname, self.limit)
+
+        objects = list(queryset)
+        self.registry.remember(objects)
+        grouped = {key: [] for key in keys}
+        for obj in objects:
+            grouped[getattr(obj, remote_field.attname)].append(obj)
+        return grouped
+
+
+class ReverseOneLoader(ReverseLoader):
+    """
+    Loads the object pointing to an instance through a ``OneToOneField`` (e.g. ``Project.stats``), or ``None``.
+    """
+
+    def fetch(self, keys):
+        return {key: objects[0] if objects else None for key, objects in super().fetch(keys).items()}
+
+
+class LoaderRegistry:
+    """
+    Per-request registry of relation loaders and of the model instances already returned to the client. Shared by
+    the root fields that ``AsyncExecutionContext`` resolves in parallel threads, so every access goes through
+    ``lock`` and ``seen`` returns a copy.
+    """
+
+    def __init__(self):
+        self.lock = threading.RLock()
+        self._seen = defaultdict(dict)
+        self._loaders = {}
+
+    def remember(self, instances):
+        instances = list(instances)
+        with self.lock:
+            for instance in instances:
+                self._seen[instance._meta.concrete_model][instance.pk] = instance
+
+    def seen(self, model):
+        with self.lock:
+            return dict(self._seen[model])
+
+    def load(self, instance, name, limit=None):
+        model = instance._meta.concrete_model
+        field = model._meta.get_field(name)
+
+        # reaproveitar o que já veio de select_related/prefetch_related
+        if field.concrete or field.one_to_one:
+            if field.is_cached(instance):
+                return field.get_cached_value(instance)
+        else:
+            prefetched = getattr(instance, "_prefetched_objects_cache", {})
+            if field.get_accessor_name() in prefetched:
+                return list(prefetched[field.get_accessor_name()])
+
+        with self.lock:
+            self._seen[model].setdefault(instance.pk, instance)
+            loader = self._loaders.get((model, name, limit))
+            if loader is None:
+                loader_class = ForwardLoader if field.concrete else ReverseOneLoader if field.one_to_one else ReverseLoader
+                loader = self._loaders[(model, name, limit)] = loader_class(self, model, field, limit)
+        return loader.load(instance)
+
+
+def get_loaders(info):
+    return get_request_scoped(info.context, "graphql_loaders", LoaderRegistry)
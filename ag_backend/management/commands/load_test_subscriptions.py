@@ -0,0 +1,116 @@
+import asyncio
+import resource
+import statistics
+import time
+from datetime import date
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+
+from ag_backend.execution import run_in_thread
+from ag_backend.pubsub import get_pubsub
+from ag_backend.schema import schema
+from ag_backend.subscriptions import GraphQLWebSocketApp, InProcessClient
+from apps.notifications.feed import notification_feed
+from apps.notifications.models import Notification
+from apps.projects.models import Project
+
+QUERY = "subscription ($projectId: ID) { notificationAdded(projectId: $projectId) { title createdAt } }"
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(int(len(values) * fraction), len(values) - 1)]
+
+
+class Command(BaseCommand):
+    help = (
+        "Load test of the notification subscriptions: opens --connections WebSocket connections in this process (one "
+        "ASGI worker), inserts --notifications notifications and reports the memory per connection and the latency "
+        "between the commit of each notification and its delivery to every connection. Creates a temporary user and "
+        "project, removed at the end; run it against a development database."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--connections", type=int, default=500, help="Concurrent WebSocket connections.")
+        parser.add_argument("--notifications", type=int, default=20, help="Notifications inserted during the test.")
+        parser.add_argument("--interval", type=float, default=0.2, help="Seconds between two notifications.")
+        parser.add_argument("--timeout", type=float, default=30.0, help="Seconds to wait for the last deliveries.")
+
+    def handle(self, *args, **options):
+        user = get_user_model().objects.create_user(username=f"load-test-{time.time_ns()}", password=None)
+        project = Project.objects.create(
+            owner=user,
+            name="Subscriptions load test",
+            description="Temporary project of load_test_subscriptions",
+            status="open",
+            start_date=date.today(),
+            estimated_end_date=date.today(),
+        )
+        try:
+            report = asyncio.run(self.run(user, project, options))
+        finally:
+            project.delete()
+            user.delete()
+
+        for label, value in report:
+            self.stdout.write(f"{label:<28}{value}")
+
+    async def run(self, user, project, options):
+        app = GraphQLWebSocketApp(schema)
+        rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+        started = time.perf_counter()
+        clients = []
+        for index in range(options["connections"]):
+            client = InProcessClient(app, user=user)
+            await client.connect()
+            await client.send_json({"type": "connection_init"})
+            await client.receive_json()
+            await client.send_json({"id": "1", "type": "subscribe", "payload": {"query": QUERY, "variables": {"projectId": str(project.pk)}}})
+            clients.append(client)
+        while notification_feed.last_id is None or get_pubsub().subscriber_count() < len(clients):
+            await asyncio.sleep(0.01)
+        setup = time.perf_counter() - started
+        rss_after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+        committed = {}
+        latencies = []
+        expected = options["connections"] * options["notifications"]
+
+        async def consume(client):
+            while True:
+                message = await client.receive_json()
+                if message["type"] == "next":
+                    latencies.append(time.perf_counter() - committed[message["payload"]["data"]["notificationAdded"]["title"]])
+
+        consumers = [asyncio.create_task(consume(client)) for client in clients]
+        for index in range(options["notifications"]):
+            title = f"Load test {index}"
+            await run_in_thread(Notification.objects.create)(title=title, message="Load test", project=project)
+            committed[title] = time.perf_counter()  # autocommit, visível para o feed a partir daqui
+            await asyncio.sleep(options["interval"])
+
+        deadline = time.monotonic() + options["timeout"]
+        while len(latencies) < expected and time.monotonic() < deadline:
+            await asyncio.sleep(0.05)
+
+        for task in consumers:
+            task.cancel()
+        for client in clients:
+            await client.disconnect()
+
+        report = [
+            ("connections", len(clients)),
+            ("setup (s)", f"{setup:.2f}"),
+            ("max RSS growth/conn (KiB)", f"{(rss_after - rss_before) / max(len(clients), 1):.1f}"),
+            ("deliveries", f"{len(latencies)}/{expected}"),
+        ]
+        if latencies:
+            report += [
+                ("latency p50 (ms)", f"{statistics.median(latencies) * 1000:.1f}"),
+                ("latency p95 (ms)", f"{percentile(latencies, 0.95) * 1000:.1f}"),
+                ("latency p99 (ms)", f"{percentile(latencies, 0.99) * 1000:.1f}"),
+                ("latency max (ms)", f"{max(latencies) * 1000:.1f}"),
+            ]
+        return report
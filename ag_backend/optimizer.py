@@ -0,0 +1,148 @@
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import Prefetch
+from graphene.utils.str_converters import to_snake_case
+from graphene_django.settings import graphene_settings
+from graphql.language import FieldNode, FragmentSpreadNode, InlineFragmentNode
+from graphql.utilities import value_from_ast_untyped
+
+from .loaders import limit_per_parent, page_bound
+
+PAGINATION_ARGUMENTS = {"first", "last", "before", "after", "offset"}
+
+
+def collect_fields(info, field_nodes):
+    """
+    Merges the selection sets of ``field_nodes`` into a ``{name: [FieldNode, ...]}`` dict, expanding fragment
+    spreads and inline fragments. Aliased selections of the same field are grouped under the field name.
+    """
+
+    fields = {}
+    pending = [node.selection_set for node in field_nodes if node.selection_set]
+    while pending:
+        for selection in pending.pop().selections:
+            if isinstance(selection, FieldNode):
+                fields.setdefault(selection.name.value, []).append(selection)
+            elif isinstance(selection, FragmentSpreadNode):
+                pending.append(info.fragments[selection.name.value].selection_set)
+            elif isinstance(selection, InlineFragmentNode):
+                pending.append(selection.selection_set)
+    return fields
+
+
+def collect_node_fields(info, field_nodes):
+    """
+    Returns the fields selected on ``edges { node { ... } }`` of a connection, or the fields themselves when the
+    selection is not a connection.
+    """
+
+    fields = collect_fields(info, field_nodes)
+    if "edges" not in fields:
+        return fields
+    edges = collect_fields(info, fields["edges"])
+    return collect_fields(info, edges.get("node", []))
+
+
+class QueryPlan:
+    """
+    Columns, ``select_related`` paths and ``Prefetch`` lookups needed to resolve a selection on ``model``.
+    ``columns`` is ``None`` when the selection uses something that is not a model field, so nothing is deferred.
+    """
+
+    def __init__(self, model):
+        self.model = model
+        self.columns = {model._meta.pk.attname}
+        self.select_related = []
+        self.prefetch_related = []
+
+    def apply(self, queryset):
+        if self.select_related:
+            queryset = queryset.select_related(*self.select_related)
+        if self.prefetch_related:
+            queryset = queryset.prefetch_related(*self.prefetch_related)
+        if self.columns is not None:
+            queryset = queryset.only(*self.columns)
+        return queryset
+
+
+def prefetch_bound(info, nodes):
+    """
+    Rows of each parent needed by the pages requested on a reverse relation, the largest among its aliased
+    selections, or ``None`` when one of them needs every row.
+    """
+
+    bounds = []
+    for node in nodes:
+        args = {argument.name.value: value_from_ast_untyped(argument.value, info.variable_values) for argument in node.arguments}
+        bounds.append(page_bound(args, graphene_settings.RELAY_CONNECTION_MAX_LIMIT))
+    return None if None in bounds else max(bounds)
+
+
+def plan_selection(model, info, fields):
+    plan = QueryPlan(model)
+
+    for name, nodes in fields.items():
+        if name.startswith("__"):  # __typename e afins
+            continue
+
+        field_name = to_snake_case(name)
+        try:
+            field = model._meta.get_field(field_name)
+        except FieldDoesNotExist:
+            plan.columns = None  # campo calculado: não adiar colunas que o resolver pode precisar
+            continue
+
+        if not field.is_relation or (field.concrete and field_name == field.attname != field.name):
+            if plan.columns is not None:
+                plan.columns.add(field.attname)  # coluna simples ou o id da FK (ex.: projectId)
+
+        elif field.one_to_one or (field.concrete and field.many_to_one):  # FKs e one-to-one, inclusive reverso (ex.: stats)
+            child = plan_selection(field.related_model, info, collect_fields(info, nodes))
+            plan.select_related.append(field.name)
+            plan.select_related.extend(f"{field.name}__{path}" for path in child.select_related)
+            plan.prefetch_related.extend(
+                Prefetch(f"{field.name}__{prefetch.prefetch_through}", queryset=prefetch.queryset) for prefetch in child.prefetch_related
+            )
+            if plan.columns is not None:
+                if child.columns is None:
+                    plan.columns = None
+                else:
+                    if field.concrete:
+                        plan.columns.add(field.name)
+                    plan.columns.update(f"{field.name}__{column}" for column in child.columns)
+
+        elif field.one_to_many and not any(argument.name.value not in PAGINATION_ARGUMENTS for node in nodes for argument in node.arguments):
+            # relações reversas filtradas continuam com a consulta do filterset
+            child = plan_selection(field.related_model, info, collect_node_fields(info, nodes))
+            if child.columns is not None:
+                child.columns.add(field.field.attname)  # a FK é necessária para agrupar por pai
+
+            queryset = field.related_model._default_manager.all()
+            if not queryset.ordered:
+                queryset = queryset.order_by("pk")  # mesma ordem dos loaders, mantendo os cursores estáveis
+            queryset = child.apply(queryset)
+            bound = prefetch_bound(info, nodes)
+            if bound is not None:  # apenas a página de cada pai, como nos loaders
+                queryset = limit_per_parent(queryset, field.field.attname, bound)
+            plan.prefetch_related.append(Prefetch(field.get_accessor_name(), queryset=queryset))
+
+        elif field.one_to_many:
+            pass  # resolvida pelo filterset; a pk já está nas colunas
+
+        else:
+            plan.columns = None
+
+    return plan
+
+
+def optimize_queryset(queryset, info, required_columns=()):
+    """
+    Applies ``select_related``, ``prefetch_related`` and ``.only()`` to ``queryset`` according to the nodes selected
+    on the connection being resolved, so a page and its relations are fetched with a fixed number of queries.
+    ``required_columns`` are kept even when not selected (e.g. the sort key of a keyset connection).
+    """
+
+    fields = collect_node_fields(info, info.field_nodes)
+    plan = plan_selection(queryset.model, info, fields)
+    if plan.columns is not None:
+        plan.columns.update(required_columns)
+    return plan.apply(queryset)
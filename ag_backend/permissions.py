@@ -0,0 +1,165 @@
+import threading
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.db.models import Q
+from django.db.models.signals import post_delete, post_init, post_save
+
+from apps.projects.models import Project
+
+from .bulk import to_pk
+from .context import get_request_scoped
+
+
+def get_permission_options():
+    options = getattr(settings, "GRAPHQL_PERMISSIONS", {})
+    return {"BACKEND": options.get("BACKEND"), "TIMEOUT": options.get("TIMEOUT", 300)}
+
+
+def owned_projects_key(user_id):
+    return f"permissions:projects:{user_id}"
+
+
+def get_shared_cache():
+    backend = get_permission_options()["BACKEND"]
+    return caches[backend] if backend else None
+
+
+class ProjectPermissions:
+    """
+    Which projects a user can edit, resolved once per request: su/staff edit every project, the other users the
+    projects they own. The ids of the owned projects are loaded with a single query on the first check (and kept in
+    the ``GRAPHQL_PERMISSIONS["BACKEND"]`` cache between requests when configured, invalidated when a project is
+    created, deleted or changes owner), so the checks of a mutation do not fetch the ``Project`` again.
+    """
+
+    def __init__(self, user):
+        self.user = user
+        self.authenticated = user is not None and user.is_authenticated
+        self.unrestricted = self.authenticated and (user.is_superuser or user.is_staff)
+        self._lock = threading.RLock()  # campos resolvidos em threads paralelas pela view async
+        self._owned = None
+        self._existing = set()  # projetos que sabidamente existem
+        self._looked_up = set()  # projetos já procurados, existentes ou não
+
+    @property
+    def owned_project_ids(self):
+        with self._lock:
+            if self._owned is None:
+                self._load()
+            return self._owned
+
+    def _load(self, requested=()):
+        cache = get_shared_cache()
+        owned = cache.get(owned_projects_key(self.user.id)) if cache else None
+        if owned is not None:
+            self._owned = set(owned)
+            return
+
+        # os projetos do usuário e, na mesma consulta, a existência dos projetos pedidos
+        requested = [pk for pk in requested if pk is not None]
+        rows = Project.objects.filter(Q(owner_id=self.user.id) | Q(pk__in=requested)).values_list("pk", "owner_id")
+        self._owned = set()
+        self._looked_up.update(requested)
+        for pk, owner_id in rows:
+            self._existing.add(pk)
+            if owner_id == self.user.id:
+                self._owned.add(pk)
+        if cache:
+            cache.set(owned_projects_key(self.user.id), sorted(self._owned), get_permission_options()["TIMEOUT"])
+
+    def check_projects(self, project_ids):
+        """
+        Returns ``{project_id: error}`` for the projects of ``project_ids`` the user cannot edit, missing projects
+        included; the editable ones are left out. At most one query, none when the projects are the user's own and
+        already loaded.
+        """
+
+        pks = {to_pk(pk) for pk in project_ids}
+        if not self.authenticated:
+            return dict.fromkeys(pks, "Authentication required.")
+        with self._lock:
+            return self._check(pks)
+
+    def _check(self, pks):
+        if not self.unrestricted and self._owned is None:
+            self._load(pks)
+
+        unknown = pks - self._looked_up - (set() if self.unrestricted else self._owned)
+        unknown.discard(None)
+        if unknown:
+            self._existing.update(Project.objects.filter(pk__in=unknown).values_list("pk", flat=True))
+            self._looked_up.update(unknown)
+
+        errors = {}
+        for pk in pks:
+            if not self.unrestricted and pk in self._owned:
+                continue
+            if pk not in self._existing:
+                errors[pk] = "Project not found."
+            elif not self.unrestricted:
+                errors[pk] = "Permission denied. Not the project owner."
+        return errors
+
+    def check_project(self, project_id):
+        """
+        Returns the error that prevents the user from editing ``project_id``, or ``None``.
+        """
+
+        return self.check_projects([project_id]).get(to_pk(project_id))
+
+    def can_edit(self, project_id):
+        return self.check_project(project_id) is None
+
+    def filter(self, queryset, lookup="project"):
+        """
+        Restricts ``queryset`` to the rows of the projects the user can see, ``lookup`` being the path from its model
+        to the project id. Done by the database with a subquery on ``Project.owner``, not by checking each row.
+        """
+
+        if self.unrestricted:
+            return queryset
+        if not self.authenticated:
+            return queryset.none()
+        return queryset.filter(**{f"{lookup}__in": Project.objects.filter(owner_id=self.user.id).values("pk")})
+
+
+def get_permissions(info):
+    return get_context_permissions(info.context)
+
+
+def get_context_permissions(context):
+    # também usado pelas views fora do GraphQL (exportação, upload/download), com o HttpRequest como contexto
+    user = context.get("user") if isinstance(context, dict) else context.user
+    return get_request_scoped(context, "project_permissions", lambda: ProjectPermissions(user))
+
+
+def invalidate_owned_projects(*user_ids):
+    cache = get_shared_cache()
+    if cache is None:
+        return
+    keys = [owned_projects_key(user_id) for user_id in set(user_ids) if user_id is not None]
+    cache.delete_many(keys)
+    # de novo após o commit: uma requisição concorrente pode ter lido o estado anterior enquanto a transação estava aberta
+    transaction.on_commit(lambda: cache.delete_many(keys))
+
+
+def remember_owner(sender, instance, **kwargs):
+    instance._permissions_owner_id = instance.__dict__.get("owner_id")
+
+
+def on_project_saved(sender, instance, created, raw=False, **kwargs):
+    previous = getattr(instance, "_permissions_owner_id", None)
+    if created or previous != instance.owner_id:
+        invalidate_owned_projects(previous, instance.owner_id)
+    instance._permissions_owner_id = instance.owner_id
+
+
+def on_project_deleted(sender, instance, **kwargs):
+    invalidate_owned_projects(instance.owner_id)
+
+
+post_init.connect(remember_owner, sender=Project, dispatch_uid="permissions_project_init")
+post_save.connect(on_project_saved, sender=Project, dispatch_uid="permissions_project_save")
+post_delete.connect(on_project_deleted, sender=Project, dispatch_uid="permissions_project_delete")
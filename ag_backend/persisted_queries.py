@@ -0,0 +1,53 @@
+import hashlib
+
+from django.conf import settings
+from django.core.cache import caches
+
+from .cache import LRUCache
+
+
+def hash_query(query):
+    return hashlib.sha256(query.encode("utf-8")).hexdigest()
+
+
+class PersistedQueryStore:
+    """
+    Registry of persisted queries keyed by the SHA-256 of the query text. The parsed and validated ``DocumentNode``
+    is kept in an in-process LRU; the query text goes to a shared Django cache so every worker can rebuild the
+    document for a hash registered by another one.
+    """
+
+    def __init__(self, maxsize=1000, backend="default", timeout=None):
+        self.documents = LRUCache(maxsize, ttl=None)
+        self.backend = backend
+        self.timeout = timeout
+
+    @classmethod
+    def from_settings(cls):
+        options = getattr(settings, "GRAPHQL_PERSISTED_QUERIES", {})
+        return cls(maxsize=options.get("MAXSIZE", 1000), backend=options.get("BACKEND", "default"), timeout=options.get("TIMEOUT"))
+
+    @property
+    def shared(self):
+        return caches[self.backend] if self.backend else None
+
+    @staticmethod
+    def make_key(query_hash):
+        return f"graphql:persisted:{query_hash}"
+
+    def get_document(self, query_hash):
+        return self.documents.get(query_hash)
+
+    def get_query(self, query_hash):
+        return self.shared.get(self.make_key(query_hash)) if self.shared is not None else None
+
+    def register(self, query_hash, query, document):
+        self.documents.set(query_hash, document)
+        if self.shared is not None:
+            self.shared.set(self.make_key(query_hash), query, self.timeout)
+
+    def clear(self):
+        self.documents.clear()
+
+
+persisted_queries = PersistedQueryStore.from_settings()
@@ -0,0 +1,136 @@
+import asyncio
+import threading
+from collections import defaultdict
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+# marca o fim de uma assinatura fechada na fila do consumidor
+CLOSED = object()
+
+
+def get_subscription_options():
+    options = getattr(settings, "GRAPHQL_SUBSCRIPTIONS", {})
+    return {
+        "PUBSUB": options.get("PUBSUB", "ag_backend.pubsub.LocalPubSub"),
+        "POLL_INTERVAL": options.get("POLL_INTERVAL", 0.5),
+        "BATCH_SIZE": options.get("BATCH_SIZE", 500),
+        "QUEUE_SIZE": options.get("QUEUE_SIZE", 100),
+        "CONNECTION_INIT_TIMEOUT": options.get("CONNECTION_INIT_TIMEOUT", 10),
+    }
+
+
+class Subscription:
+    """
+    Messages published to ``topics``, consumed with ``async for`` on the event loop that created the subscription.
+    A consumer more than ``maxsize`` messages behind loses the oldest ones, counted in ``dropped``, so a slow client
+    cannot grow the memory of the worker.
+    """
+
+    def __init__(self, pubsub, topics, maxsize):
+        self.pubsub = pubsub
+        self.topics = tuple(topics)
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(maxsize)
+        self.dropped = 0
+        self.closed = False
+
+    def put(self, message):
+        if not self.closed:
+            self.deliver(message)
+
+    def deliver(self, message):
+        if self.queue.full():  # descartar a mais antiga
+            self.queue.get_nowait()
+            self.dropped += 1
+        self.queue.put_nowait(message)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        if self.closed:
+            raise StopAsyncIteration
+        message = await self.queue.get()
+        if message is CLOSED:
+            raise StopAsyncIteration
+        return message
+
+    def close(self):
+        if self.closed:
+            return
+        self.closed = True
+        self.pubsub.unsubscribe(self)
+        try:
+            self.loop.call_soon_threadsafe(self.deliver, CLOSED)  # acordar o consumidor parado no get()
+        except RuntimeError:  # event loop já encerrado
+            pass
+
+
+class LocalPubSub:
+    """
+    In-process pub/sub: ``publish()`` fans a message out to the subscriptions of the topic in this process. It can be
+    called from any thread, delivery happens on the event loop of each subscription. This is the stand-in for a
+    shared channel layer: any class with the same ``subscribe``/``unsubscribe``/``publish``/``subscriber_count``
+    methods can be set in ``GRAPHQL_SUBSCRIPTIONS["PUBSUB"]``.
+    """
+
+    def __init__(self, queue_size=100):
+        self.queue_size = queue_size
+        self._subscriptions = defaultdict(set)
+        self._lock = threading.Lock()
+
+    def subscribe(self, topics, maxsize=None):
+        subscription = Subscription(self, topics, maxsize or self.queue_size)
+        with self._lock:
+            for topic in subscription.topics:
+                self._subscriptions[topic].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            for topic in subscription.topics:
+                subscriptions = self._subscriptions.get(topic)
+                if subscriptions is not None:
+                    subscriptions.discard(subscription)
+                    if not subscriptions:
+                        del self._subscriptions[topic]
+
+    def publish(self, topic, message):
+        """
+        Delivers ``message`` to the subscriptions of ``topic`` and returns how many were reached.
+        """
+
+        with self._lock:
+            subscriptions = list(self._subscriptions.get(topic, ()))
+
+        delivered = 0
+        for subscription in subscriptions:
+            try:
+                subscription.loop.call_soon_threadsafe(subscription.put, message)
+            except RuntimeError:  # o event loop da assinatura foi encerrado sem fechá-la
+                self.unsubscribe(subscription)
+            else:
+                delivered += 1
+        return delivered
+
+    def subscriber_count(self):
+        with self._lock:
+            return len({subscription for subscriptions in self._subscriptions.values() for subscription in subscriptions})
+
+
+_pubsub = None
+_pubsub_lock = threading.Lock()
+
+
+def get_pubsub():
+    """
+    Returns the process-wide pub/sub backend configured in ``GRAPHQL_SUBSCRIPTIONS["PUBSUB"]``.
+    """
+
+    global _pubsub
+    with _pubsub_lock:
+        if _pubsub is None:
+            options = get_subscription_options()
+            _pubsub = import_string(options["PUBSUB"])(queue_size=options["QUEUE_SIZE"])
+    return _pubsub
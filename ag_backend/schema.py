@@ -1,19 +1,134 @@
 import graphene
-from graphene_django.filter import DjangoFilterConnectionField
+from django.db.models import Count, DateField, Q, Sum
+from django.db.models.functions import Trunc
+from ag_backend.cache import aget_cached_object, get_cached_object
+from ag_backend.execution import run_in_thread
+from ag_backend.fields import FilterConnectionField, KeysetConnectionField
+from ag_backend.permissions import get_permissions
 from apps.accounts.models import DefaultAccount
 from apps.accounts.schema import UserType, CreateStaff, CreateUser, UpdateUser, DeleteUser
 from apps.activities.models import Activity
-from apps.activities.schema import ActivityType, CreateActivity, DeleteActivity, UpdateActivity
+from apps.activities.schema import ActivityGroupBy, ActivityStatsGroup, ActivityType, BulkCreateActivities, BulkDeleteActivities, BulkUpdateActivities, CreateActivity, DeleteActivity, UpdateActivity
 from apps.documents.models import Document
 from apps.documents.schema import CreateDocument, DeleteDocument, DocumentType, UpdateDocument
-from apps.notifications.models import Notification
-from apps.notifications.schema import CreateNotification, DeleteNotification, NotificationType, UpdateNotification
-from apps.projects.models import Project
+from apps.notifications.models import ArchivedNotification, Notification
+from apps.notifications.schema import (
+    BulkCreateNotifications,
+    BulkDeleteNotifications,
+    BulkUpdateNotifications,
+    CreateNotification,
+    MarkNotificationsRead,
+    DeleteNotification,
+    NotificationSubscription,
+    NotificationType,
+    UpdateNotification,
+)
+from apps.projects.models import Project, ProjectStats
 from apps.projects.schema import CreateProject, DeleteProject, ProjectType, UpdateProject
+from apps.projects.stats import NOTIFICATION_LINKS
 from apps.reports.models import Report
-from apps.reports.schema import CreateReport, DeleteReport, ReportType, UpdateReport
+from apps.reports.schema import CreateReport, DeleteReport, RegenerateReport, ReportType, UpdateReport
+from apps.search.schema import resolve_autocomplete, resolve_search, SearchKind, SearchResultConnection, SearchResultType
 from apps.tasks.models import Task
-from apps.tasks.schema import CreateTask, DeleteTask, TaskType, UpdateTask
+from apps.tasks.schema import BulkCreateTasks, BulkDeleteTasks, BulkUpdateTasks, CreateTask, DeleteTask, HistogramBucket, TaskDueBucket, TaskType, UpdateTask
+
+
+def visible_to(info, queryset, project_id=None):
+    """
+    Restricts ``queryset`` (of a model with a ``project`` FK) to the projects the user can see: the given project
+    when ``project_id`` is passed, every project owned by the user otherwise (all of them for su/staff).
+    """
+
+    permissions = get_permissions(info)
+    if project_id is not None:
+        project = get_cached_object(info, Project, project_id)
+        if not project:
+            raise Exception("Projeto não encontrado.")
+        if not permissions.can_edit(project.pk):
+            raise Exception("Você não tem permissão para acessar este projeto.")
+        return queryset.filter(project_id=project.pk)
+    return permissions.filter(queryset, "project")
+
+
+# campos de objeto único: modelo, mensagem de não encontrado e de acesso negado (None = visível a qualquer usuário autenticado)
+ROOT_OBJECTS = {
+    "user": (DefaultAccount, "Usuário não encontrado.", None),
+    "activity": (Activity, "Atividade não encontrada.", "Você não tem permissão para acessar esta atividade."),
+    "document": (Document, "Documento não encontrado.", "Você não tem permissão para acessar este documento."),
+    "notification": (Notification, "Notificação não encontrada.", "Você não tem permissão para acessar esta notificação."),
+    "project": (Project, "Projeto não encontrado.", "Você não tem permissão para acessar este projeto."),
+    "report": (Report, "Relatório não encontrado.", "Você não tem permissão para acessar este relatório."),
+    "task": (Task, "Tarefa não encontrada.", "Você não tem permissão para acessar esta tarefa."),
+}
+
+
+def get_authenticated_user(info):
+    user = info.context.get("user") if isinstance(info.context, dict) else info.context.user
+    if not user.is_authenticated:
+        raise Exception("Autenticação necessária.")
+    return user
+
+
+def project_source(instance):
+    """
+    For a notification without its own project, returns ``(model, pk)`` of the linked task, activity, report or
+    document, whose ``project_id`` decides who can see it. Returns ``None`` for every other instance (and for a
+    notification with no link), meaning ``instance`` itself carries the project.
+    """
+
+    if isinstance(instance, Notification) and instance.project_id is None:
+        for attname, model in NOTIFICATION_LINKS.items():
+            if getattr(instance, attname) is not None:
+                return model, getattr(instance, attname)
+    return None
+
+
+def check_root_object(info, name, project_id):
+    # mesmas regras das conexões: su/staff ou dono do projeto referente ao objeto, pelas permissões do request
+    denied = ROOT_OBJECTS[name][2]
+    permissions = get_permissions(info)
+    if denied and not (permissions.unrestricted or (project_id is not None and permissions.can_edit(project_id))):
+        raise Exception(denied)
+
+
+def project_id_of(instance):
+    return instance.pk if isinstance(instance, Project) else getattr(instance, "project_id", None)
+
+
+def resolve_root_object(info, name, id):
+    """
+    Resolves the single-object field ``name`` through the object cache, checking that the user can see it.
+    """
+
+    get_authenticated_user(info)
+    model, not_found, _denied = ROOT_OBJECTS[name]
+    instance = get_cached_object(info, model, id)
+    if not instance:
+        raise Exception(not_found)
+
+    source = project_source(instance)
+    source = get_cached_object(info, *source) if source else instance
+    project_id = project_id_of(source) if source else None
+    check_root_object(info, name, project_id)
+    return instance
+
+
+async def aresolve_root_object(info, name, id):
+    """
+    Async variant of ``resolve_root_object``, used by ``AsyncQuery``.
+    """
+
+    get_authenticated_user(info)
+    model, not_found, _denied = ROOT_OBJECTS[name]
+    instance = await aget_cached_object(info, model, id)
+    if not instance:
+        raise Exception(not_found)
+
+    source = project_source(instance)
+    source = await aget_cached_object(info, *source) if source else instance
+    project_id = project_id_of(source) if source else None
+    await run_in_thread(check_root_object)(info, name, project_id)  # pode consultar os projetos do usuário
+    return instance
 
 
 class Query(graphene.ObjectType):
@@ -25,71 +140,121 @@ class Query(graphene.ObjectType):
     report = graphene.Field(ReportType, id=graphene.ID(required=True))
     task = graphene.Field(TaskType, id=graphene.ID(required=True))
 
-    all_users = DjangoFilterConnectionField(UserType)
-    all_activities = DjangoFilterConnectionField(ActivityType)
-    all_documents = DjangoFilterConnectionField(DocumentType)
-    all_notifications = DjangoFilterConnectionField(NotificationType)
-    all_projects = DjangoFilterConnectionField(ProjectType)
-    all_reports = DjangoFilterConnectionField(ReportType)
-    all_tasks = DjangoFilterConnectionField(TaskType)
+    all_users = FilterConnectionField(UserType)
+    all_activities = FilterConnectionField(ActivityType)
+    all_documents = FilterConnectionField(DocumentType)
+    all_notifications = KeysetConnectionField(NotificationType, sort_key="-created_at", archive=ArchivedNotification)
+    all_projects = FilterConnectionField(ProjectType)
+    all_reports = FilterConnectionField(ReportType)
+    all_tasks = KeysetConnectionField(TaskType, sort_key="due_date")
 
-"""    def resolve_user(self, info, id):
-        return DefaultAccount.objects.get(pk=id)
+    activity_stats = graphene.List(
+        graphene.NonNull(ActivityStatsGroup),
+        group_by=graphene.List(graphene.NonNull(ActivityGroupBy), required=True),
+        project_id=graphene.ID(),
+    )
+    unread_notifications = graphene.Int(project_id=graphene.ID())
+    task_due_histogram = graphene.List(
+        graphene.NonNull(TaskDueBucket),
+        bucket=HistogramBucket(required=True),
+        project_id=graphene.ID(),
+        due_after=graphene.DateTime(),
+        due_before=graphene.DateTime(),
+    )
+    # busca full-text nas entidades visíveis ao usuário, ordenada por relevância
+    search = graphene.relay.ConnectionField(SearchResultConnection, query=graphene.String(required=True), types=graphene.List(graphene.NonNull(SearchKind)))
+    # títulos que começam com o prefixo (usernames, nomes de projeto...), para os campos de seleção da interface
+    autocomplete = graphene.List(graphene.NonNull(SearchResultType), prefix=graphene.String(required=True), kind=SearchKind(required=True), first=graphene.Int())
 
-    def resolve_activity(self, info, id):
-        user = info.context.user
-        activity = Activity.objects.filter(pk=id).select_related("project").first()
-        if not activity:
-            raise Exception("Atividade não encontrada.")
+    def resolve_activity_stats(self, info, group_by, project_id=None):
+        columns = list(dict.fromkeys(column.value for column in group_by))  # sem repetições, na ordem pedida
+        if not columns:
+            raise Exception("Informe ao menos uma coluna em groupBy.")
 
-        # verificar se é su, staff ou dono do projeto referente a atividade
-        if user.is_superuser or user.is_staff or activity.project.cleiton.user == user:
-            return activity
-        else:
-            raise Exception("Você não tem permissão para acessar esta atividade.")
+        # GROUP BY/COUNT no banco, uma linha por combinação de valores
+        queryset = visible_to(info, Activity.objects.all(), project_id)
+        rows = queryset.values(*columns).annotate(count=Count("pk")).order_by(*columns)
+        return [ActivityStatsGroup(**row) for row in rows]
 
-    def resolve_document(self, info, id):
-        user = info.context.user
-        document = Document.objects.filter(pk=id).select_related("project").first()
-        if not document:
-            raise Exception("Documento não encontrado.")
+    def resolve_task_due_histogram(self, info, bucket, project_id=None, due_after=None, due_before=None):
+        queryset = visible_to(info, Task.objects.all(), project_id)
+        if due_after:
+            queryset = queryset.filter(due_date__gte=due_after)
+        if due_before:
+            queryset = queryset.filter(due_date__lt=due_before)
 
-        # verificar se é su, staff ou dono do projeto referente ao doc
-        if user.is_superuser or user.is_staff or document.project.cleiton.user == user:
-            return document
-        else:
-            raise Exception("Você não tem permissão para acessar este documento.")
+        # truncar a data no banco (date_trunc/strftime), no fuso do servidor
+        rows = (
+            queryset.annotate(start=Trunc("due_date", bucket.value, output_field=DateField()))
+            .values("start")
+            .annotate(count=Count("pk"), completed=Count("pk", filter=Q(completed=True)))
+            .order_by("start")
+        )
+        return [TaskDueBucket(**row) for row in rows]
+
+    def resolve_unread_notifications(self, info, project_id=None):
+        # leitura do rollup mantido em ProjectStats, sem contar notificações
+        queryset = visible_to(info, ProjectStats.objects.all(), project_id)
+        return queryset.aggregate(total=Sum("notifications_unread"))["total"] or 0
+
+    def resolve_search(self, info, query, types=None, **args):
+        return resolve_search(info, query, types, **args)
+
+    def resolve_autocomplete(self, info, prefix, kind, first=None):
+        return resolve_autocomplete(info, prefix, kind, first)
+
+    def resolve_user(self, info, id):
+        return resolve_root_object(info, "user", id)
+
+    def resolve_activity(self, info, id):
+        return resolve_root_object(info, "activity", id)
+
+    def resolve_document(self, info, id):
+        return resolve_root_object(info, "document", id)
 
     def resolve_notification(self, info, id):
-        return Notification.objects.get(pk=id)
+        return resolve_root_object(info, "notification", id)
 
     def resolve_project(self, info, id):
-        user = info.context.user
-        project = Project.objects.filter(pk=id).first()
-        if not project:
-            raise Exception("Projeto não encontrado.")
-
-        # verificar se é su, staff ou dono do projeto
-        if user.is_superuser or user.is_staff or project.cleiton.user == user:
-            return project
-        else:
-            raise Exception("Você não tem permissão para acessar este projeto.")
+        return resolve_root_object(info, "project", id)
 
     def resolve_report(self, info, id):
-        return Report.objects.get(pk=id)
+        return resolve_root_object(info, "report", id)
 
     def resolve_task(self, info, id):
-        user = info.context.user
-        task = Task.objects.filter(pk=id).select_related("project").first()
-        if not task:
-            raise Exception("Tarefa não encontrada.")
-
-        # verificar se é su, staff ou dono do projeto da referida task
-        if user.is_superuser or user.is_staff or task.project.cleiton.user == user:
-            return task
-        else:
-            raise Exception("Você não tem permissão para acessar esta tarefa.")
-"""
+        return resolve_root_object(info, "task", id)
+
+
+class AsyncQuery(Query):
+    """
+    Query served by ``AsyncGraphQLView``: the single-object fields resolve on the event loop with the async cache and
+    ORM APIs, the connections keep graphene-django's sync resolvers and run in worker threads.
+    """
+
+    class Meta:
+        name = "Query"
+
+    async def resolve_user(self, info, id):
+        return await aresolve_root_object(info, "user", id)
+
+    async def resolve_activity(self, info, id):
+        return await aresolve_root_object(info, "activity", id)
+
+    async def resolve_document(self, info, id):
+        return await aresolve_root_object(info, "document", id)
+
+    async def resolve_notification(self, info, id):
+        return await aresolve_root_object(info, "notification", id)
+
+    async def resolve_project(self, info, id):
+        return await aresolve_root_object(info, "project", id)
+
+    async def resolve_report(self, info, id):
+        return await aresolve_root_object(info, "report", id)
+
+    async def resolve_task(self, info, id):
+        return await aresolve_root_object(info, "task", id)
+
 
 class Mutation(graphene.ObjectType):
     create_staff = CreateStaff.Field()
@@ -100,6 +265,9 @@ class Mutation(graphene.ObjectType):
     create_activity = CreateActivity.Field()
     update_activity = UpdateActivity.Field()
     delete_activity = DeleteActivity.Field()
+    bulk_create_activities = BulkCreateActivities.Field()
+    bulk_update_activities = BulkUpdateActivities.Field()
+    bulk_delete_activities = BulkDeleteActivities.Field()
 
     create_document = CreateDocument.Field()
     update_document = UpdateDocument.Field()
@@ -108,6 +276,10 @@ class Mutation(graphene.ObjectType):
     create_notification = CreateNotification.Field()
     update_notification = UpdateNotification.Field()
     delete_notification = DeleteNotification.Field()
+    bulk_create_notifications = BulkCreateNotifications.Field()
+    bulk_update_notifications = BulkUpdateNotifications.Field()
+    bulk_delete_notifications = BulkDeleteNotifications.Field()
+    mark_notifications_read = MarkNotificationsRead.Field()
 
     create_project = CreateProject.Field()
     update_project = UpdateProject.Field()
@@ -115,11 +287,24 @@ class Mutation(graphene.ObjectType):
 
     create_report = CreateReport.Field()
     update_report = UpdateReport.Field()
+    regenerate_report = RegenerateReport.Field()
     delete_report = DeleteReport.Field()
 
     create_task = CreateTask.Field()
     update_task = UpdateTask.Field()
     delete_task = DeleteTask.Field()
+    bulk_create_tasks = BulkCreateTasks.Field()
+    bulk_update_tasks = BulkUpdateTasks.Field()
+    bulk_delete_tasks = BulkDeleteTasks.Field()
+
+
+class Subscription(NotificationSubscription):
+    """
+    Served over WebSocket (``graphql-transport-ws``) at ``/graphql/ws/`` by the ASGI application.
+    """
+
 
+schema = graphene.Schema(query=Query, mutation=Mutation, subscription=Subscription)
 
-schema = graphene.Schema(query=Query, mutation=Mutation)
+# mesmo schema com os resolvers async, servido pela view ASGI
+async_schema = graphene.Schema(query=AsyncQuery, mutation=Mutation, subscription=Subscription)
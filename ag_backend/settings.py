@@ -35,12 +35,14 @@ INSTALLED_APPS = [
     "allauth.account",
     "allauth.socialaccount",
     "graphene_django",
+    "ag_backend",
     "apps.accounts",
     "apps.activities",
     "apps.documents",
     "apps.notifications",
     "apps.projects",
     "apps.reports",
+    "apps.search",
     "apps.tasks",
 ]
 
@@ -53,6 +55,81 @@ SITE_ID = 1
 
 GRAPHENE = {"SCHEMA": "ag_backend.schema.schema"}
 
+# o cache compartilhado pode apontar para o Redis em produção (django.core.cache.backends.redis.RedisCache)
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    }
+}
+
+# cache dos campos de objeto único da Query (LRU local + alias de CACHES como cache compartilhado, ou None)
+GRAPHQL_OBJECT_CACHE = {"MAXSIZE": 2048, "TTL": 30, "BACKEND": "default"}
+
+# projetos de cada usuário usados nas verificações de permissão: alias de CACHES para compartilhar entre requisições
+# (None = uma consulta por requisição), invalidado quando um projeto muda de dono; TIMEOUT limita mudanças feitas sem save()
+GRAPHQL_PERMISSIONS = {"BACKEND": None, "TIMEOUT": 300}
+
+# persisted queries: documentos validados em LRU local, texto das queries no alias de CACHES (TIMEOUT None = sem expirar)
+GRAPHQL_PERSISTED_QUERIES = {"MAXSIZE": 1000, "BACKEND": "default", "TIMEOUT": None}
+
+# cache de parse + validação dos documentos recebidos pelo GraphQLView, por texto da query e versão do schema
+GRAPHQL_DOCUMENT_CACHE = {"MAXSIZE": 500}
+
+# limites de profundidade e custo por papel do usuário (None = sem limite), ver ag_backend.validation.QueryCostRule
+GRAPHQL_QUERY_LIMITS = {
+    "default": {"MAX_DEPTH": 6, "MAX_COST": 20000},
+    "staff": {"MAX_DEPTH": 10, "MAX_COST": 200000},
+    "superuser": {"MAX_DEPTH": None, "MAX_COST": None},
+}
+
+# mutations em lote (bulkCreateTasks etc.): máximo de itens por requisição e tamanho dos lotes de INSERT/UPDATE
+GRAPHQL_BULK_MUTATIONS = {"MAX_ITEMS": 5000, "BATCH_SIZE": 500}
+
+# view ASGI (/graphql/async/): campos raiz síncronos em threads próprias, com conexão própria, para rodarem em paralelo
+GRAPHQL_ASYNC = {"PARALLEL_SYNC_FIELDS": True}
+
+# subscriptions via WebSocket (/graphql/ws/ no ASGI): backend de pub/sub (LocalPubSub = apenas no processo), intervalo
+# e lote do feed de notificações, mensagens pendentes por assinatura e prazo em segundos para o connection_init
+GRAPHQL_SUBSCRIPTIONS = {
+    "PUBSUB": "ag_backend.pubsub.LocalPubSub",
+    "POLL_INTERVAL": 0.5,
+    "BATCH_SIZE": 500,
+    "QUEUE_SIZE": 100,
+    "CONNECTION_INIT_TIMEOUT": 10,
+}
+
+# notificações lidas há mais de ARCHIVE_AFTER_DAYS dias vão para a tabela de arquivo (comando archive_notifications)
+NOTIFICATION_RETENTION = {"ARCHIVE_AFTER_DAYS": 90, "BATCH_SIZE": 1000}
+
+# exportação em /export/<recurso>.<csv|ndjson>: linhas lidas por vez do cursor do servidor e escritas por chunk
+DATA_EXPORT = {"CHUNK_SIZE": 2000}
+
+# geração de relatórios (worker generate_reports): conteúdo em cache no alias de CACHES por projeto e versão dos dados,
+# linhas máximas por listagem e reports por rodada do worker
+REPORT_ENGINE = {"BACKEND": "default", "CACHE_TIMEOUT": 86400, "MAX_ROWS": 500, "BATCH_SIZE": 20}
+
+# conteúdo dos documentos: diretório do storage (blobs por SHA-256 e uploads parciais), tamanho máximo de arquivo e de
+# cada PATCH do upload, cabeçalho do proxy para servir os downloads (ex.: "X-Accel-Redirect" no nginx, None = Django),
+# e para o collect_blobs: horas sem atividade até cancelar um upload e blobs removidos por transação
+DOCUMENT_STORAGE = {
+    "LOCATION": BASE_DIR / "media" / "documents",
+    "MAX_SIZE": 2 * 1024**3,
+    "MAX_CHUNK_SIZE": 64 * 1024**2,
+    "SENDFILE_HEADER": None,
+    "SENDFILE_PREFIX": "/protected/documents/",
+    "UPLOAD_EXPIRY_HOURS": 24,
+    "GC_BATCH_SIZE": 500,
+}
+
+# índice da busca full-text: entradas por upsert/lote do rebuild_search_index, caracteres indexados do corpo e
+# resultados do autocomplete (padrão e máximo por requisição)
+SEARCH_INDEX = {
+    "BATCH_SIZE": 500,
+    "MAX_BODY_LENGTH": 100000,
+    "AUTOCOMPLETE_LIMIT": 10,
+    "AUTOCOMPLETE_MAX_LIMIT": 50,
+}
+
 MIDDLEWARE = [
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
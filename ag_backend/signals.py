@@ -0,0 +1,24 @@
+from django.db.models.signals import post_delete, post_save
+
+from apps.accounts.models import DefaultAccount
+from apps.activities.models import Activity
+from apps.documents.models import Document
+from apps.notifications.models import Notification
+from apps.projects.models import Project
+from apps.reports.models import Report
+from apps.tasks.models import Task
+
+from .cache import object_cache
+
+# modelos servidos pelos campos de objeto único da Query
+CACHED_MODELS = (DefaultAccount, Activity, Document, Notification, Project, Report, Task)
+
+
+def invalidate_cached_object(sender, instance, **kwargs):
+    object_cache.invalidate(sender, instance.pk)
+
+
+# conectar por modelo: um receiver sem sender impediria o fast delete (DELETE sem SELECT) de todos os outros modelos
+for model in CACHED_MODELS:
+    post_save.connect(invalidate_cached_object, sender=model, dispatch_uid=f"object_cache_save_{model._meta.label_lower}")
+    post_delete.connect(invalidate_cached_object, sender=model, dispatch_uid=f"object_cache_delete_{model._meta.label_lower}")
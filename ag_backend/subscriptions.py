@@ -0,0 +1,292 @@
+import asyncio
+import json
+import time
+from importlib import import_module
+from types import SimpleNamespace
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.contrib import auth
+from django.http.cookie import parse_cookie
+from django.http.request import split_domain_port, validate_host
+from graphql import ExecutionResult, GraphQLError, OperationType, create_source_event_stream, execute, get_operation_ast
+
+from .execution import run_in_thread
+from .pubsub import get_subscription_options
+from .views import GraphQLView
+
+PROTOCOL = "graphql-transport-ws"
+
+
+class GraphQLWebSocketApp:
+    """
+    ASGI application serving the schema over WebSocket with the ``graphql-transport-ws`` protocol (the one used by
+    ``graphql-ws`` and Apollo). The user comes from ``scope["user"]`` when an auth middleware sets it, or from the
+    session cookie. Subscription events are executed in a worker thread, since the nested resolvers use the sync ORM;
+    queries are answered with a single ``next``, mutations stay on ``POST /graphql/``.
+    """
+
+    def __init__(self, schema):
+        self.schema = schema
+        self.view = GraphQLView(schema=schema)  # parse, validação e custo pelos mesmos caches da view HTTP
+
+    async def __call__(self, scope, receive, send):
+        await GraphQLWebSocketConnection(self, scope, receive, send).run()
+
+
+class GraphQLWebSocketConnection:
+    def __init__(self, app, scope, receive, send):
+        self.app = app
+        self.scope = scope
+        self.receive = receive
+        self._send = send
+        self.headers = dict(scope.get("headers") or ())
+        self.send_lock = asyncio.Lock()
+        self.operations = {}
+        self.user = None
+        self.init_received = False
+        self.acknowledged = False
+        self.closed = False
+
+    async def send(self, message):
+        async with self.send_lock:
+            if not self.closed:
+                await self._send(message)
+
+    async def send_json(self, data):
+        await self.send({"type": "websocket.send", "text": json.dumps(data, default=str)})
+
+    async def close(self, code, reason=""):
+        await self.send({"type": "websocket.close", "code": code, "reason": reason})
+        self.closed = True
+
+    def origin_allowed(self):
+        origin = self.headers.get(b"origin")
+        if origin is None:  # clientes fora do navegador não enviam Origin
+            return True
+        domain, _port = split_domain_port(urlsplit(origin.decode("latin1")).netloc)
+        allowed_hosts = settings.ALLOWED_HOSTS
+        if settings.DEBUG and not allowed_hosts:
+            allowed_hosts = [".localhost", "127.0.0.1", "[::1]"]
+        return bool(domain) and validate_host(domain, allowed_hosts)
+
+    def authenticate(self):
+        user = self.scope.get("user")
+        if user is not None:
+            return user
+
+        cookies = parse_cookie(self.headers.get(b"cookie", b"").decode("latin1"))
+        engine = import_module(settings.SESSION_ENGINE)
+        return auth.get_user(SimpleNamespace(session=engine.SessionStore(cookies.get(settings.SESSION_COOKIE_NAME))))
+
+    async def run(self):
+        message = await self.receive()
+        if message["type"] != "websocket.connect":
+            return
+        if PROTOCOL not in self.scope.get("subprotocols", ()):
+            return await self.close(4406, "Subprotocol not acceptable")
+        if not self.origin_allowed():  # sessão por cookie, bloquear páginas de outras origens
+            return await self.close(4403, "Forbidden")
+        await self.send({"type": "websocket.accept", "subprotocol": PROTOCOL})
+
+        deadline = time.monotonic() + get_subscription_options()["CONNECTION_INIT_TIMEOUT"]
+        try:
+            while not self.closed:
+                if self.init_received:
+                    message = await self.receive()
+                else:
+                    try:
+                        message = await asyncio.wait_for(self.receive(), max(deadline - time.monotonic(), 0))
+                    except asyncio.TimeoutError:
+                        await self.close(4408, "Connection initialisation timeout")
+                        break
+
+                if message["type"] == "websocket.disconnect":
+                    break
+                if message["type"] == "websocket.receive":
+                    await self.handle(message.get("text") or message.get("bytes"))
+        finally:
+            self.closed = True
+            for task in list(self.operations.values()):
+                task.cancel()
+
+    async def handle(self, raw):
+        try:
+            message = json.loads(raw)
+            message_type = message["type"]
+        except (ValueError, TypeError, KeyError):
+            return await self.close(4400, "Invalid message")
+
+        if message_type == "connection_init":
+            if self.init_received:
+                return await self.close(4429, "Too many initialisation requests")
+            self.init_received = True
+            self.user = await run_in_thread(self.authenticate)()
+            if not self.user.is_authenticated:
+                return await self.close(4403, "Forbidden")
+            self.acknowledged = True
+            await self.send_json({"type": "connection_ack"})
+
+        elif message_type == "ping":
+            await self.send_json({"type": "pong"})
+
+        elif message_type == "pong":
+            pass
+
+        elif message_type == "subscribe":
+            if not self.acknowledged:
+                return await self.close(4401, "Unauthorized")
+            operation_id, payload = message.get("id"), message.get("payload")
+            if not isinstance(operation_id, str) or not isinstance(payload, dict):
+                return await self.close(4400, "Invalid message")
+            if operation_id in self.operations:
+                return await self.close(4409, f"Subscriber for {operation_id} already exists")
+            self.operations[operation_id] = asyncio.create_task(self.run_operation(operation_id, payload))
+
+        elif message_type == "complete":
+            task = self.operations.pop(message.get("id"), None)
+            if task is not None:
+                task.cancel()
+
+        else:
+            await self.close(4400, f"Unexpected message type {message_type}")
+
+    def prepare(self, payload):
+        """
+        Returns ``(document, operation_ast, errors)`` for the ``subscribe`` payload.
+        """
+
+        query = payload.get("query")
+        if not isinstance(query, str) or not query:
+            return None, None, [GraphQLError("Must provide query string.")]
+
+        document, errors = self.app.view.parse_and_validate(query)
+        if errors:
+            return None, None, errors
+
+        operation_name = payload.get("operationName")
+        variables = payload.get("variables")
+        errors = self.app.view.check_query_cost(SimpleNamespace(user=self.user), document, operation_name, variables)
+        if errors:
+            return None, None, errors
+
+        operation_ast = get_operation_ast(document, operation_name)
+        if operation_ast is None:
+            return None, None, [GraphQLError("Must provide a valid operation name.")]
+        if operation_ast.operation == OperationType.MUTATION:
+            return None, None, [GraphQLError("Mutations are not served over WebSocket, use POST /graphql/.")]
+        return document, operation_ast, []
+
+    def execute(self, document, root_value, variables, operation_name):
+        # contexto novo por evento, os loaders não devolvem objetos de eventos anteriores
+        return execute(
+            self.app.schema.graphql_schema,
+            document,
+            root_value=root_value,
+            context_value={"user": self.user},
+            variable_values=variables,
+            operation_name=operation_name,
+        )
+
+    async def send_result(self, operation_id, result):
+        payload = {"data": result.data}
+        if result.errors:
+            payload["errors"] = [GraphQLView.format_error(e) for e in result.errors]
+        await self.send_json({"id": operation_id, "type": "next", "payload": payload})
+
+    async def run_operation(self, operation_id, payload):
+        try:
+            document, operation_ast, errors = self.prepare(payload)
+            if errors:
+                return await self.send_json({"id": operation_id, "type": "error", "payload": [GraphQLView.format_error(e) for e in errors]})
+
+            variables, operation_name = payload.get("variables"), payload.get("operationName")
+            if operation_ast.operation != OperationType.SUBSCRIPTION:
+                await self.send_result(operation_id, await run_in_thread(self.execute)(document, None, variables, operation_name))
+            else:
+                stream = await create_source_event_stream(
+                    self.app.schema.graphql_schema,
+                    document,
+                    context_value={"user": self.user},
+                    variable_values=variables,
+                    operation_name=operation_name,
+                )
+                if isinstance(stream, ExecutionResult):  # erros de argumentos ou de permissão antes do primeiro evento
+                    return await self.send_json({"id": operation_id, "type": "error", "payload": [GraphQLView.format_error(e) for e in stream.errors]})
+
+                try:
+                    async for event in stream:
+                        await self.send_result(operation_id, await run_in_thread(self.execute)(document, event, variables, operation_name))
+                finally:
+                    await stream.aclose()
+            await self.send_json({"id": operation_id, "type": "complete"})
+        except asyncio.CancelledError:  # complete do cliente ou desconexão
+            raise
+        except Exception as e:
+            await self.send_result(operation_id, ExecutionResult(data=None, errors=[e]))
+            await self.send_json({"id": operation_id, "type": "complete"})
+        finally:
+            if self.operations.get(operation_id) is asyncio.current_task():
+                del self.operations[operation_id]
+
+
+async def close_connection(scope, receive, send):
+    message = await receive()
+    if message["type"] == "websocket.connect":
+        await send({"type": "websocket.close", "code": 4404})
+
+
+def websocket_router(routes, http_application):
+    """
+    Dispatches WebSocket connections by path to ``routes`` and everything else to ``http_application`` (Django only
+    serves HTTP).
+    """
+
+    async def application(scope, receive, send):
+        if scope["type"] == "websocket":
+            return await routes.get(scope["path"], close_connection)(scope, receive, send)
+        return await http_application(scope, receive, send)
+
+    return application
+
+
+class InProcessClient:
+    """
+    WebSocket client that drives an ASGI application on the running event loop, without a server. Used by the
+    ``load_test_subscriptions`` command and the tests.
+    """
+
+    def __init__(self, application, path="/graphql/ws/", user=None, headers=()):
+        self.application = application
+        self.scope = {"type": "websocket", "path": path, "subprotocols": [PROTOCOL], "headers": list(headers)}
+        if user is not None:
+            self.scope["user"] = user
+        self.incoming = asyncio.Queue()
+        self.outgoing = asyncio.Queue()
+        self.task = None
+
+    async def connect(self):
+        """
+        Opens the connection and returns the ``websocket.accept`` or ``websocket.close`` message of the application.
+        """
+
+        self.task = asyncio.create_task(self.application(self.scope, self.incoming.get, self.outgoing.put))
+        await self.incoming.put({"type": "websocket.connect"})
+        return await self.outgoing.get()
+
+    async def send_json(self, data):
+        await self.incoming.put({"type": "websocket.receive", "text": json.dumps(data)})
+
+    async def receive(self, timeout=None):
+        return await asyncio.wait_for(self.outgoing.get(), timeout)
+
+    async def receive_json(self, timeout=None):
+        message = await self.receive(timeout)
+        if message["type"] != "websocket.send":
+            raise AssertionError(f"Expected a message, got {message}")
+        return json.loads(message["text"])
+
+    async def disconnect(self):
+        await self.incoming.put({"type": "websocket.disconnect", "code": 1000})
+        if self.task is not None:
+            await self.task
@@ -0,0 +1,87 @@
+import pytest
+from datetime import date, datetime, timedelta, timezone as dt_timezone
+
+from ag_backend.schema import schema
+from apps.activities.models import Activity
+from apps.projects.models import Project
+from apps.tasks.models import Task
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from graphene.test import Client as GraphQLClient
+
+
+@pytest.mark.django_db
+class AggregateQueryTestCase(TestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = get_user_model().objects.create_user(username="cleiton", password="securepassword")
+        self.other = get_user_model().objects.create_user(username="other", password="securepassword")
+        self.project = self.create_project(self.user)
+        self.other_project = self.create_project(self.other)
+        self.graphql_client = GraphQLClient(schema)
+
+        for status, priority in [("pending", "high"), ("pending", "high"), ("pending", "low"), ("completed", "low")]:
+            self.create_activity(self.project, status, priority)
+        self.create_activity(self.other_project, "blocked", "high")
+
+        monday = datetime(2030, 1, 7, 12, tzinfo=dt_timezone.utc)
+        for days, completed in [(0, True), (2, False), (7, False), (15, False)]:
+            Task.objects.create(title="Task", due_date=monday + timedelta(days=days), completed=completed, project=self.project)
+        Task.objects.create(title="Foreign", due_date=monday, project=self.other_project)
+
+    def create_project(self, owner):
+        return Project.objects.create(
+            owner=owner,
+            name="Sample Project",
+            description="Sample Project Description",
+            status="open",
+            start_date=date.today(),
+            estimated_end_date=date.today() + timedelta(days=30),
+        )
+
+    def create_activity(self, project, status, priority):
+        return Activity.objects.create(
+            created_by=project.owner,
+            name="Activity",
+            description="Activity",
+            project=project,
+            status=status,
+            priority=priority,
+            expected_completion_date=date.today(),
+        )
+
+    def execute(self, query):
+        with self.assertNumQueries(1):
+            response = self.graphql_client.execute(query, context_value={"user": self.user})
+        if "errors" in response:
+            print("Errors:", response["errors"])
+        return response["data"]
+
+    def test_activity_stats_group_by(self):
+        data = self.execute("{ activityStats(groupBy: [STATUS, PRIORITY]) { status priority count } }")
+        assert data["activityStats"] == [
+            {"status": "completed", "priority": "low", "count": 1},
+            {"status": "pending", "priority": "high", "count": 2},
+            {"status": "pending", "priority": "low", "count": 1},
+        ], "Only the activities of the user's projects should be counted"
+
+        data = self.execute("{ activityStats(groupBy: [PRIORITY]) { status priority count } }")
+        assert data["activityStats"] == [{"status": None, "priority": "high", "count": 2}, {"status": None, "priority": "low", "count": 2}]
+
+    def test_task_due_histogram(self):
+        data = self.execute("{ taskDueHistogram(bucket: WEEK) { start count completed } }")
+        assert data["taskDueHistogram"] == [
+            {"start": "2030-01-07", "count": 2, "completed": 1},
+            {"start": "2030-01-14", "count": 1, "completed": 0},
+            {"start": "2030-01-21", "count": 1, "completed": 0},
+        ]
+
+    def test_ownership(self):
+        response = self.graphql_client.execute(
+            f'{{ taskDueHistogram(bucket: MONTH, projectId: "{self.other_project.id}") {{ count }} }}', context_value={"user": self.user}
+        )
+        assert response["errors"][0]["message"] == "Você não tem permissão para acessar este projeto."
+
+    def tearDown(self):
+        get_user_model().objects.all().delete()
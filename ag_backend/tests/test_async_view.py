@@ -0,0 +1,129 @@
+import json
+import pytest
+from datetime import date, timedelta
+
+from ag_backend.cache import object_cache
+from apps.activities.models import Activity
+from apps.notifications.models import Notification
+from apps.projects.models import Project
+from apps.tasks.models import Task
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, TransactionTestCase, override_settings
+
+
+@pytest.mark.django_db
+@override_settings(GRAPHQL_ASYNC={"PARALLEL_SYNC_FIELDS": False})  # sqlite em memória não é visível por outras conexões
+class AsyncGraphQLViewTestCase(TestCase):
+    def setUp(self):
+        super().setUp()
+        object_cache.clear()
+        self.user = get_user_model().objects.create_user(username="cleiton", password="securepassword")
+        self.project = Project.objects.create(
+            owner=self.user,
+            name="Sample Project",
+            description="Sample Project Description",
+            status="open",
+            start_date=date.today(),
+            estimated_end_date=date.today() + timedelta(days=30),
+        )
+        Task.objects.create(title="Task", due_date="2030-01-01T10:00:00Z", project=self.project)
+        Notification.objects.create(title="Notification", message="Message", project=self.project)
+        self.async_client.force_login(self.user)
+
+    async def post(self, query):
+        response = await self.async_client.post("/graphql/async/", json.dumps({"query": query}), content_type="application/json")
+        return response.json()
+
+    async def test_root_fields_are_resolved_on_the_event_loop_and_in_threads(self):
+        query = f"""
+            {{
+                project(id: "{self.project.id}") {{ name owner {{ username }} tasks {{ edges {{ node {{ title }} }} }} }}
+                allProjects {{ edges {{ node {{ name }} }} }}
+                allNotifications(first: 10) {{ edges {{ node {{ title project {{ name }} }} }} }}
+            }}
+        """
+        response = await self.post(query)
+        assert "errors" not in response, response.get("errors")
+        assert response["data"]["project"]["owner"]["username"] == "cleiton", "Nested sync fields of an async resolver"
+        assert response["data"]["project"]["tasks"]["edges"][0]["node"]["title"] == "Task"
+        assert response["data"]["allProjects"]["edges"][0]["node"]["name"] == "Sample Project"
+        assert response["data"]["allNotifications"]["edges"][0]["node"]["project"]["name"] == "Sample Project"
+
+    async def test_permission_errors_from_async_resolvers(self):
+        response = await self.post('{ project(id: "999999") { name } }')
+        assert response["errors"][0]["message"] == "Projeto não encontrado."
+
+    async def test_mutations_run_in_the_sync_path(self):
+        query = f"""
+            mutation {{
+                createActivity(projectId: "{self.project.id}", name: "Activity", description: "Async", priority: "low", status: "pending", creationDate: "{date.today()}", expectedCompletionDate: "{date.today()}") {{
+                    success
+                    errors
+                }}
+            }}
+        """
+        response = await self.post(query)
+        assert response["data"]["createActivity"]["success"] is True
+        assert await Activity.objects.filter(project=self.project).acount() == 1
+
+    def tearDown(self):
+        get_user_model().objects.all().delete()
+
+
+@pytest.mark.django_db(transaction=True)
+@override_settings(GRAPHQL_ASYNC={"PARALLEL_SYNC_FIELDS": True})
+class ParallelSyncFieldsTestCase(TransactionTestCase):
+    """
+    Sync root fields in parallel threads, each with its own connection: the data is committed so the connections of
+    the threads can see it.
+    """
+
+    def setUp(self):
+        super().setUp()
+        object_cache.clear()
+        self.user = get_user_model().objects.create_user(username="cleiton", password="securepassword")
+        for index in range(5):
+            project = Project.objects.create(
+                owner=self.user,
+                name=f"Project {index}",
+                description="Sample Project Description",
+                status="open",
+                start_date=date.today(),
+                estimated_end_date=date.today() + timedelta(days=30),
+            )
+            for position in range(3):
+                task = Task.objects.create(title=f"Task {index}.{position}", due_date="2030-01-01T10:00:00Z", project=project)
+                Notification.objects.create(title=f"Notification {index}.{position}", message="Message", task=task)
+                Activity.objects.create(
+                    created_by=self.user,
+                    project=project,
+                    name=f"Activity {index}.{position}",
+                    description="Sample Activity",
+                    expected_completion_date=date.today(),
+                )
+        self.async_client.force_login(self.user)
+
+    async def test_parallel_fields_share_the_request_loaders(self):
+        # os mesmos projetos e owners carregados ao mesmo tempo por campos em threads diferentes
+        query = """
+            {
+                allProjects { edges { node { name owner { username } stats { tasksTotal } } } }
+                allTasks(first: 20) { edges { node { title project { name owner { username } } } } }
+                allActivities { edges { node { name createdBy { username } project { name } } } }
+                allNotifications(first: 20) { edges { node { title task { project { name } } } } }
+            }
+        """
+        for _attempt in range(5):
+            response = await self.async_client.post("/graphql/async/", json.dumps({"query": query}), content_type="application/json")
+            data = response.json()
+            assert "errors" not in data, data.get("errors")
+            assert len(data["data"]["allProjects"]["edges"]) == 5
+            for edge in data["data"]["allTasks"]["edges"]:
+                node = edge["node"]
+                assert node["project"]["name"] == f"Project {node['title'].split()[1].split('.')[0]}"
+                assert node["project"]["owner"]["username"] == "cleiton"
+            assert len(data["data"]["allActivities"]["edges"]) == 15
+            for edge in data["data"]["allNotifications"]["edges"]:
+                node = edge["node"]
+                assert node["task"]["project"]["name"] == f"Project {node['title'].split()[1].split('.')[0]}"
@@ -0,0 +1,50 @@
+import json
+import pytest
+
+from ag_backend.document_cache import document_cache
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, Client as DjangoClient, override_settings
+
+
+@pytest.mark.django_db
+class DocumentCacheTestCase(TestCase):
+    def setUp(self):
+        super().setUp()
+        document_cache.clear()
+        document_cache.reset_stats()
+        self.user = get_user_model().objects.create_superuser(username="root", password="wasder", email="admin@example.com")
+        self.django_client = DjangoClient()
+        self.django_client.login(username="root", password="wasder")
+
+    def post(self, query):
+        return self.django_client.post("/graphql/", json.dumps({"query": query}), content_type="application/json").json()
+
+    def test_repeated_queries_skip_parse_and_validate(self):
+        query = "{ allUsers { edges { node { username } } } }"
+        first = self.post(query)
+        second = self.post(query)
+        assert first == second, "Cached documents should produce the same result"
+
+        stats = document_cache.stats()
+        assert stats["hits"] == 1 and stats["misses"] == 1, "Second request should reuse the parsed document"
+        assert stats["hit_ratio"] == 0.5
+        assert stats["time_saved"] > 0, "Hits should account for the parse + validate time saved"
+
+    def test_invalid_documents_are_not_cached(self):
+        query = "{ allUsers { edges { node { missingField } } } }"
+        self.post(query)
+        response = self.post(query)
+        assert "missingField" in response["errors"][0]["message"]
+        assert document_cache.stats()["hits"] == 0 and document_cache.stats()["size"] == 0
+
+    def test_counters_are_exposed_in_debug_responses(self):
+        query = "{ allUsers { edges { node { username } } } }"
+        assert "caches" not in self.post(query)["extensions"]
+
+        with override_settings(DEBUG=True):
+            caches = self.post(query)["extensions"]["caches"]
+        assert caches["documents"]["hits"] == 1 and caches["documents"]["misses"] == 1
+
+    def tearDown(self):
+        get_user_model().objects.all().delete()
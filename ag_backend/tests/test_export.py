@@ -0,0 +1,85 @@
+import csv
+import json
+import pytest
+from datetime import date, timedelta
+from io import StringIO
+
+from apps.activities.models import Activity
+from apps.projects.models import Project
+from apps.tasks.models import Task
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from graphql_relay import to_global_id
+
+
+@pytest.mark.django_db
+@override_settings(DATA_EXPORT={"CHUNK_SIZE": 2})
+class ExportViewTestCase(TestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = get_user_model().objects.create_user(username="cleiton", password="securepassword")
+        self.other = get_user_model().objects.create_user(username="outro", password="securepassword")
+        self.project = self.create_project(self.user, "Sample Project")
+        self.other_project = self.create_project(self.other, "Other Project")
+        for index in range(5):
+            Task.objects.create(title=f"Task {index}", due_date="2030-01-01T10:00:00Z", completed=index % 2 == 0, project=self.project)
+        Task.objects.create(title="Foreign", due_date="2030-01-01T10:00:00Z", project=self.other_project)
+        Activity.objects.create(
+            created_by=self.user,
+            project=self.project,
+            name="Activity",
+            description="Description",
+            priority="low",
+            status="pending",
+            creation_date=date.today(),
+            expected_completion_date=date.today(),
+        )
+        self.client.force_login(self.user)
+        self.async_client.force_login(self.user)
+
+    def create_project(self, owner, name):
+        return Project.objects.create(
+            owner=owner,
+            name=name,
+            description="Description",
+            status="open",
+            start_date=date.today(),
+            estimated_end_date=date.today() + timedelta(days=30),
+        )
+
+    def test_csv_streams_the_visible_rows_in_chunks(self):
+        response = self.client.get("/export/tasks.csv")
+        assert response.status_code == 200 and response.streaming
+        assert response["Content-Disposition"] == 'attachment; filename="tasks.csv"'
+
+        chunks = list(response.streaming_content)
+        assert len(chunks) == 3, "Header + 5 rows written 2 lines per chunk"
+        rows = list(csv.DictReader(StringIO(b"".join(chunks).decode())))
+        assert [row["title"] for row in rows] == [f"Task {index}" for index in range(5)]
+        assert rows[0]["project_id"] == str(self.project.id)
+
+    def test_ndjson_accepts_the_filter_fields_of_the_type(self):
+        response = self.client.get("/export/tasks.ndjson", {"completed": "true", "projectId": to_global_id("ProjectType", self.project.id)})
+        rows = [json.loads(line) for line in b"".join(response.streaming_content).decode().splitlines()]
+        assert [row["title"] for row in rows] == ["Task 0", "Task 2", "Task 4"]
+
+        response = self.client.get("/export/projects.ndjson")
+        assert [json.loads(line)["name"] for line in b"".join(response.streaming_content).decode().splitlines()] == ["Sample Project"]
+
+        response = self.client.get("/export/activities.csv", {"status": "pending"})
+        assert len(b"".join(response.streaming_content).decode().splitlines()) == 2
+
+    async def test_asgi_requests_stream_from_an_async_iterator(self):
+        response = await self.async_client.get("/export/tasks.csv")
+        assert response.is_async
+        content = b"".join([chunk async for chunk in response.streaming_content]).decode()
+        assert len(content.splitlines()) == 6
+
+    def test_invalid_filters_and_anonymous_users_are_rejected(self):
+        response = self.client.get("/export/tasks.csv", {"dueDate": "amanhã"})
+        assert response.status_code == 400
+        assert response.json()["errors"][0]["field"] == "due_date"
+
+        self.client.logout()
+        assert self.client.get("/export/tasks.csv").status_code == 401
@@ -0,0 +1,96 @@
+import pytest
+from datetime import date, timedelta
+
+from ag_backend.schema import schema
+from apps.notifications.models import Notification
+from apps.projects.models import Project
+from apps.tasks.models import Task
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from graphene.test import Client as GraphQLClient
+
+CREATE_TASK = """
+    mutation ($projectId: ID!) {
+        createTask(title: "Inventory", dueDate: "2030-01-01T00:00:00Z", completed: false, projectId: $projectId) { success errors }
+    }
+"""
+
+
+@pytest.mark.django_db
+class PermissionsTestCase(TestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = get_user_model().objects.create_user(username="cleiton", password="securepassword")
+        self.other = get_user_model().objects.create_user(username="outro", password="securepassword")
+        self.project = self.create_project(self.user, "Own Project")
+        self.other_project = self.create_project(self.other, "Foreign Project")
+        self.graphql_client = GraphQLClient(schema)
+
+    def create_project(self, owner, name):
+        return Project.objects.create(
+            owner=owner,
+            name=name,
+            description="Description",
+            status="open",
+            start_date=date.today(),
+            estimated_end_date=date.today() + timedelta(days=30),
+        )
+
+    def execute(self, query, variables=None, user=None):
+        response = self.graphql_client.execute(query, variables=variables, context_value={"user": user or self.user})
+        assert "errors" not in response, response
+        return response["data"]
+
+    def test_mutation_checks_ownership_with_one_query(self):
+        with CaptureQueriesContext(connection) as queries:
+            result = self.execute(CREATE_TASK, {"projectId": str(self.project.pk)})["createTask"]
+        assert result == {"success": True, "errors": None}
+        # dono e existência do projeto na mesma consulta
+        assert sum('"projects_project"."owner_id"' in query["sql"] for query in queries.captured_queries) == 1
+
+        result = self.execute(CREATE_TASK, {"projectId": str(self.other_project.pk)})["createTask"]
+        assert result == {"success": False, "errors": "Permission denied. Not the project owner."}
+        result = self.execute(CREATE_TASK, {"projectId": "999999"})["createTask"]
+        assert result == {"success": False, "errors": "Project not found."}
+        staff = get_user_model().objects.create_user(username="staff", password="securepassword", is_staff=True)
+        assert self.execute(CREATE_TASK, {"projectId": str(self.other_project.pk)}, user=staff)["createTask"]["success"] is True
+
+    def test_shared_cache_follows_owner_changes(self):
+        with self.settings(GRAPHQL_PERMISSIONS={"BACKEND": "default", "TIMEOUT": 300}):
+            cache.clear()
+            self.execute(CREATE_TASK, {"projectId": str(self.project.pk)})
+            with CaptureQueriesContext(connection) as queries:
+                self.execute(CREATE_TASK, {"projectId": str(self.project.pk)})
+            assert not any('"projects_project"."owner_id"' in query["sql"] for query in queries.captured_queries), "Owned projects should come from the cache"
+
+            self.project.owner = self.other
+            self.project.save()
+            result = self.execute(CREATE_TASK, {"projectId": str(self.project.pk)})["createTask"]
+            assert result == {"success": False, "errors": "Permission denied. Not the project owner."}
+            assert self.execute(CREATE_TASK, {"projectId": str(self.project.pk)}, user=self.other)["createTask"]["success"] is True
+        cache.clear()
+
+    def test_connections_are_restricted_to_own_projects(self):
+        Task.objects.create(title="Own task", due_date=timezone.now(), project=self.project)
+        foreign = Task.objects.create(title="Foreign task", due_date=timezone.now(), project=self.other_project)
+        Notification.objects.create(title="Foreign notification", message="Message", task=foreign)
+
+        query = """
+            {
+                allProjects { edges { node { name } } }
+                allTasks(first: 10) { edges { node { title project { name } } } }
+                allNotifications(first: 10) { edges { node { title } } }
+            }
+        """
+        data = self.execute(query)
+        assert [edge["node"]["name"] for edge in data["allProjects"]["edges"]] == ["Own Project"]
+        assert [edge["node"] for edge in data["allTasks"]["edges"]] == [{"title": "Own task", "project": {"name": "Own Project"}}]
+        assert data["allNotifications"]["edges"] == []
+
+        data = self.execute(query, user=self.other)
+        assert [edge["node"]["title"] for edge in data["allNotifications"]["edges"]] == ["Foreign notification"]
@@ -0,0 +1,77 @@
+import json
+import pytest
+from datetime import date, timedelta
+
+from ag_backend.persisted_queries import hash_query, persisted_queries
+from apps.projects.models import Project
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, Client as DjangoClient
+
+
+@pytest.mark.django_db
+class PersistedQueryViewTestCase(TestCase):
+    query = "{ allProjects { edges { node { name } } } }"
+
+    def setUp(self):
+        super().setUp()
+        persisted_queries.clear()
+        cache.clear()
+        self.user = get_user_model().objects.create_superuser(username="root", password="wasder", email="admin@example.com")
+        Project.objects.create(
+            owner=self.user,
+            name="Sample Project",
+            description="Sample Project Description",
+            status="open",
+            start_date=date.today(),
+            estimated_end_date=date.today() + timedelta(days=30),
+        )
+        self.django_client = DjangoClient()
+        self.django_client.login(username="root", password="wasder")
+
+    def post(self, payload):
+        response = self.django_client.post("/graphql/", json.dumps(payload), content_type="application/json")
+        return response.json()
+
+    def persisted(self, query_hash, query=None):
+        payload = {"extensions": {"persistedQuery": {"version": 1, "sha256Hash": query_hash}}}
+        if query:
+            payload["query"] = query
+        return self.post(payload)
+
+    def test_register_on_miss_then_execute_by_hash(self):
+        query_hash = hash_query(self.query)
+
+        response = self.persisted(query_hash)
+        assert response["errors"][0]["message"] == "PersistedQueryNotFound", "Unknown hash should ask for the query"
+
+        response = self.persisted(query_hash, self.query)
+        assert response["data"]["allProjects"]["edges"][0]["node"]["name"] == "Sample Project", "Should register and run"
+
+        response = self.persisted(query_hash)
+        assert response["data"]["allProjects"]["edges"][0]["node"]["name"] == "Sample Project", "Hash alone should run"
+
+    def test_document_is_rebuilt_from_shared_store(self):
+        query_hash = hash_query(self.query)
+        self.persisted(query_hash, self.query)
+        persisted_queries.clear()  # simula outro worker, sem o documento no LRU local
+
+        response = self.persisted(query_hash)
+        assert "errors" not in response, "Query text should come from the shared cache"
+
+    def test_hash_mismatch_and_invalid_queries_are_not_registered(self):
+        response = self.persisted(hash_query("{ other }"), self.query)
+        assert response["errors"][0]["message"] == "provided sha does not match query"
+
+        invalid = "{ allProjects { edges { node { missingField } } } }"
+        response = self.persisted(hash_query(invalid), invalid)
+        assert "missingField" in response["errors"][0]["message"], "Validation errors should be returned"
+        assert persisted_queries.get_document(hash_query(invalid)) is None, "Invalid documents should not be stored"
+
+    def test_plain_queries_still_work(self):
+        response = self.post({"query": self.query})
+        assert response["data"]["allProjects"]["edges"][0]["node"]["name"] == "Sample Project"
+
+    def tearDown(self):
+        get_user_model().objects.all().delete()
@@ -0,0 +1,77 @@
+import json
+import pytest
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, Client as DjangoClient, override_settings
+
+
+@pytest.mark.django_db
+@override_settings(
+    GRAPHQL_QUERY_LIMITS={
+        "default": {"MAX_DEPTH": 3, "MAX_COST": 500},
+        "superuser": {"MAX_DEPTH": None, "MAX_COST": None},
+    }
+)
+class QueryCostTestCase(TestCase):
+    def setUp(self):
+        super().setUp()
+        get_user_model().objects.create_superuser(username="root", password="wasder", email="admin@example.com")
+        get_user_model().objects.create_user(username="cleiton", password="securepassword")
+        self.django_client = DjangoClient()
+
+    def post(self, query, variables=None):
+        payload = {"query": query, "variables": variables}
+        return self.django_client.post("/graphql/", json.dumps(payload), content_type="application/json").json()
+
+    def test_cost_is_returned_in_extensions(self):
+        self.django_client.login(username="cleiton", password="securepassword")
+        response = self.post("query ($n: Int) { allProjects(first: $n) { edges { node { name } } } }", {"n": 10})
+        # allProjects (1) + 10 * (edges 1 + node 1 + name 1)
+        assert response["extensions"]["cost"]["cost"] == 31, "Cost should use the first argument from the variables"
+        assert response["extensions"]["cost"]["depth"] == 2
+
+    def test_invalid_page_size_variable_is_a_graphql_error(self):
+        self.django_client.login(username="cleiton", password="securepassword")
+        payload = {"query": "query ($n: Int) { allProjects(first: $n) { edges { node { name } } } }", "variables": {"n": "abc"}}
+        response = self.django_client.post("/graphql/", json.dumps(payload), content_type="application/json")
+        assert response.status_code == 400
+        assert "Int cannot represent non-integer value" in response.json()["errors"][0]["message"]
+
+    def test_negative_page_sizes_do_not_lower_the_cost(self):
+        self.django_client.login(username="cleiton", password="securepassword")
+        expensive = "allTasks(first: 50) { edges { node { project { name } } } }"
+        response = self.post(f"{{ x: allProjects(first: -1000000) {{ edges {{ node {{ id }} }} }} {expensive} }}")
+        assert "data" not in response and response["errors"][0]["extensions"]["code"] == "QUERY_TOO_COMPLEX"
+
+        query = f"query ($n: Int) {{ x: allProjects(last: $n) {{ edges {{ node {{ id }} }} }} {expensive} }}"
+        response = self.post(query, {"n": -1000000})
+        assert "data" not in response and response["errors"][0]["extensions"]["code"] == "QUERY_TOO_COMPLEX"
+
+    def test_page_size_is_capped_at_the_connection_limit(self):
+        self.django_client.login(username="root", password="wasder")
+        response = self.post("query ($n: Int) { allProjects(first: $n) { edges { node { name } } } }", {"n": 10**9})
+        # 1 + RELAY_CONNECTION_MAX_LIMIT (100) * 3
+        assert response["extensions"]["cost"]["cost"] == 301
+
+    def test_fan_out_is_rejected_before_execution(self):
+        self.django_client.login(username="cleiton", password="securepassword")
+        query = "{ allProjects(first: 50) { edges { node { tasks(first: 50) { edges { node { title } } } } } } }"
+        response = self.post(query)
+        assert "data" not in response, "Expensive queries should not be executed"
+        assert response["errors"][0]["extensions"]["code"] == "QUERY_TOO_COMPLEX"
+
+    def test_depth_limit(self):
+        self.django_client.login(username="cleiton", password="securepassword")
+        query = "{ allTasks(first: 1) { edges { node { project { owner { username } } } } } }"
+        response = self.post(query)
+        assert response["errors"][0]["extensions"]["code"] == "QUERY_TOO_DEEP"
+
+    def test_superuser_limits(self):
+        self.django_client.login(username="root", password="wasder")
+        query = "{ allProjects(first: 50) { edges { node { tasks(first: 50) { edges { node { title } } } } } } }"
+        response = self.post(query)
+        assert "errors" not in response, "Superusers have no limits configured"
+        assert response["extensions"]["cost"]["maxCost"] is None
+
+    def tearDown(self):
+        get_user_model().objects.all().delete()
@@ -0,0 +1,142 @@
+import asyncio
+import json
+import pytest
+from datetime import date, timedelta
+
+from asgiref.sync import sync_to_async
+from ag_backend.pubsub import LocalPubSub
+from ag_backend.schema import schema
+from ag_backend.subscriptions import GraphQLWebSocketApp, InProcessClient, websocket_router
+from apps.notifications.feed import notification_feed
+from apps.notifications.models import Notification
+from apps.projects.models import Project
+from apps.tasks.models import Task
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.test import SimpleTestCase, TestCase, override_settings
+
+QUERY = "subscription { notificationAdded { title project { name } task { title } } }"
+
+
+class LocalPubSubTestCase(SimpleTestCase):
+    async def test_publish_reaches_the_subscribers_of_the_topic(self):
+        pubsub = LocalPubSub()
+        first = pubsub.subscribe(["a", "b"])
+        second = pubsub.subscribe(["b"])
+
+        assert pubsub.publish("a", 1) == 1
+        assert pubsub.publish("b", 2) == 2
+        assert pubsub.publish("c", 3) == 0
+        assert [await anext(first), await anext(first), await anext(second)] == [1, 2, 2]
+
+        first.close()
+        assert pubsub.subscriber_count() == 1
+        with pytest.raises(StopAsyncIteration):
+            await anext(first)
+
+    async def test_slow_consumers_lose_the_oldest_messages(self):
+        pubsub = LocalPubSub()
+        subscription = pubsub.subscribe(["a"], maxsize=2)
+        for message in range(5):
+            pubsub.publish("a", message)
+        await asyncio.sleep(0)  # entregas agendadas no event loop
+
+        assert subscription.dropped == 3
+        assert [await anext(subscription), await anext(subscription)] == [3, 4]
+
+
+@pytest.mark.django_db
+@override_settings(
+    GRAPHQL_ASYNC={"PARALLEL_SYNC_FIELDS": False},  # sqlite em memória não é visível por outras conexões
+    GRAPHQL_SUBSCRIPTIONS={**settings.GRAPHQL_SUBSCRIPTIONS, "POLL_INTERVAL": 0.01, "CONNECTION_INIT_TIMEOUT": 0.5},
+)
+class NotificationSubscriptionTestCase(TestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = get_user_model().objects.create_user(username="cleiton", password="securepassword")
+        self.other = get_user_model().objects.create_user(username="outro", password="securepassword")
+        self.project = self.create_project(self.user, "Sample Project")
+        self.other_project = self.create_project(self.other, "Other Project")
+        self.task = Task.objects.create(title="Task", due_date="2030-01-01T10:00:00Z", project=self.project)
+        self.client.force_login(self.user)
+        self.app = GraphQLWebSocketApp(schema)
+
+    def create_project(self, owner, name):
+        return Project.objects.create(
+            owner=owner,
+            name=name,
+            description="Description",
+            status="open",
+            start_date=date.today(),
+            estimated_end_date=date.today() + timedelta(days=30),
+        )
+
+    async def connect(self, headers=None):
+        if headers is None:
+            headers = [(b"cookie", f"{settings.SESSION_COOKIE_NAME}={self.client.cookies[settings.SESSION_COOKIE_NAME].value}".encode())]
+        client = InProcessClient(self.app, headers=headers)
+        accepted = await client.connect()
+        assert accepted == {"type": "websocket.accept", "subprotocol": "graphql-transport-ws"}
+        await client.send_json({"type": "connection_init"})
+        return client
+
+    async def subscribe(self, client, query=QUERY, variables=None):
+        assert (await client.receive_json(timeout=1))["type"] == "connection_ack"
+        await client.send_json({"id": "1", "type": "subscribe", "payload": {"query": query, "variables": variables}})
+
+    async def wait_for_feed(self):
+        for _ in range(100):
+            if notification_feed.last_id is not None:
+                return
+            await asyncio.sleep(0.01)
+        raise AssertionError("The notification feed did not start")
+
+    async def test_new_notifications_of_owned_projects_are_pushed(self):
+        client = await self.connect()
+        await self.subscribe(client)
+        await self.wait_for_feed()
+
+        await sync_to_async(Notification.objects.create)(title="Other", message="Message", project=self.other_project)
+        await sync_to_async(Notification.objects.create)(title="Task notification", message="Message", task=self.task)
+
+        message = await client.receive_json(timeout=1)
+        assert message["type"] == "next" and message["id"] == "1"
+        assert message["payload"]["data"]["notificationAdded"] == {"title": "Task notification", "project": None, "task": {"title": "Task"}}
+        with pytest.raises(asyncio.TimeoutError):  # a notificação do outro usuário não é enviada
+            await client.receive(timeout=0.1)
+
+        await client.send_json({"id": "1", "type": "complete"})
+        await client.send_json({"type": "ping"})
+        assert (await client.receive_json(timeout=1))["type"] == "pong"
+        await client.disconnect()
+
+    async def test_subscription_to_a_project_of_another_user_is_rejected(self):
+        client = await self.connect()
+        query = "subscription ($projectId: ID) { notificationAdded(projectId: $projectId) { title } }"
+        await self.subscribe(client, query, {"projectId": str(self.other_project.id)})
+
+        message = await client.receive_json(timeout=1)
+        assert message["type"] == "error"
+        assert message["payload"][0]["message"] == "Você não tem permissão para acessar este projeto."
+        await client.disconnect()
+
+    async def test_anonymous_connections_are_closed(self):
+        client = await self.connect(headers=[])
+        assert await client.receive(timeout=1) == {"type": "websocket.close", "code": 4403, "reason": "Forbidden"}
+        await client.task
+
+    async def test_connection_without_init_times_out(self):
+        client = InProcessClient(self.app)
+        await client.connect()
+        message = await client.receive(timeout=2)
+        assert message["code"] == 4408
+        await client.task
+
+    async def test_other_websocket_paths_are_closed(self):
+        client = InProcessClient(websocket_router({"/graphql/ws/": self.app}, None), path="/other/")
+        assert await client.connect() == {"type": "websocket.close", "code": 4404}
+
+    def test_subscriptions_are_rejected_over_http(self):
+        response = self.client.post("/graphql/", json.dumps({"query": QUERY}), content_type="application/json")
+        assert response.json()["errors"][0]["message"] == "Subscriptions are served over WebSocket at /graphql/ws/."
@@ -1,11 +1,19 @@
-from .schema import schema
+from .export import ExportView
+from .schema import async_schema, schema
+from .views import AsyncGraphQLView, GraphQLView
 from django.contrib import admin
 from django.conf import settings
-from django.urls import include, path
-from graphene_django.views import GraphQLView
+from django.urls import include, path, re_path
+
+from apps.documents.views import DocumentDownloadView, UploadChunkView, UploadView
 
 urlpatterns = [
     path("admin/", admin.site.urls),
     path("accounts/", include("allauth.urls")),
     path("graphql/", GraphQLView.as_view(graphiql=settings.DEBUG, schema=schema)),
+    path("graphql/async/", AsyncGraphQLView.as_view(graphiql=settings.DEBUG, schema=async_schema)),
+    re_path(r"^export/(?P<resource>projects|tasks|activities)\.(?P<fmt>csv|ndjson)$", ExportView.as_view()),
+    path("documents/uploads/", UploadView.as_view()),
+    path("documents/uploads/<uuid:upload_id>/", UploadChunkView.as_view()),
+    path("documents/<int:pk>/download/", DocumentDownloadView.as_view()),
 ]
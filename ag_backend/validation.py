@@ -0,0 +1,137 @@
+from django.conf import settings
+from graphene_django.settings import graphene_settings
+from graphql import GraphQLError, get_named_type
+from graphql.language import FieldNode, FragmentSpreadNode, InlineFragmentNode, IntValueNode, VariableNode
+from graphql.validation import ValidationRule
+
+# wrappers das connections não contam como um nível a mais de profundidade
+CONNECTION_WRAPPERS = {"edges", "node"}
+
+
+class QueryCostRule(ValidationRule):
+    """
+    Computes a static cost for the executed operation and rejects it before execution when its depth or cost exceed
+    the limits. Every field costs 1 and the selection below a connection is multiplied by its ``first``/``last``
+    argument (or ``default_page_size`` when not given or not positive, capped at ``RELAY_CONNECTION_MAX_LIMIT``), so ``Project.tasks -> Task.project -> Project.activities``
+    fan-outs are priced by the number of rows they can reach. Use ``QueryCostRule.configure`` to build a rule with
+    the limits and variables of a request; the computed values are written to ``report``.
+    """
+
+    max_depth = None
+    max_cost = None
+    default_page_size = 100
+    operation_name = None
+    variables = {}
+    report = {}
+
+    @classmethod
+    def configure(cls, max_depth=None, max_cost=None, operation_name=None, variables=None, default_page_size=100):
+        attrs = {
+            "max_depth": max_depth,
+            "max_cost": max_cost,
+            "operation_name": operation_name,
+            "variables": variables or {},
+            "default_page_size": default_page_size,
+            "report": {},
+        }
+        return type(cls.__name__, (cls,), attrs)
+
+    def enter_operation_definition(self, node, *_args):
+        name = node.name.value if node.name else None
+        if self.operation_name is not None and name != self.operation_name:
+            return self.SKIP
+
+        root_type = self.context.schema.get_root_type(node.operation)
+        cost, depth = self.measure(root_type, node.selection_set, 0)
+        self.report.update(cost=cost, depth=depth, maxCost=self.max_cost, maxDepth=self.max_depth)
+
+        if self.max_depth is not None and depth > self.max_depth:
+            self.report_error(
+                GraphQLError(
+                    f"Query depth {depth} exceeds the maximum of {self.max_depth}.",
+                    node,
+                    extensions={"code": "QUERY_TOO_DEEP", "depth": depth, "maxDepth": self.max_depth},
+                )
+            )
+        if self.max_cost is not None and cost > self.max_cost:
+            self.report_error(
+                GraphQLError(
+                    f"Query cost {cost} exceeds the maximum of {self.max_cost}.",
+                    node,
+                    extensions={"code": "QUERY_TOO_COMPLEX", "cost": cost, "maxCost": self.max_cost},
+                )
+            )
+        return self.SKIP
+
+    def page_size(self, node):
+        sizes = []
+        for argument in node.arguments:
+            if argument.name.value not in ("first", "last"):
+                continue
+            if isinstance(argument.value, IntValueNode):
+                sizes.append(int(argument.value.value))
+            elif isinstance(argument.value, VariableNode):
+                value = self.variables.get(argument.value.name.value)
+                # valores inválidos ficam para a coerção de variáveis do graphql-core, que reporta o erro
+                if isinstance(value, int) and not isinstance(value, bool):
+                    sizes.append(value)
+        # tamanhos negativos ou zero baixariam o custo do resto da query; acima do limite a connection não retorna mais
+        size = max(sizes) if sizes and max(sizes) > 0 else self.default_page_size
+        max_limit = graphene_settings.RELAY_CONNECTION_MAX_LIMIT
+        return min(size, max_limit) if max_limit else size
+
+    def measure(self, parent_type, selection_set, depth):
+        """
+        Returns ``(cost, depth)`` of ``selection_set`` resolved on ``parent_type``.
+        """
+
+        cost = 0
+        max_depth = depth
+        schema = self.context.schema
+
+        for selection in selection_set.selections:
+            if isinstance(selection, FieldNode):
+                name = selection.name.value
+                fields = getattr(parent_type, "fields", {})
+                if name.startswith("__") or name not in fields:  # introspecção e campos inválidos (já validados)
+                    continue
+
+                field_type = get_named_type(fields[name].type)
+                field_depth = depth if name in CONNECTION_WRAPPERS else depth + 1
+                child_cost, child_depth = (0, field_depth)
+                if selection.selection_set:
+                    child_cost, child_depth = self.measure(field_type, selection.selection_set, field_depth)
+
+                multiplier = self.page_size(selection) if field_type.name.endswith("Connection") else 1
+                cost += 1 + multiplier * child_cost
+                max_depth = max(max_depth, child_depth)
+
+            elif isinstance(selection, InlineFragmentNode):
+                fragment_type = schema.get_type(selection.type_condition.name.value) if selection.type_condition else parent_type
+                child_cost, child_depth = self.measure(fragment_type, selection.selection_set, depth)
+                cost += child_cost
+                max_depth = max(max_depth, child_depth)
+
+            elif isinstance(selection, FragmentSpreadNode):
+                fragment = self.context.get_fragment(selection.name.value)
+                if fragment is not None:
+                    child_cost, child_depth = self.measure(schema.get_type(fragment.type_condition.name.value), fragment.selection_set, depth)
+                    cost += child_cost
+                    max_depth = max(max_depth, child_depth)
+
+        return cost, max_depth
+
+
+def get_query_limits(user):
+    """
+    Returns the ``MAX_DEPTH``/``MAX_COST`` limits of ``GRAPHQL_QUERY_LIMITS`` for the role of ``user``.
+    """
+
+    limits = getattr(settings, "GRAPHQL_QUERY_LIMITS", {})
+    if getattr(user, "is_superuser", False):
+        role = "superuser"
+    elif getattr(user, "is_staff", False):
+        role = "staff"
+    else:
+        role = "default"
+    return limits.get(role, limits.get("default", {}))
@@ -0,0 +1,265 @@
+import json
+from functools import partial
+
+from asgiref.sync import sync_to_async
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.http import HttpResponse, HttpResponseNotAllowed
+from django.http.response import HttpResponseBadRequest
+from graphene_django.constants import MUTATION_ERRORS_FLAG
+from graphene_django.settings import graphene_settings
+from graphene_django.views import GraphQLView as BaseGraphQLView, HttpError
+from graphql import ExecutionResult, OperationType, execute, get_operation_ast, parse, validate_schema
+from graphql.error import GraphQLError
+from graphql.pyutils import is_awaitable
+from graphql.validation import validate
+
+from .cache import object_cache
+from .context import get_request_scoped
+from .document_cache import document_cache
+from .execution import AsyncExecutionContext
+from .loaders import LoaderRegistry
+from .persisted_queries import hash_query, persisted_queries
+from .validation import QueryCostRule, get_query_limits
+
+
+class GraphQLView(BaseGraphQLView):
+    """
+    GraphQLView with support for persisted queries, following the automatic persisted queries protocol used by
+    Apollo: the client sends ``extensions.persistedQuery.sha256Hash`` without the query text and the server executes
+    the document registered under that hash, already parsed and validated. On a miss the server answers
+    ``PersistedQueryNotFound`` and the client retries with the query and the hash, which registers it. Plain query
+    strings go through the document cache, so identical operations are parsed and validated only once. Before
+    execution the operation is priced by ``QueryCostRule`` against the limits of the user's role and the computed
+    cost is returned in ``extensions.cost``. With ``DEBUG`` on, ``extensions.caches`` carries the hit/miss counters of
+    the object and document caches of the process.
+    """
+
+    def get_persisted_query_hash(self, request, data):
+        extensions = request.GET.get("extensions") or data.get("extensions")
+        if isinstance(extensions, str):
+            try:
+                extensions = json.loads(extensions)
+            except ValueError:
+                raise HttpError(HttpResponseBadRequest("Extensions are invalid JSON."))
+
+        persisted_query = (extensions or {}).get("persistedQuery") or {}
+        return persisted_query.get("sha256Hash")
+
+    def parse_and_validate(self, query):
+        return document_cache.get(self.schema.graphql_schema, query, self.validation_rules, partial(self.parse_and_validate_uncached, query))
+
+    def parse_and_validate_uncached(self, query):
+        try:
+            document = parse(query)
+        except Exception as e:
+            return None, [e]
+
+        validation_errors = validate(
+            self.schema.graphql_schema,
+            document,
+            self.validation_rules,
+            graphene_settings.MAX_VALIDATION_ERRORS,
+        )
+        if validation_errors:
+            return None, validation_errors
+        return document, []
+
+    def get_persisted_document(self, query_hash, query):
+        if query and hash_query(query) != query_hash:
+            return None, [GraphQLError("provided sha does not match query", extensions={"code": "PERSISTED_QUERY_HASH_MISMATCH"})]
+
+        document = persisted_queries.get_document(query_hash)
+        if document is not None:
+            return document, []
+
+        query = query or persisted_queries.get_query(query_hash)  # registrado por outro worker
+        if not query:
+            return None, [GraphQLError("PersistedQueryNotFound", extensions={"code": "PERSISTED_QUERY_NOT_FOUND"})]
+
+        document, errors = self.parse_and_validate(query)
+        if not errors:  # registrar na falta, apenas documentos válidos
+            persisted_queries.register(query_hash, query, document)
+        return document, errors
+
+    def check_query_cost(self, request, document, operation_name, variables):
+        limits = get_query_limits(getattr(request, "user", None))
+        rule = QueryCostRule.configure(
+            max_depth=limits.get("MAX_DEPTH"),
+            max_cost=limits.get("MAX_COST"),
+            operation_name=operation_name,
+            variables=variables if isinstance(variables, dict) else {},
+            default_page_size=graphene_settings.RELAY_CONNECTION_MAX_LIMIT or 100,
+        )
+        errors = validate(self.schema.graphql_schema, document, [rule])
+        request.graphql_extensions = {"cost": rule.report}
+        return errors
+
+    def json_encode(self, request, d, pretty=False):
+        extensions = dict(getattr(request, "graphql_extensions", None) or {})  # custo calculado, para os clientes ajustarem suas queries
+        if settings.DEBUG:  # taxa de acerto dos caches, acompanhada durante o desenvolvimento
+            extensions["caches"] = {"objects": object_cache.stats(), "documents": document_cache.stats()}
+        if extensions:
+            d = {**d, "extensions": extensions}
+        return super().json_encode(request, d, pretty)
+
+    def prepare_document(self, request, data, query, variables, operation_name, show_graphiql=False):
+        """
+        Everything that happens before execution: persisted query lookup, parse and validation through the caches,
+        cost analysis and the GET restrictions. Returns ``(document, operation_ast, None)``, or ``(None, None, result)``
+        when the request ends here.
+        """
+
+        query_hash = self.get_persisted_query_hash(request, data)
+
+        if not query and not query_hash:
+            if show_graphiql:
+                return None, None, None
+            raise HttpError(HttpResponseBadRequest("Must provide query string."))
+
+        schema_validation_errors = validate_schema(self.schema.graphql_schema)
+        if schema_validation_errors:
+            return None, None, ExecutionResult(data=None, errors=schema_validation_errors)
+
+        if query_hash:
+            document, errors = self.get_persisted_document(query_hash, query)
+        else:
+            document, errors = self.parse_and_validate(query)
+        if errors:
+            return None, None, ExecutionResult(data=None, errors=errors)
+
+        cost_errors = self.check_query_cost(request, document, operation_name, variables)
+        if cost_errors:  # rejeitar antes de executar qualquer resolver
+            return None, None, ExecutionResult(data=None, errors=cost_errors)
+
+        operation_ast = get_operation_ast(document, operation_name)
+
+        if operation_ast is not None and operation_ast.operation == OperationType.SUBSCRIPTION:
+            return None, None, ExecutionResult(data=None, errors=[GraphQLError("Subscriptions are served over WebSocket at /graphql/ws/.")])
+
+        if request.method.lower() == "get" and operation_ast is not None and operation_ast.operation != OperationType.QUERY:
+            if show_graphiql:
+                return None, None, None
+
+            raise HttpError(
+                HttpResponseNotAllowed(
+                    ["POST"],
+                    "Can only perform a {} operation from a POST request.".format(operation_ast.operation.value),
+                )
+            )
+        return document, operation_ast, None
+
+    def get_execute_options(self, request, variables, operation_name):
+        execute_options = {
+            "root_value": self.get_root_value(request),
+            "context_value": self.get_context(request),
+            "variable_values": variables,
+            "operation_name": operation_name,
+            "middleware": self.get_middleware(request),
+        }
+        if self.execution_context_class:
+            execute_options["execution_context_class"] = self.execution_context_class
+        return execute_options
+
+    def execute_document(self, request, document, operation_ast, variables, operation_name):
+        try:
+            execute_options = self.get_execute_options(request, variables, operation_name)
+
+            if (
+                operation_ast is not None
+                and operation_ast.operation == OperationType.MUTATION
+                and (graphene_settings.ATOMIC_MUTATIONS is True or connection.settings_dict.get("ATOMIC_MUTATIONS", False) is True)
+            ):
+                with transaction.atomic():
+                    result = execute(self.schema.graphql_schema, document, **execute_options)
+                    if getattr(request, MUTATION_ERRORS_FLAG, False) is True:
+                        transaction.set_rollback(True)
+                return result
+
+            return execute(self.schema.graphql_schema, document, **execute_options)
+        except Exception as e:
+            return ExecutionResult(errors=[e])
+
+    def execute_graphql_request(self, request, data, query, variables, operation_name, show_graphiql=False):
+        document, operation_ast, result = self.prepare_document(request, data, query, variables, operation_name, show_graphiql)
+        if document is None:
+            return result
+        return self.execute_document(request, document, operation_ast, variables, operation_name)
+
+
+class AsyncGraphQLView(GraphQLView):
+    """
+    Async variant of ``GraphQLView`` for ASGI deployments. Queries are executed on the event loop with
+    ``AsyncExecutionContext``, so slow resolvers do not hold a worker thread and independent root fields resolve
+    concurrently. Mutations rely on ``transaction.atomic()`` and run through the sync path in a worker thread.
+    """
+
+    execution_context_class = AsyncExecutionContext
+    view_is_async = True
+
+    async def dispatch(self, request, *args, **kwargs):
+        try:
+            if request.method.lower() not in ("get", "post"):
+                raise HttpError(HttpResponseNotAllowed(["GET", "POST"], "GraphQL only supports GET and POST requests."))
+
+            request.user = await request.auser()  # o SimpleLazyObject faria a query de sessão dentro do event loop
+            get_request_scoped(request, "graphql_loaders", LoaderRegistry)  # compartilhado pelos campos em threads
+
+            data = self.parse_body(request)
+            show_graphiql = self.graphiql and self.can_display_graphiql(request, data)
+            if show_graphiql:
+                return await sync_to_async(super().dispatch)(request, *args, **kwargs)
+
+            if self.batch:
+                responses = [await self.get_response(request, entry) for entry in data]
+                result = "[{}]".format(",".join([response[0] for response in responses]))
+                status_code = responses and max(responses, key=lambda response: response[1])[1] or 200
+            else:
+                result, status_code = await self.get_response(request, data, show_graphiql)
+
+            return HttpResponse(status=status_code, content=result, content_type="application/json")
+
+        except HttpError as e:
+            response = e.response
+            response["Content-Type"] = "application/json"
+            response.content = self.json_encode(request, {"errors": [self.format_error(e)]})
+            return response
+
+    async def get_response(self, request, data, show_graphiql=False):
+        # ATOMIC_REQUESTS não se aplica a views async, sem set_rollback aqui
+        query, variables, operation_name, id = self.get_graphql_params(request, data)
+        execution_result = await self.execute_graphql_request(request, data, query, variables, operation_name, show_graphiql)
+
+        status_code = 200
+        if not execution_result:
+            return None, status_code
+
+        response = {}
+        if execution_result.errors:
+            response["errors"] = [self.format_error(e) for e in execution_result.errors]
+
+        if execution_result.errors and any(not getattr(e, "path", None) for e in execution_result.errors):
+            status_code = 400
+        else:
+            response["data"] = execution_result.data
+
+        if self.batch:
+            response["id"] = id
+            response["status"] = status_code
+
+        return self.json_encode(request, response, pretty=show_graphiql), status_code
+
+    async def execute_graphql_request(self, request, data, query, variables, operation_name, show_graphiql=False):
+        document, operation_ast, result = self.prepare_document(request, data, query, variables, operation_name, show_graphiql)
+        if document is None:
+            return result
+
+        if operation_ast is not None and operation_ast.operation == OperationType.MUTATION:
+            return await sync_to_async(self.execute_document)(request, document, operation_ast, variables, operation_name)
+
+        try:
+            result = execute(self.schema.graphql_schema, document, **self.get_execute_options(request, variables, operation_name))
+            return await result if is_awaitable(result) else result
+        except Exception as e:
+            return ExecutionResult(errors=[e])
@@ -26,5 +26,13 @@ class Activity(models.Model):
     creation_date = models.DateField(auto_now_add=True)
     expected_completion_date = models.DateField()
 
+    class Meta:
+        indexes = [
+            models.Index(fields=["project", "status"], name="activities_project_status_idx"),
+            models.Index(fields=["project", "priority"], name="activities_project_prio_idx"),
+            models.Index(fields=["project", "expected_completion_date"], name="activities_project_due_idx"),
+            models.Index(fields=["status", "priority"], name="activities_status_prio_idx"),
+        ]
+
     def __str__(self):
         return self.description
@@ -1,15 +1,24 @@
 import graphene
 from .models import Activity
-from apps.projects.models import Project
+from apps.projects.stats import record_saved
+from apps.notifications.events import enqueue_events
+from apps.search.index import index_objects
 from apps.accounts.models import DefaultAccount
+from ag_backend.bulk import BulkItemError, check_bulk_request, clean_instance, get_bulk_options, invalidate_objects, to_pk
+from ag_backend.fields import FilterConnectionField
+from ag_backend.loaders import get_loaders
+from ag_backend.permissions import get_permissions
 
 from django.db import transaction
 from django.core.exceptions import ObjectDoesNotExist, ValidationError
+from graphene_django import bypass_get_queryset
 from graphene_django.types import DjangoObjectType
 
 
 class ActivityType(DjangoObjectType):
     project_id = graphene.ID()
+    tasks = FilterConnectionField("apps.tasks.schema.TaskType", required=True)
+    notifications = FilterConnectionField("apps.notifications.schema.NotificationType", required=True)
 
     class Meta:
         model = Activity
@@ -17,6 +26,33 @@ class ActivityType(DjangoObjectType):
         filter_fields = ["project_id", "name", "priority", "status", "creation_date", "expected_completion_date"]
         fields = "__all__"  # sem campos sensíveis, utilizar todos
 
+    @classmethod
+    def get_queryset(cls, queryset, info):
+        return get_permissions(info).filter(queryset, "project")
+
+    @bypass_get_queryset
+    def resolve_created_by(self, info):
+        return get_loaders(info).load(self, "created_by")
+
+    @bypass_get_queryset
+    def resolve_project(self, info):
+        return get_loaders(info).load(self, "project")
+
+
+class ActivityGroupBy(graphene.Enum):
+    STATUS = "status"
+    PRIORITY = "priority"
+
+
+class ActivityStatsGroup(graphene.ObjectType):
+    """
+    Number of activities sharing the values of the ``groupBy`` columns; columns not grouped by are null.
+    """
+
+    status = graphene.String()
+    priority = graphene.String()
+    count = graphene.Int(required=True)
+
 
 class CreateActivity(graphene.Mutation):
     class Arguments:
@@ -38,24 +74,18 @@ class CreateActivity(graphene.Mutation):
         if user.is_anonymous:
             return CreateActivity(activity=None, success=False, errors="Authentication required.")
 
-        try:  # criar atividade com tratamento de validação e erros
-            project = Project.objects.get(pk=project_id)
-
-            if not (user.is_superuser or user.is_staff or project.owner_id == user.id):
-                return CreateActivity(activity=None, success=False, errors="Permission denied.")
-
-            created_by = DefaultAccount.objects.get(username=user)
-            created_by_id = created_by.id
+        # projeto conferido pela camada de permissões, sem buscar o Project de novo
+        error = get_permissions(info).check_project(project_id)
+        if error:
+            return CreateActivity(activity=None, success=False, errors=error)
 
+        try:  # criar atividade com tratamento de validação e erros
             with transaction.atomic():  # transação atômica para garantir a integridade da manipulação no banco
-                activity = Activity(project_id=project.id, created_by_id=created_by_id, **kwargs)
-                activity.full_clean()  # validar antes de salvar
+                activity = Activity(project_id=to_pk(project_id), created_by_id=user.id, **kwargs)
+                activity.full_clean(exclude=["project", "created_by"])  # validar antes de salvar, chaves já conferidas
                 activity.save()
             return CreateActivity(activity=activity, success=True)
 
-        except Project.DoesNotExist:
-            return CreateActivity(activity=None, success=False, errors="Project not found.")
-
         except ValidationError as e:
             return CreateActivity(activity=None, success=False, errors=f"Validation Error: {e}")
 
@@ -87,6 +117,10 @@ class UpdateActivity(graphene.Mutation):
 
             if not (user.is_superuser or user.is_staff or activity.created_by_id == user.id):
                 return UpdateActivity(activity=None, success=False, errors="Permission denied.")
+            if "project_id" in kwargs:  # mover para outro projeto exige ser dono do projeto de destino
+                error = get_permissions(info).check_project(kwargs["project_id"])
+                if error:
+                    return UpdateActivity(activity=None, success=False, errors=error)
 
             with transaction.atomic():  # transação atômica para garantir a integridade da manipulação no banco
                 if "created_by" in kwargs:
@@ -135,7 +169,171 @@ class DeleteActivity(graphene.Mutation):
             return DeleteActivity(success=False, errors="Activity not found.")
 
 
+class ActivityInput(graphene.InputObjectType):
+    project_id = graphene.ID(required=True)
+    name = graphene.String(required=True)
+    description = graphene.String(required=True)
+    priority = graphene.String(required=True)
+    status = graphene.String(required=True)
+    expected_completion_date = graphene.Date(required=True)
+
+
+class ActivityUpdateInput(graphene.InputObjectType):
+    id = graphene.ID(required=True)
+    project_id = graphene.ID()
+    name = graphene.String()
+    description = graphene.String()
+    priority = graphene.String()
+    status = graphene.String()
+    expected_completion_date = graphene.Date()
+
+
+def validation_error(index, error):
+    # mesmo formato das mutations de um objeto, na criação e na atualização em lote
+    return BulkItemError(index=index, errors=f"Validation Error: {error}")
+
+
+class BulkCreateActivities(graphene.Mutation):
+    """
+    Creates many activities in one request, authored by the current user. Projects and permissions are resolved
+    once for the whole batch and the valid activities are inserted with a single ``bulk_create``.
+    """
+
+    class Arguments:
+        activities = graphene.List(graphene.NonNull(ActivityInput), required=True)
+
+    activities = graphene.List(ActivityType)
+    success = graphene.Boolean()
+    errors = graphene.List(BulkItemError)
+
+    def mutate(self, info, activities):
+        user = info.context.get("user") if isinstance(info.context, dict) else info.context.user
+        errors = check_bulk_request(user, activities)
+        if errors:
+            return BulkCreateActivities(activities=[], success=False, errors=errors)
+
+        denied = get_permissions(info).check_projects(item["project_id"] for item in activities)
+
+        created = []
+        for index, item in enumerate(activities):
+            data = dict(item)
+            project_id = to_pk(data.pop("project_id"))
+
+            if project_id in denied:
+                errors.append(BulkItemError(index=index, errors=denied[project_id]))
+                continue
+
+            activity = Activity(project_id=project_id, created_by_id=user.id, **data)
+            error = clean_instance(activity, exclude=("project", "created_by"))  # chaves já resolvidas em lote
+            if error:
+                errors.append(validation_error(index, error))
+                continue
+            created.append(activity)
+
+        with transaction.atomic():  # transação única para todo o lote
+            Activity.objects.bulk_create(created, batch_size=get_bulk_options()["BATCH_SIZE"])
+            record_saved(Activity, created, created=True)  # bulk_create não dispara post_save
+            enqueue_events("created", created)
+            index_objects(Activity, created)
+        return BulkCreateActivities(activities=created, success=not errors, errors=errors)
+
+
+class BulkUpdateActivities(graphene.Mutation):
+    """
+    Updates many activities in one request with a single ``bulk_update`` over the union of the provided fields.
+    """
+
+    class Arguments:
+        activities = graphene.List(graphene.NonNull(ActivityUpdateInput), required=True)
+
+    activities = graphene.List(ActivityType)
+    success = graphene.Boolean()
+    errors = graphene.List(BulkItemError)
+
+    def mutate(self, info, activities):
+        user = info.context.get("user") if isinstance(info.context, dict) else info.context.user
+        errors = check_bulk_request(user, activities)
+        if errors:
+            return BulkUpdateActivities(activities=[], success=False, errors=errors)
+
+        existing = Activity.objects.in_bulk({to_pk(item["id"]) for item in activities} - {None})
+        denied = get_permissions(info).check_projects(item["project_id"] for item in activities if item.get("project_id"))
+
+        updated, fields = {}, set()
+        for index, item in enumerate(activities):
+            data = dict(item)
+            activity = existing.get(to_pk(data.pop("id")))
+            if activity is None:
+                errors.append(BulkItemError(index=index, errors="Activity not found."))
+                continue
+            if not (user.is_superuser or user.is_staff or activity.created_by_id == user.id):
+                errors.append(BulkItemError(index=index, errors="Permission denied."))
+                continue
+
+            new_project_id = data.pop("project_id", None)
+            if new_project_id:  # mover para outro projeto exige ser dono do projeto de destino
+                project_id = to_pk(new_project_id)
+                if project_id in denied:
+                    errors.append(BulkItemError(index=index, errors=denied[project_id]))
+                    continue
+                activity.project_id = project_id
+                fields.add("project")
+
+            for key, value in data.items():
+                setattr(activity, key, value)  # atualizar apenas os campos fornecidos
+            error = clean_instance(activity, exclude=("project", "created_by"))
+            if error:
+                errors.append(validation_error(index, error))
+                continue
+
+            fields.update(data)
+            updated[activity.pk] = activity
+
+        if updated and fields:
+            with transaction.atomic():
+                Activity.objects.bulk_update(updated.values(), sorted(fields), batch_size=get_bulk_options()["BATCH_SIZE"])
+                record_saved(Activity, updated.values())
+                enqueue_events("updated", updated.values())
+                index_objects(Activity, updated.values())
+            invalidate_objects(Activity, updated)
+        return BulkUpdateActivities(activities=list(updated.values()), success=not errors, errors=errors)
+
+
+class BulkDeleteActivities(graphene.Mutation):
+    class Arguments:
+        ids = graphene.List(graphene.NonNull(graphene.ID), required=True)
+
+    deleted_ids = graphene.List(graphene.ID)
+    success = graphene.Boolean()
+    errors = graphene.List(BulkItemError)
+
+    def mutate(self, info, ids):
+        user = info.context.get("user") if isinstance(info.context, dict) else info.context.user
+        errors = check_bulk_request(user, ids)
+        if errors:
+            return BulkDeleteActivities(deleted_ids=[], success=False, errors=errors)
+
+        existing = dict(Activity.objects.filter(pk__in={to_pk(pk) for pk in ids} - {None}).values_list("pk", "created_by_id"))
+
+        allowed = []
+        for index, pk in enumerate(ids):
+            pk = to_pk(pk)
+            if pk not in existing:
+                errors.append(BulkItemError(index=index, errors="Activity not found."))
+            elif not (user.is_superuser or user.is_staff or existing[pk] == user.id):
+                errors.append(BulkItemError(index=index, errors="Permission denied."))
+            else:
+                allowed.append(pk)
+
+        with transaction.atomic():  # delete do queryset ainda dispara post_delete, que invalida o cache
+            Activity.objects.filter(pk__in=allowed).delete()
+        return BulkDeleteActivities(deleted_ids=allowed, success=not errors, errors=errors)
+
+
 class Mutation(graphene.ObjectType):
     create_activity = CreateActivity.Field()
     update_activity = UpdateActivity.Field()
     delete_activity = DeleteActivity.Field()
+    bulk_create_activities = BulkCreateActivities.Field()
+    bulk_update_activities = BulkUpdateActivities.Field()
+    bulk_delete_activities = BulkDeleteActivities.Field()
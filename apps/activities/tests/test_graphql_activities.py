@@ -102,5 +102,27 @@ class ActivityGraphQLTestCase(TestCase):
         with self.assertRaises(Activity.DoesNotExist):
             Activity.objects.get(pk=self.activity_id)
 
+    def test_bulk_validation_errors_have_the_same_shape(self):
+        activity = Activity.objects.create(
+            created_by=self.user, name="Existing", description="Description", project=self.project, expected_completion_date=date.today()
+        )
+        create = """
+            mutation ($activities: [ActivityInput!]!) {
+                bulkCreateActivities(activities: $activities) { success errors { index errors } }
+            }
+        """
+        item = {"projectId": self.project.id, "name": "New", "description": "Description", "priority": "urgent", "status": "pending", "expectedCompletionDate": str(date.today())}
+        response = self.graphql_client.execute(create, variables={"activities": [item]}, context_value={"user": self.user})
+        created = response["data"]["bulkCreateActivities"]["errors"][0]["errors"]
+
+        update = """
+            mutation ($activities: [ActivityUpdateInput!]!) {
+                bulkUpdateActivities(activities: $activities) { success errors { index errors } }
+            }
+        """
+        response = self.graphql_client.execute(update, variables={"activities": [{"id": activity.id, "priority": "urgent"}]}, context_value={"user": self.user})
+        updated = response["data"]["bulkUpdateActivities"]["errors"][0]["errors"]
+        assert created.startswith("Validation Error: ") and created == updated
+
     def tearDown(self):
         get_user_model().objects.all().delete()
@@ -0,0 +1,8 @@
+from django.apps import AppConfig
+
+
+class DocumentsConfig(AppConfig):
+    name = "apps.documents"
+
+    def ready(self):
+        from . import storage  # noqa: F401  conectar os receivers das referências aos blobs
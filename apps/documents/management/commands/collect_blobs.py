@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+
+from apps.documents.storage import collect_blobs, expire_uploads, recount_blob_references
+
+
+class Command(BaseCommand):
+    help = (
+        "Removes the stored files no document references any more, in batches of --batch-size blobs, one transaction "
+        "per batch, and the uploads abandoned for more than --upload-expiry-hours hours. Safe to interrupt and to run "
+        "periodically (cron or a scheduled job)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, help="Blobs removed per transaction (default DOCUMENT_STORAGE).")
+        parser.add_argument("--max-batches", type=int, help="Stop after this many batches, to bound the duration of a run.")
+        parser.add_argument("--upload-expiry-hours", type=float, help="Cancel uploads idle for longer (default DOCUMENT_STORAGE).")
+        parser.add_argument("--recount", action="store_true", help="Recompute the reference counts from the documents first.")
+
+    def handle(self, *args, **options):
+        if options["recount"]:
+            self.stdout.write(f"Recounted {recount_blob_references()} blob(s).")
+        expired = expire_uploads(options["upload_expiry_hours"])
+        removed, freed = collect_blobs(options["batch_size"], options["max_batches"])
+        self.stdout.write(self.style.SUCCESS(f"Removed {removed} blob(s) ({freed} bytes) and {expired} expired upload(s)."))
@@ -0,0 +1,36 @@
+# Generated by Django 5.0.8 on 2026-10-18 12:00
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def count_references(apps, schema_editor):
+    Blob = apps.get_model("documents", "Blob")
+    Document = apps.get_model("documents", "Document")
+    references = Document.objects.filter(blob_id=OuterRef("pk")).order_by().values("blob_id").annotate(total=Count("pk")).values("total")
+    Blob.objects.update(ref_count=Coalesce(Subquery(references), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("documents", "0004_blob_documentupload_document_blob"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="blob",
+            name="ref_count",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name="blob",
+            index=models.Index(
+                condition=models.Q(("ref_count", 0)),
+                fields=["sha256"],
+                name="blobs_unreferenced_idx",
+            ),
+        ),
+        migrations.RunPython(count_references, migrations.RunPython.noop),
+    ]
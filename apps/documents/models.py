@@ -1,3 +1,5 @@
+import uuid
+
 from django.db import models
 from django.core.validators import RegexValidator
 from django.core.files.storage import FileSystemStorage
@@ -5,6 +7,56 @@ from django.core.files.storage import FileSystemStorage
 from apps.projects.models import Project
 
 
+class Blob(models.Model):
+    """
+    File content stored once per SHA-256 digest, shared by every document (of any project) with the same bytes.
+    """
+
+    sha256 = models.CharField(max_length=64, primary_key=True)
+    size = models.PositiveBigIntegerField()
+    # documentos que apontam para o blob, mantido pelos receivers de Document; zero = candidato ao collect_blobs
+    ref_count = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["sha256"], condition=models.Q(ref_count=0), name="blobs_unreferenced_idx"),
+        ]
+
+    @property
+    def name(self):
+        # nome no storage, dois níveis de diretório para não concentrar milhões de arquivos em um só
+        return f"blobs/{self.sha256[:2]}/{self.sha256[2:4]}/{self.sha256}"
+
+    def __str__(self):
+        return self.sha256
+
+
+class DocumentUpload(models.Model):
+    """
+    Resumable upload in progress: the bytes received so far are kept in a partial file in the document storage and
+    ``offset`` tells the client where to resume. Becomes a ``Document`` when the last chunk arrives.
+    """
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    project = models.ForeignKey(Project, on_delete=models.CASCADE, related_name="uploads")
+    created_by = models.ForeignKey("accounts.DefaultAccount", on_delete=models.CASCADE, related_name="uploads")
+    name = models.CharField(max_length=255)
+    content_type = models.CharField(max_length=255, blank=True, default="")
+    size = models.PositiveBigIntegerField()
+    offset = models.PositiveBigIntegerField(default=0)
+    sha256 = models.CharField(max_length=64, blank=True, default="")  # digest esperado, opcional, conferido no final
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    @property
+    def part_name(self):
+        return f"uploads/{self.id}.part"
+
+    def __str__(self):
+        return self.name
+
+
 class Document(models.Model):
     """
     Model to represent a document associated with a project. It includes fields for document name, file upload,
@@ -17,8 +69,18 @@ class Document(models.Model):
         on_delete=models.CASCADE,
         related_name="documents",
     )
-    file = models.CharField(max_length=255)  # simular o envio de um arquivo
+    file = models.CharField(max_length=255)  # nome do arquivo enviado, o conteúdo fica no blob
     uploaded_at = models.DateTimeField(auto_now_add=True)
+    # documentos criados pela mutation sem upload não têm conteúdo
+    blob = models.ForeignKey(Blob, on_delete=models.PROTECT, null=True, blank=True, related_name="documents")
+    size = models.PositiveBigIntegerField(null=True, blank=True)
+    content_type = models.CharField(max_length=255, blank=True, default="")
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["project", "uploaded_at"], name="documents_project_upload_idx"),
+            models.Index(fields=["project", "name"], name="documents_project_name_idx"),
+        ]
 
     def __str__(self):
         return self.name
@@ -1,19 +1,43 @@
 import graphene
 from django.db import transaction
+from graphene_django import bypass_get_queryset
 from graphene_django.types import DjangoObjectType
 from django.core.exceptions import ObjectDoesNotExist, ValidationError
 
 from .models import Document
+from .storage import create_from_blob, UploadError
 from apps.projects.models import Project
+from ag_backend.fields import FilterConnectionField
+from ag_backend.bulk import to_pk
+from ag_backend.loaders import get_loaders
+from ag_backend.permissions import get_permissions
 
 
 class DocumentType(DjangoObjectType):
+    notifications = FilterConnectionField("apps.notifications.schema.NotificationType", required=True)
+    sha256 = graphene.String(description="SHA-256 of the uploaded content.")
+    download_url = graphene.String(description="Path of the content, null for documents created without upload.")
+
     class Meta:
         model = Document
         interfaces = (graphene.relay.Node,)
         filter_fields = ["name", "uploaded_at", "project_id"]
         fields = "__all__"  # sem campos sensíveis, utilizar todos
 
+    @classmethod
+    def get_queryset(cls, queryset, info):
+        return get_permissions(info).filter(queryset, "project")
+
+    @bypass_get_queryset
+    def resolve_project(self, info):
+        return get_loaders(info).load(self, "project")
+
+    def resolve_sha256(self, info):
+        return self.blob_id
+
+    def resolve_download_url(self, info):
+        return f"/documents/{self.pk}/download/" if self.blob_id else None
+
 
 class CreateDocument(graphene.Mutation):
     class Arguments:
@@ -21,6 +45,7 @@ class CreateDocument(graphene.Mutation):
         project_id = graphene.ID(required=True)
         file = graphene.String(required=True)  # simular upload de file para fins de testes
         uploaded_at = graphene.Date(required=True)
+        sha256 = graphene.String(description="Digest of content already uploaded to another project of the same owner.")
 
     document = graphene.Field(DocumentType)
     success = graphene.Boolean()
@@ -30,17 +55,25 @@ class CreateDocument(graphene.Mutation):
         user = info.context.get("user") if isinstance(info.context, dict) else info.context.user
         if not user.is_authenticated:
             return CreateDocument(document=None, success=False, errors="Authentication required.")
-        project = Project.objects.get(pk=project_id)
-
-        if not (user.is_superuser or user.is_staff or project.cleiton.username == user.username):
-            print("Permission denied.")
-            return CreateDocument(document=None, success=False, errors="Permission denied.")
+        error = get_permissions(info).check_project(project_id)
+        if error:
+            return CreateDocument(document=None, success=False, errors=error)
+
+        sha256 = kwargs.pop("sha256", None)
+        if sha256:  # reaproveitar o conteúdo já armazenado, sem novo upload
+            try:
+                document = create_from_blob(Project.objects.get(pk=project_id), kwargs["name"], sha256, file=kwargs["file"])
+            except UploadError as e:
+                return CreateDocument(document=None, success=False, errors=str(e))
+            if document is None:
+                return CreateDocument(document=None, success=False, errors="Content not found, upload the file to /documents/uploads/.")
+            return CreateDocument(document=document, success=True)
 
         try:  # criar documento com tratamento de validação e erros
             with transaction.atomic():  # transação atômica para garantir a integridade da manipulação no banco
                 print("Creating document with:", kwargs)
-                document = Document(project=project, **kwargs)
-                document.full_clean()  # validar antes de salvar
+                document = Document(project_id=to_pk(project_id), **kwargs)
+                document.full_clean(exclude=["project"])  # validar antes de salvar, projeto já conferido
                 document.save()
             return CreateDocument(document=document, success=True)
         except ValidationError as e:
@@ -62,13 +95,12 @@ class UpdateDocument(graphene.Mutation):
     errors = graphene.String()
 
     def mutate(self, info, id, **kwargs):
-        user = info.context.get("user") if isinstance(info.context, dict) else info.context.user
-        document = Document.objects.get(pk=id)
-
-        if not (user.is_superuser or user.is_staff or document.project.cleiton.username == user.username):
-            return UpdateDocument(document=None, success=False, errors="Permission denied.")
-
         try:  # update de documento com tratamento de validação e erros
+            document = Document.objects.get(pk=id)
+            error = get_permissions(info).check_project(document.project_id)
+            if error:
+                return UpdateDocument(document=None, success=False, errors=error)
+
             with transaction.atomic():  # utilizar transação atômica para garantir a integridade da manipulação no banco
                 for key, value in kwargs.items():
                     setattr(document, key, value)  # atualizar apenas os campos fornecidos
@@ -90,13 +122,12 @@ class DeleteDocument(graphene.Mutation):
     errors = graphene.String()
 
     def mutate(self, info, id):
-        user = info.context.get("user") if isinstance(info.context, dict) else info.context.user
-        document = Document.objects.get(pk=id)
-
-        if not (user.is_superuser or user.is_staff or document.project.cleiton.username == user.username):
-            return UpdateDocument(document=None, success=False, errors="Permission denied.")
-
         try:  # deletar documento com tratamento de validação e erros
+            document = Document.objects.get(pk=id)
+            error = get_permissions(info).check_project(document.project_id)
+            if error:
+                return DeleteDocument(success=False, errors=error)
+
             with transaction.atomic():  # utilizar transação atômica para garantir a integridade da manipulação no banco
                 document.delete()
             return DeleteDocument(success=True)
@@ -0,0 +1,266 @@
+import hashlib
+import os
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.files.storage import FileSystemStorage
+from django.db import transaction
+from django.db.models import Count, Exists, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from django.db.models.signals import post_delete, post_save
+from django.utils import timezone
+
+from .models import Blob, Document, DocumentUpload
+
+# bytes copiados por leitura/escrita, nenhum arquivo é lido inteiro em memória
+COPY_BUFFER_SIZE = 64 * 1024
+
+
+def get_storage_options():
+    options = getattr(settings, "DOCUMENT_STORAGE", {})
+    return {
+        "LOCATION": options.get("LOCATION", os.path.join(settings.BASE_DIR, "media", "documents")),
+        "MAX_SIZE": options.get("MAX_SIZE", 2 * 1024**3),
+        "MAX_CHUNK_SIZE": options.get("MAX_CHUNK_SIZE", 64 * 1024**2),
+        "SENDFILE_HEADER": options.get("SENDFILE_HEADER"),
+        "SENDFILE_PREFIX": options.get("SENDFILE_PREFIX", "/protected/documents/"),
+        "UPLOAD_EXPIRY_HOURS": options.get("UPLOAD_EXPIRY_HOURS", 24),
+        "GC_BATCH_SIZE": options.get("GC_BATCH_SIZE", 500),
+    }
+
+
+def get_storage():
+    return FileSystemStorage(location=get_storage_options()["LOCATION"])
+
+
+class UploadError(Exception):
+    """
+    Rejected upload request, with the HTTP status the views answer with.
+    """
+
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+
+def find_blob(project, sha256):
+    """
+    Returns the blob with ``sha256`` when a document of a project of the same owner already references it, locked
+    until the end of the transaction so ``collect_blobs`` cannot remove it meanwhile. Limited to the owner's
+    projects: knowing the digest of a file of another account must not give access to its content.
+    """
+
+    owned = Document.objects.filter(blob_id=OuterRef("pk"), project__owner_id=project.owner_id)
+    return Blob.objects.select_for_update(of=("self",)).filter(Exists(owned), pk=sha256.lower()).first()
+
+
+def create_from_blob(project, name, sha256, content_type="", file=None):
+    """
+    Creates a document of ``project`` with the content already stored under ``sha256``, without transferring it
+    again. Returns ``None`` when the content has to be uploaded.
+    """
+
+    with transaction.atomic():
+        blob = find_blob(project, sha256)
+        if blob is None:
+            return None
+        document = Document(name=name, project=project, file=file or name, blob=blob, size=blob.size, content_type=content_type)
+        try:
+            document.full_clean()
+        except ValidationError as e:
+            raise UploadError(str(e))
+        document.save()
+    return document
+
+
+def start_upload(user, project, name, size, content_type="", sha256=""):
+    """
+    Creates the ``DocumentUpload`` of a file of ``size`` bytes and its empty partial file.
+    """
+
+    if size > get_storage_options()["MAX_SIZE"]:
+        raise UploadError("File too large.", 413)
+
+    upload = DocumentUpload(project=project, created_by=user, name=name, size=size, content_type=content_type, sha256=sha256.lower())
+    try:
+        upload.full_clean()
+    except ValidationError as e:
+        raise UploadError(str(e))
+
+    path = get_storage().path(upload.part_name)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with transaction.atomic():
+        upload.save()
+        open(path, "wb").close()
+    return upload
+
+
+def write_chunk(upload_id, offset, stream, length):
+    """
+    Writes ``length`` bytes read from ``stream`` (the request body) at ``offset`` of the partial file, which must be
+    where the previous chunk ended. The upload row stays locked while the chunk is written, so concurrent requests of
+    the same upload are serialized. When the client disconnects the bytes already written are kept and the next
+    chunk resumes from them.
+    """
+
+    if length > get_storage_options()["MAX_CHUNK_SIZE"]:
+        raise UploadError("Chunk too large.", 413)
+
+    interrupted = False
+    with transaction.atomic():
+        upload = DocumentUpload.objects.select_for_update().get(pk=upload_id)
+        if offset != upload.offset:
+            raise UploadError(f"Expected offset {upload.offset}.", 409)
+        if offset + length > upload.size:
+            raise UploadError("Chunk exceeds the declared file size.", 400)
+
+        written = 0
+        with open(get_storage().path(upload.part_name), "r+b") as file:
+            file.seek(offset)
+            file.truncate()  # descartar o resto de uma escrita interrompida
+            try:
+                while written < length:
+                    data = stream.read(min(COPY_BUFFER_SIZE, length - written))
+                    if not data:
+                        break
+                    file.write(data)
+                    written += len(data)
+            except OSError:  # cliente desconectou no meio do corpo
+                interrupted = True
+            file.flush()
+            os.fsync(file.fileno())  # offset gravado só depois dos bytes estarem no disco
+
+        upload.offset = offset + written
+        upload.save(update_fields=["offset", "updated_at"])
+
+    if interrupted or written < length:
+        raise UploadError(f"Chunk interrupted, resume from offset {upload.offset}.", 400)
+    return upload
+
+
+def hash_file(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as file:
+        for data in iter(lambda: file.read(COPY_BUFFER_SIZE), b""):
+            digest.update(data)
+    return digest.hexdigest()
+
+
+def finish_upload(upload):
+    """
+    Turns a complete upload into a ``Document``. The partial file is hashed and moved (a rename, no copy) to the
+    path of its SHA-256 digest, unless a blob with the same content is already stored, in which case it is dropped
+    and the document points at the existing blob.
+    """
+
+    storage = get_storage()
+    document = None
+    with transaction.atomic():
+        upload = DocumentUpload.objects.select_for_update().filter(pk=upload.pk).first()
+        if upload is None:  # concluído por outra requisição
+            raise UploadError("Upload not found.", 404)
+
+        part = storage.path(upload.part_name)
+        sha256 = hash_file(part)
+        if upload.sha256 and upload.sha256 != sha256:
+            cancel_upload(upload)
+        else:
+            blob, _ = Blob.objects.select_for_update().get_or_create(sha256=sha256, defaults={"size": upload.size})
+            target = storage.path(blob.name)
+            if os.path.exists(target):  # conteúdo já armazenado, deduplicar
+                os.remove(part)
+            else:
+                os.makedirs(os.path.dirname(target), exist_ok=True)
+                os.replace(part, target)
+
+            document = Document.objects.create(
+                name=upload.name,
+                project_id=upload.project_id,
+                file=upload.name,
+                blob=blob,
+                size=upload.size,
+                content_type=upload.content_type,
+            )
+            upload.delete()
+
+    if document is None:
+        raise UploadError("Checksum mismatch, upload discarded.", 422)
+    return document
+
+
+def cancel_upload(upload):
+    upload.delete()
+    try:
+        os.remove(get_storage().path(upload.part_name))
+    except FileNotFoundError:
+        pass
+
+
+def open_blob(blob):
+    return get_storage().open(blob.name, "rb")
+
+
+def collect_blobs(batch_size=None, max_batches=None):
+    """
+    Deletes the blobs no document references, and their files, ``batch_size`` per transaction. Blobs locked by an
+    upload or a ``create_from_blob`` that is about to reference them are skipped. Returns ``(blobs, bytes)``
+    removed.
+    """
+
+    batch_size = batch_size or get_storage_options()["GC_BATCH_SIZE"]
+    storage = get_storage()
+    referenced = Document.objects.filter(blob_id=OuterRef("pk"))
+    removed = freed = batches = 0
+    while max_batches is None or batches < max_batches:
+        with transaction.atomic():
+            # conferir as referências também na consulta, um contador fora de sincronia não apaga conteúdo em uso
+            blobs = list(Blob.objects.select_for_update(skip_locked=True).filter(ref_count=0).filter(~Exists(referenced)).order_by("pk")[:batch_size])
+            if not blobs:
+                break
+            Blob.objects.filter(pk__in=[blob.pk for blob in blobs]).delete()
+            for blob in blobs:  # antes do commit: se ele falhar, a linha continua com ref_count 0 e volta no próximo lote
+                try:
+                    os.remove(storage.path(blob.name))
+                except FileNotFoundError:
+                    pass
+        removed += len(blobs)
+        freed += sum(blob.size for blob in blobs)
+        batches += 1
+    return removed, freed
+
+
+def expire_uploads(hours=None):
+    """
+    Cancels the uploads without a chunk in the last ``hours`` hours, removing their partial files.
+    """
+
+    hours = get_storage_options()["UPLOAD_EXPIRY_HOURS"] if hours is None else hours
+    uploads = list(DocumentUpload.objects.filter(updated_at__lt=timezone.now() - timedelta(hours=hours)))
+    for upload in uploads:
+        cancel_upload(upload)
+    return len(uploads)
+
+
+def recount_blob_references():
+    """
+    Recomputes ``Blob.ref_count`` from the documents, with one UPDATE.
+    """
+
+    references = Document.objects.filter(blob_id=OuterRef("pk")).order_by().values("blob_id").annotate(total=Count("pk")).values("total")
+    return Blob.objects.update(ref_count=Coalesce(Subquery(references), 0))
+
+
+def on_document_saved(sender, instance, created, raw=False, **kwargs):
+    # o blob de um documento não muda depois de criado
+    if created and instance.blob_id and not raw:
+        Blob.objects.filter(pk=instance.blob_id).update(ref_count=F("ref_count") + 1)
+
+
+def on_document_deleted(sender, instance, **kwargs):
+    if instance.blob_id:
+        Blob.objects.filter(pk=instance.blob_id).update(ref_count=F("ref_count") - 1)
+
+
+post_save.connect(on_document_saved, sender=Document, dispatch_uid="document_blob_references_save")
+post_delete.connect(on_document_deleted, sender=Document, dispatch_uid="document_blob_references_delete")
@@ -0,0 +1,207 @@
+import hashlib
+import os
+import shutil
+import tempfile
+import pytest
+from datetime import date, timedelta
+from io import StringIO
+
+from asgiref.sync import sync_to_async
+
+from apps.documents.models import Blob, Document, DocumentUpload
+from ag_backend.schema import schema
+from apps.projects.models import Project
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from graphene.test import Client as GraphQLClient
+
+CONTENT = b"".join(f"line {index}\n".encode() for index in range(2000))
+
+
+@pytest.mark.django_db
+class DocumentStorageTestCase(TestCase):
+    def setUp(self):
+        super().setUp()
+        self.location = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.location)
+        storage_settings = self.settings(DOCUMENT_STORAGE={"LOCATION": self.location, "MAX_SIZE": 10**6, "MAX_CHUNK_SIZE": 10**5})
+        storage_settings.enable()
+        self.addCleanup(storage_settings.disable)
+
+        self.user = get_user_model().objects.create_user(username="cleiton", password="securepassword")
+        self.other = get_user_model().objects.create_user(username="outro", password="securepassword")
+        self.project = self.create_project(self.user, "Sample Project")
+        self.client.force_login(self.user)
+        self.async_client.force_login(self.user)
+
+    def create_project(self, owner, name):
+        return Project.objects.create(
+            owner=owner,
+            name=name,
+            description="Description",
+            status="open",
+            start_date=date.today(),
+            estimated_end_date=date.today() + timedelta(days=30),
+        )
+
+    def start(self, project=None, **extra):
+        data = {"projectId": (project or self.project).pk, "name": "report.txt", "size": len(CONTENT), "contentType": "text/plain", **extra}
+        response = self.client.post("/documents/uploads/", data, content_type="application/json")
+        assert response.status_code == 201, response.content
+        return f"/documents/uploads/{response.json()['id']}/"
+
+    def send(self, url, offset, chunk):
+        return self.client.patch(url, chunk, content_type="application/offset+octet-stream", headers={"Upload-Offset": str(offset)})
+
+    def upload(self, project=None, **extra):
+        url = self.start(project, **extra)
+        for offset in range(0, len(CONTENT), 4096):
+            response = self.send(url, offset, CONTENT[offset : offset + 4096])
+        assert response.status_code == 201, response.content
+        return Document.objects.get(pk=response.json()["document"]["id"])
+
+    def test_chunked_upload_can_be_resumed(self):
+        url = self.start(sha256=hashlib.sha256(CONTENT).hexdigest())
+        assert self.send(url, 0, CONTENT[:5000]).status_code == 204
+
+        conflict = self.send(url, 0, CONTENT[:5000])
+        assert conflict.status_code == 409
+        resume = self.client.head(url)
+        assert resume["Upload-Offset"] == "5000" and resume["Upload-Length"] == str(len(CONTENT))
+
+        response = self.send(url, 5000, CONTENT[5000:])
+        assert response.status_code == 201
+        document = Document.objects.get()
+        assert (document.name, document.size, document.content_type) == ("report.txt", len(CONTENT), "text/plain")
+        assert document.blob_id == hashlib.sha256(CONTENT).hexdigest()
+        with open(os.path.join(self.location, document.blob.name), "rb") as file:
+            assert file.read() == CONTENT
+        assert not DocumentUpload.objects.exists()
+        assert os.listdir(os.path.join(self.location, "uploads")) == []
+
+    def test_identical_files_share_one_blob(self):
+        first = self.upload()
+        second = self.upload(self.create_project(self.user, "Another Project"))
+
+        assert first.blob_id == second.blob_id
+        assert Blob.objects.count() == 1
+        assert sum(len(files) for _, _, files in os.walk(os.path.join(self.location, "blobs"))) == 1
+
+    def test_checksum_mismatch_discards_the_upload(self):
+        url = self.start(sha256="0" * 64)
+        response = self.send(url, 0, CONTENT)
+        assert response.status_code == 422
+        assert not DocumentUpload.objects.exists() and not Document.objects.exists()
+
+    def test_download_supports_ranges(self):
+        document = self.upload()
+        url = f"/documents/{document.pk}/download/"
+
+        response = self.client.get(url)
+        assert response.status_code == 200
+        assert b"".join(response.streaming_content) == CONTENT
+        assert response["Accept-Ranges"] == "bytes" and response["ETag"] == f'"{document.blob_id}"'
+        assert response["Content-Disposition"] == 'attachment; filename="report.txt"'
+        response.close()
+
+        response = self.client.get(url, headers={"Range": "bytes=10-19"})
+        assert response.status_code == 206
+        assert response["Content-Range"] == f"bytes 10-19/{len(CONTENT)}" and response["Content-Length"] == "10"
+        assert b"".join(response.streaming_content) == CONTENT[10:20]
+        response.close()
+
+        response = self.client.get(url, headers={"Range": "bytes=-5"})
+        assert b"".join(response.streaming_content) == CONTENT[-5:]
+        response.close()
+
+        assert self.client.get(url, headers={"Range": f"bytes={len(CONTENT)}-"}).status_code == 416
+        assert self.client.get(url, headers={"If-None-Match": response["ETag"]}).status_code == 304
+
+        self.client.force_login(self.other)
+        assert self.client.get(url).status_code == 403
+
+    def test_download_checks_access_through_the_request_permissions(self):
+        url = f"/documents/{self.upload().pk}/download/"
+        with self.settings(GRAPHQL_PERMISSIONS={"BACKEND": "default", "TIMEOUT": 300}):
+            cache.clear()
+            self.client.get(url).close()
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get(url)
+            assert response.status_code == 200
+            response.close()
+            assert not any('"projects_project"' in query["sql"] for query in queries.captured_queries), "Owned projects should come from the cache"
+        cache.clear()
+
+        self.client.force_login(get_user_model().objects.create_user(username="staff", password="securepassword", is_staff=True))
+        response = self.client.get(url)
+        assert response.status_code == 200
+        response.close()
+
+    def test_duplicates_reference_the_stored_blob(self):
+        first = self.upload()
+        sha256, path = first.blob_id, os.path.join(self.location, first.blob.name)
+
+        data = {"projectId": self.create_project(self.user, "Another Project").pk, "name": "copy.txt", "size": len(CONTENT), "sha256": sha256}
+        response = self.client.post("/documents/uploads/", data, content_type="application/json")
+        assert response.status_code == 201 and response.json()["deduplicated"] is True
+        assert not DocumentUpload.objects.exists()
+
+        mutation = """
+            mutation ($projectId: ID!, $sha256: String) {
+                createDocument(name: "Third", file: "third.txt", projectId: $projectId, uploadedAt: "2030-01-01", sha256: $sha256) {
+                    success errors document { sha256 downloadUrl }
+                }
+            }
+        """
+        graphql_client = GraphQLClient(schema)
+        result = graphql_client.execute(mutation, variables={"projectId": str(self.project.pk), "sha256": sha256}, context_value={"user": self.user})
+        assert result["data"]["createDocument"]["success"] is True
+        assert result["data"]["createDocument"]["document"]["sha256"] == sha256
+        assert Blob.objects.get().ref_count == 3
+
+        # o mesmo digest em um projeto de outra conta não dá acesso ao conteúdo
+        data["projectId"] = self.create_project(self.other, "Foreign Project").pk
+        self.client.force_login(self.other)
+        response = self.client.post("/documents/uploads/", data, content_type="application/json")
+        assert response.status_code == 201 and "id" in response.json()
+
+        delete = "mutation ($id: ID!) { deleteDocument(id: $id) { success errors } }"
+        for document in Document.objects.all():
+            result = graphql_client.execute(delete, variables={"id": str(document.pk)}, context_value={"user": self.user})
+            assert result["data"]["deleteDocument"] == {"success": True, "errors": None}
+        assert Blob.objects.get().ref_count == 0
+
+        stdout = StringIO()
+        call_command("collect_blobs", "--batch-size", "1", stdout=stdout)
+        assert "Removed 1 blob(s)" in stdout.getvalue()
+        assert not Blob.objects.exists()
+        assert not os.path.exists(path)
+
+    def test_collect_blobs_keeps_referenced_content_and_expires_uploads(self):
+        document = self.upload()
+        Blob.objects.update(ref_count=0)  # contador fora de sincronia
+        stale = self.start()
+        DocumentUpload.objects.update(updated_at=timezone.now() - timedelta(days=2))
+
+        call_command("collect_blobs", stdout=StringIO())
+        assert Blob.objects.filter(pk=document.blob_id).exists()
+        assert not DocumentUpload.objects.exists()
+        assert self.client.head(stale).status_code == 404
+
+        call_command("collect_blobs", "--recount", stdout=StringIO())
+        assert Blob.objects.get().ref_count == 1
+
+    async def test_asgi_download_streams_from_an_async_iterator(self):
+        document = await Document.objects.acreate(name="empty", file="empty.txt", project=self.project)
+        assert (await self.async_client.get(f"/documents/{document.pk}/download/")).status_code == 404
+
+        document = await sync_to_async(self.upload)()
+        response = await self.async_client.get(f"/documents/{document.pk}/download/", headers={"Range": "bytes=100-"})
+        assert response.status_code == 206 and response.is_async
+        assert b"".join([chunk async for chunk in response.streaming_content]) == CONTENT[100:]
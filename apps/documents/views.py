@@ -0,0 +1,220 @@
+import json
+import re
+
+from django.core.handlers.asgi import ASGIRequest
+from django.http import FileResponse, HttpResponse, JsonResponse
+from django.utils.http import content_disposition_header
+from django.views import View
+
+from ag_backend.export import iterate_in_thread
+from ag_backend.permissions import get_context_permissions
+from apps.projects.models import Project
+
+from .models import Document, DocumentUpload
+from .storage import cancel_upload, create_from_blob, finish_upload, get_storage_options, open_blob, start_upload, UploadError, write_chunk
+
+RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+def error_response(message, status):
+    return JsonResponse({"errors": [{"message": message}]}, status=status)
+
+
+def parse_range(header, size):
+    """
+    Returns the inclusive ``(start, end)`` of a single ``Range: bytes=`` header, ``None`` when the header is absent
+    or not supported (multiple ranges: the whole file is sent) and raises ``ValueError`` when it is unsatisfiable.
+    """
+
+    match = RANGE_RE.match(header or "")
+    if match is None or match.group(1) == match.group(2) == "":
+        return None
+    first, last = match.groups()
+    if first == "":  # sufixo: os últimos N bytes
+        start, end = max(size - int(last), 0), size - 1
+    else:
+        start, end = int(first), min(int(last), size - 1) if last else size - 1
+    if start > end or start >= size:
+        raise ValueError(header)
+    return start, end
+
+
+class RangeFile:
+    """
+    Reads at most ``length`` bytes of ``file`` from its current position, for bounded ranges.
+    """
+
+    def __init__(self, file, length):
+        self.file = file
+        self.remaining = length
+
+    def read(self, size=-1):
+        size = self.remaining if size is None or size < 0 else min(size, self.remaining)
+        data = self.file.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def close(self):
+        self.file.close()
+
+
+def upload_headers(response, upload):
+    response["Upload-Offset"] = str(upload.offset)
+    response["Upload-Length"] = str(upload.size)
+    return response
+
+
+def document_response(document, deduplicated=False):
+    data = {"id": document.pk, "name": document.name, "size": document.size, "sha256": document.blob_id}
+    return JsonResponse({"document": data, "deduplicated": deduplicated}, status=201)
+
+
+class UploadView(View):
+    """
+    Starts a resumable upload (``POST /documents/uploads/`` with a JSON body ``{"projectId", "name", "size",
+    "contentType", "sha256"}``, the last two optional). The response has the upload ``id``; the file is then sent in
+    chunks to ``/documents/uploads/<id>/``. When ``sha256`` is the digest of a file already stored for a project of
+    the same owner, the document is created right away (``"deduplicated": true``) and nothing is uploaded.
+    """
+
+    def post(self, request):
+        if not request.user.is_authenticated:
+            return error_response("Authentication required.", 401)
+        try:
+            data = json.loads(request.body)
+            project_id, name, size = data["projectId"], data["name"], int(data["size"])
+        except (ValueError, TypeError, KeyError):
+            return error_response("Expected a JSON body with projectId, name and size.", 400)
+        if size < 0:
+            return error_response("Invalid size.", 400)
+
+        project = Project.objects.filter(pk=project_id).only("owner_id").first()
+        if project is None:
+            return error_response("Project not found.", 404)
+        if not get_context_permissions(request).can_edit(project.pk):
+            return error_response("Permission denied.", 403)
+
+        try:
+            if data.get("sha256"):
+                document = create_from_blob(project, name, data["sha256"], data.get("contentType") or "")
+                if document is not None:
+                    return document_response(document, deduplicated=True)
+            upload = start_upload(request.user, project, name, size, data.get("contentType") or "", data.get("sha256") or "")
+            if size == 0:  # nada a enviar
+                return document_response(finish_upload(upload))
+        except UploadError as e:
+            return error_response(str(e), e.status)
+
+        response = upload_headers(JsonResponse({"id": str(upload.pk), "offset": upload.offset, "size": upload.size}, status=201), upload)
+        response["Location"] = f"{request.path.rstrip('/')}/{upload.pk}/"
+        return response
+
+
+class UploadChunkView(View):
+    """
+    ``HEAD`` returns the ``Upload-Offset`` to resume from, ``PATCH`` appends the request body at the ``Upload-Offset``
+    header (the body is copied to disk as it is read) and ``DELETE`` cancels the upload. The ``PATCH`` of the last
+    chunk answers ``201`` with the created document.
+    """
+
+    def get_upload(self, request, upload_id):
+        if not request.user.is_authenticated:
+            raise UploadError("Authentication required.", 401)
+        upload = DocumentUpload.objects.filter(pk=upload_id).first()
+        if upload is None:
+            raise UploadError("Upload not found.", 404)
+        if not (request.user.is_superuser or request.user.is_staff or upload.created_by_id == request.user.id):
+            raise UploadError("Permission denied.", 403)
+        return upload
+
+    def head(self, request, upload_id):
+        try:
+            upload = self.get_upload(request, upload_id)
+        except UploadError as e:
+            return HttpResponse(status=e.status)
+        response = upload_headers(HttpResponse(status=204), upload)
+        response["Cache-Control"] = "no-store"
+        return response
+
+    def patch(self, request, upload_id):
+        try:
+            upload = self.get_upload(request, upload_id)
+            try:
+                offset = int(request.headers["Upload-Offset"])
+                length = int(request.META.get("CONTENT_LENGTH") or "")
+            except (KeyError, ValueError):
+                return error_response("Upload-Offset and Content-Length headers are required.", 400)
+
+            upload = write_chunk(upload.pk, offset, request, length)
+            if upload.offset == upload.size:
+                return document_response(finish_upload(upload))
+        except UploadError as e:
+            return error_response(str(e), e.status)
+        return upload_headers(HttpResponse(status=204), upload)
+
+    def delete(self, request, upload_id):
+        try:
+            cancel_upload(self.get_upload(request, upload_id))
+        except UploadError as e:
+            return error_response(str(e), e.status)
+        return HttpResponse(status=204)
+
+
+class DocumentDownloadView(View):
+    """
+    Serves the content of a document. The file is handed to the server's ``wsgi.file_wrapper`` (``sendfile``) when
+    it is sent up to its end, or to the front-end proxy with ``DOCUMENT_STORAGE["SENDFILE_HEADER"]`` (e.g.
+    ``X-Accel-Redirect``). Single ``Range`` requests are answered with ``206``; the SHA-256 of the content is the
+    ``ETag``.
+    """
+
+    def get(self, request, pk):
+        if not request.user.is_authenticated:
+            return error_response("Authentication required.", 401)
+        document = Document.objects.select_related("blob").filter(pk=pk).first()
+        if document is None or document.blob is None:
+            return error_response("Document not found.", 404)
+        if not get_context_permissions(request).can_edit(document.project_id):
+            return error_response("Permission denied.", 403)
+
+        blob = document.blob
+        etag = f'"{blob.sha256}"'
+        if request.headers.get("If-None-Match") == etag:
+            return HttpResponse(status=304, headers={"ETag": etag})
+
+        content_type = document.content_type or "application/octet-stream"
+        options = get_storage_options()
+        if options["SENDFILE_HEADER"]:  # o proxy lê o arquivo e trata Range
+            return HttpResponse(
+                content_type=content_type,
+                headers={
+                    options["SENDFILE_HEADER"]: options["SENDFILE_PREFIX"] + blob.name,
+                    "Content-Disposition": content_disposition_header(True, document.file),
+                    "ETag": etag,
+                },
+            )
+
+        byte_range = None
+        if request.headers.get("If-Range", etag) == etag:  # If-Range de outra versão: enviar o arquivo inteiro
+            try:
+                byte_range = parse_range(request.headers.get("Range"), blob.size)
+            except ValueError:
+                return HttpResponse(status=416, headers={"Content-Range": f"bytes */{blob.size}"})
+
+        file = open_blob(blob)
+        if byte_range is None:
+            response = FileResponse(file, as_attachment=True, filename=document.file, content_type=content_type)
+        else:
+            start, end = byte_range
+            file.seek(start)
+            # até o fim do arquivo: o próprio arquivo, o FileResponse calcula o tamanho e o sendfile continua possível
+            body = file if end == blob.size - 1 else RangeFile(file, end - start + 1)
+            response = FileResponse(body, status=206, as_attachment=True, filename=document.file, content_type=content_type)
+            response["Content-Length"] = str(end - start + 1)
+            response["Content-Range"] = f"bytes {start}-{end}/{blob.size}"
+
+        if isinstance(request, ASGIRequest):  # o ASGI do Django acumularia um iterador síncrono inteiro em memória
+            response.streaming_content = iterate_in_thread(iter(response.streaming_content))
+        response["Accept-Ranges"] = "bytes"
+        response["ETag"] = etag
+        return response
@@ -0,0 +1,8 @@
+from django.apps import AppConfig
+
+
+class NotificationsConfig(AppConfig):
+    name = "apps.notifications"
+
+    def ready(self):
+        from . import events  # noqa: F401  conectar os receivers que enfileiram eventos
@@ -0,0 +1,100 @@
+from collections import Counter, defaultdict
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+
+from apps.activities.models import Activity
+from apps.documents.models import Document
+from apps.projects.models import Project
+from apps.projects.stats import apply_deltas
+from apps.reports.models import Report
+from apps.search.index import index_objects
+from apps.tasks.models import Task
+
+from .models import Notification, NotificationEvent
+
+# modelos que geram notificações e o nome da FK correspondente em Notification
+ENTITIES = {Task: "task", Activity: "activity", Document: "document", Report: "report"}
+LABELS = {"task": "Task", "activity": "Activity", "document": "Document", "report": "Report"}
+
+
+def enqueue_events(kind, instances):
+    """
+    Writes one ``NotificationEvent`` per instance with a single INSERT, inside the caller's transaction. Called by
+    the signal receivers and by the bulk mutations, since ``bulk_create``/``bulk_update`` send no signals.
+    """
+
+    events = [
+        NotificationEvent(
+            kind=kind,
+            entity=ENTITIES[type(instance)],
+            entity_id=instance.pk,
+            project_id=instance.project_id,
+            summary=str(instance)[:255],
+        )
+        for instance in instances
+    ]
+    NotificationEvent.objects.bulk_create(events)
+
+
+def build_notification(event):
+    label = LABELS[event.entity]
+    if event.kind == "deleted":  # o objeto não existe mais, associar ao projeto
+        return Notification(title=f"{label} deleted", message=f'{label} "{event.summary}" was deleted.', project_id=event.project_id)
+    return Notification(
+        title=f"{label} {event.kind}",
+        message=f'{label} "{event.summary}" was {event.kind}.',
+        **{f"{event.entity}_id": event.entity_id},
+    )
+
+
+def process_events(batch_size=500):
+    """
+    Turns up to ``batch_size`` pending events into notifications. Events of the same object and kind in the batch
+    are coalesced, events of objects (or projects) deleted since then are dropped, and the notifications are
+    inserted with one ``bulk_create`` in the transaction that deletes the events. Concurrent workers skip the rows
+    locked by each other on databases with ``SELECT ... FOR UPDATE SKIP LOCKED``. Returns the events consumed.
+    """
+
+    with transaction.atomic():
+        events = list(NotificationEvent.objects.select_for_update(skip_locked=True).order_by("pk")[:batch_size])
+        if not events:
+            return 0
+
+        latest = {}
+        for event in events:  # um único aviso para várias alterações do mesmo objeto
+            latest[(event.entity, event.entity_id, event.kind)] = event
+
+        pending = sorted(latest.values(), key=lambda event: event.pk)
+        existing = {}
+        for model, entity in ENTITIES.items():
+            ids = {event.entity_id for event in pending if event.entity == entity and event.kind != "deleted"}
+            existing[entity] = set(model.objects.filter(pk__in=ids).values_list("pk", flat=True)) if ids else set()
+        projects = set(Project.objects.filter(pk__in={event.project_id for event in pending}).values_list("pk", flat=True))
+
+        delivered = [
+            event for event in pending if event.project_id in projects and (event.kind == "deleted" or event.entity_id in existing[event.entity])
+        ]
+        notifications = Notification.objects.bulk_create(build_notification(event) for event in delivered)
+        index_objects(Notification, notifications, {notification.pk: event.project_id for notification, event in zip(notifications, delivered)})
+
+        unread = defaultdict(Counter)  # bulk_create não passa pelos receivers do rollup
+        for event in delivered:
+            unread[event.project_id]["notifications_unread"] += 1
+        apply_deltas(unread, create_missing=True)
+        NotificationEvent.objects.filter(pk__in=[event.pk for event in events]).delete()
+    return len(events)
+
+
+def on_save(sender, instance, created, raw=False, **kwargs):
+    if not raw:
+        enqueue_events("created" if created else "updated", [instance])
+
+
+def on_delete(sender, instance, **kwargs):
+    enqueue_events("deleted", [instance])
+
+
+for model in ENTITIES:
+    post_save.connect(on_save, sender=model, dispatch_uid=f"notification_events_save_{model._meta.label_lower}")
+    post_delete.connect(on_delete, sender=model, dispatch_uid=f"notification_events_delete_{model._meta.label_lower}")
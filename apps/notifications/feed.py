@@ -0,0 +1,68 @@
+import asyncio
+
+from ag_backend.execution import run_in_thread
+from ag_backend.pubsub import get_pubsub, get_subscription_options
+from apps.projects.stats import owner_project
+
+from .models import Notification
+
+# colunas publicadas, suficientes para recriar a instância do lado do assinante
+FIELDS = [field.attname for field in Notification._meta.concrete_fields]
+
+
+def notification_topic(project_id=None):
+    """
+    Topic of the notifications of ``project_id``, or of every notification (su/staff) when not given.
+    """
+
+    return "notifications" if project_id is None else f"notifications:{project_id}"
+
+
+class NotificationFeed:
+    """
+    Publishes the notifications inserted by any process (requests, the ``process_notification_events`` worker) to the
+    pub/sub of this process. While there are subscribers a single task tails the table with one indexed query
+    (``id > last seen``) per ``POLL_INTERVAL``, instead of every client polling ``allNotifications``. Rows are
+    published to the topic of their project and to the global topic. Rows committed out of ``id`` order by concurrent
+    transactions can be skipped; clients reconcile with ``allNotifications`` when they reconnect.
+    """
+
+    def __init__(self):
+        self.last_id = None
+        self.task = None
+
+    def start(self):
+        loop = asyncio.get_running_loop()
+        if self.task is None or self.task.done() or self.task.get_loop() is not loop:
+            self.last_id = None
+            self.task = loop.create_task(self.run())
+
+    async def run(self):
+        pubsub = get_pubsub()
+        options = get_subscription_options()
+        self.last_id = await run_in_thread(self.get_last_id)()
+        while pubsub.subscriber_count():  # parar sem assinantes, o próximo start() recomeça do último id
+            published = await run_in_thread(self.poll)(options["BATCH_SIZE"])
+            if published < options["BATCH_SIZE"]:
+                await asyncio.sleep(options["POLL_INTERVAL"])
+
+    def get_last_id(self):
+        return Notification.objects.order_by("-pk").values_list("pk", flat=True).first() or 0
+
+    def poll(self, batch_size):
+        rows = list(
+            Notification.objects.filter(pk__gt=self.last_id).annotate(owner_project=owner_project()).order_by("pk").values(*FIELDS, "owner_project")[:batch_size]
+        )
+
+        pubsub = get_pubsub()
+        for row in rows:
+            project_id = row.pop("owner_project")
+            pubsub.publish(notification_topic(), row)
+            if project_id is not None:
+                pubsub.publish(notification_topic(project_id), row)
+        if rows:
+            self.last_id = rows[-1]["id"]
+        return len(rows)
+
+
+notification_feed = NotificationFeed()
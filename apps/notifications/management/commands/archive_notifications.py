@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from apps.notifications.retention import archive_notifications
+
+
+class Command(BaseCommand):
+    help = (
+        "Moves the notifications read more than --days days ago to the archive table in batches of --batch-size rows, "
+        "one transaction per batch. Safe to interrupt and to run periodically (cron or a scheduled job)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--days", type=int, help="Archive notifications read before this many days ago (default NOTIFICATION_RETENTION).")
+        parser.add_argument("--batch-size", type=int, help="Notifications moved per transaction (default NOTIFICATION_RETENTION).")
+        parser.add_argument("--max-batches", type=int, help="Stop after this many batches, to bound the duration of a run.")
+
+    def handle(self, *args, **options):
+        archived = archive_notifications(options["days"], options["batch_size"], options["max_batches"])
+        self.stdout.write(self.style.SUCCESS(f"Archived {archived} notification(s)."))
@@ -0,0 +1,39 @@
+import signal
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from apps.notifications.events import process_events
+
+
+class Command(BaseCommand):
+    help = (
+        "Worker that turns the queued NotificationEvent rows into notifications in batches. Runs until interrupted, "
+        "polling every --interval seconds while the queue is empty; several workers can run side by side."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=500, help="Events consumed per transaction.")
+        parser.add_argument("--interval", type=float, default=2.0, help="Seconds to wait when the queue is empty.")
+        parser.add_argument("--once", action="store_true", help="Drain the queue and exit.")
+
+    def handle(self, *args, **options):
+        self.running = True
+        if not options["once"]:
+            signal.signal(signal.SIGTERM, self.stop)  # terminar o lote atual antes de sair
+
+        processed = 0
+        while self.running:
+            consumed = process_events(options["batch_size"])
+            processed += consumed
+            if not consumed:
+                if options["once"]:
+                    break
+                time.sleep(options["interval"])
+                close_old_connections()  # descartar conexões caídas ou expiradas durante a espera
+
+        self.stdout.write(self.style.SUCCESS(f"Processed {processed} event(s)."))
+
+    def stop(self, *args):
+        self.running = False
@@ -0,0 +1,37 @@
+# Generated by Django 5.0.8 on 2026-10-18 12:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("notifications", "0002_notification_notif_created_id_idx_and_more"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="NotificationEvent",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                (
+                    "kind",
+                    models.CharField(
+                        choices=[("created", "Criado"), ("updated", "Atualizado"), ("deleted", "Removido")],
+                        max_length=10,
+                    ),
+                ),
+                (
+                    "entity",
+                    models.CharField(
+                        choices=[("task", "Tarefa"), ("activity", "Atividade"), ("document", "Documento"), ("report", "Relatório")],
+                        max_length=10,
+                    ),
+                ),
+                ("entity_id", models.BigIntegerField()),
+                ("project_id", models.BigIntegerField()),
+                ("summary", models.CharField(max_length=255)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+    ]
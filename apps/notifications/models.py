@@ -25,5 +25,63 @@ class Notification(models.Model):
     read = models.BooleanField(default=False)
     read_at = models.DateTimeField(blank=True, null=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=["-created_at", "-id"], name="notif_created_id_idx"),  # ordem do keyset de allNotifications
+            models.Index(fields=["project", "-created_at"], condition=models.Q(read=False), name="notif_project_unread_idx"),
+            models.Index(fields=["read", "read_at"], name="notif_read_at_idx"),
+        ]
+
     def __str__(self):
         return self.title
+
+
+class ArchivedNotification(models.Model):
+    """
+    Read notification moved out of ``Notification`` by the ``archive_notifications`` command. The row keeps the id and
+    the columns of the original, so ``allNotifications(includeArchived: true)`` pages over both tables with the same
+    keyset, while the hot table only holds unread and recent notifications.
+    """
+
+    id = models.BigIntegerField(primary_key=True)  # mesmo id da notificação original
+    project = models.ForeignKey(Project, on_delete=models.CASCADE, null=True, blank=True, related_name="archived_notifications")
+    activity = models.ForeignKey(Activity, on_delete=models.CASCADE, null=True, blank=True, related_name="archived_notifications")
+    report = models.ForeignKey(Report, on_delete=models.CASCADE, null=True, blank=True, related_name="archived_notifications")
+    task = models.ForeignKey(Task, on_delete=models.CASCADE, null=True, blank=True, related_name="archived_notifications")
+    document = models.ForeignKey(Document, on_delete=models.CASCADE, null=True, blank=True, related_name="archived_notifications")
+
+    title = models.CharField(max_length=255)
+    message = models.TextField()
+    created_at = models.DateTimeField()
+    read = models.BooleanField(default=True)
+    read_at = models.DateTimeField(blank=True, null=True)
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["-created_at", "-id"], name="archnotif_created_id_idx"),  # mesmo keyset de allNotifications
+        ]
+
+    def __str__(self):
+        return self.title
+
+
+class NotificationEvent(models.Model):
+    """
+    Change to a task, activity, document or report waiting to become a ``Notification``. Rows are written in the
+    same transaction as the change by ``apps.notifications.events`` and consumed in batches by the
+    ``process_notification_events`` worker, which deletes them once the notifications are inserted.
+    """
+
+    KIND_CHOICES = [("created", "Criado"), ("updated", "Atualizado"), ("deleted", "Removido")]
+    ENTITY_CHOICES = [("task", "Tarefa"), ("activity", "Atividade"), ("document", "Documento"), ("report", "Relatório")]
+
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    entity = models.CharField(max_length=10, choices=ENTITY_CHOICES)
+    entity_id = models.BigIntegerField()
+    project_id = models.BigIntegerField()  # sem FK, o evento de remoção sobrevive ao objeto
+    summary = models.CharField(max_length=255)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.entity} {self.entity_id} {self.kind}"
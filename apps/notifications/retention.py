@@ -0,0 +1,59 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .models import ArchivedNotification, Notification
+
+# colunas copiadas para o arquivo, com os mesmos nomes nas duas tabelas
+FIELDS = [field.attname for field in Notification._meta.concrete_fields]
+
+
+def get_retention_options():
+    options = getattr(settings, "NOTIFICATION_RETENTION", {})
+    return {"ARCHIVE_AFTER_DAYS": options.get("ARCHIVE_AFTER_DAYS", 90), "BATCH_SIZE": options.get("BATCH_SIZE", 1000)}
+
+
+def archive_batch(read_before, batch_size=1000):
+    """
+    Moves up to ``batch_size`` notifications read before ``read_before`` to ``ArchivedNotification``, copying and
+    deleting them in one transaction. Only read notifications are archived, so the unread counters of
+    ``ProjectStats`` do not change. Concurrent runs skip the rows locked by each other on databases with
+    ``SELECT ... FOR UPDATE SKIP LOCKED``. Returns the number of notifications moved.
+    """
+
+    with transaction.atomic():
+        # índice (read, read_at) da tabela quente
+        rows = list(Notification.objects.select_for_update(skip_locked=True).filter(read=True, read_at__lt=read_before).order_by("read_at")[:batch_size])
+        if not rows:
+            return 0
+
+        now = timezone.now()
+        ArchivedNotification.objects.bulk_create(
+            [ArchivedNotification(archived_at=now, **{name: getattr(row, name) for name in FIELDS}) for row in rows],
+            ignore_conflicts=True,  # id já arquivado por uma execução interrompida depois do commit
+        )
+        Notification.objects.filter(pk__in=[row.pk for row in rows]).delete()
+    return len(rows)
+
+
+def archive_notifications(days=None, batch_size=None, max_batches=None):
+    """
+    Archives the notifications read more than ``days`` days ago (``NOTIFICATION_RETENTION`` by default) in bounded
+    batches, so no transaction holds locks on the whole table. Returns the number of notifications moved.
+    """
+
+    options = get_retention_options()
+    days = options["ARCHIVE_AFTER_DAYS"] if days is None else days
+    batch_size = batch_size or options["BATCH_SIZE"]
+    read_before = timezone.now() - timedelta(days=days)
+
+    archived = batches = 0
+    while max_batches is None or batches < max_batches:
+        moved = archive_batch(read_before, batch_size)
+        archived += moved
+        batches += 1
+        if moved < batch_size:
+            break
+    return archived
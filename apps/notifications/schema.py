@@ -1,14 +1,28 @@
 import graphene
+from collections import Counter, defaultdict
 from django.core.exceptions import ObjectDoesNotExist, ValidationError
 from django.db import transaction
+from django.utils import timezone
+from graphene_django import bypass_get_queryset
 from graphene_django.types import DjangoObjectType
 
 from .models import Notification
 from apps.activities.models import Activity
 from apps.documents.models import Document
 from apps.projects.models import Project
+from apps.projects.stats import apply_deltas, owner_project, record_saved
 from apps.reports.models import Report
+from apps.search.index import index_objects
 from apps.tasks.models import Task
+from ag_backend.bulk import BulkItemError, check_bulk_request, clean_instance, get_bulk_options, invalidate_objects, to_pk
+from ag_backend.execution import run_in_thread
+from ag_backend.loaders import get_loaders
+from ag_backend.permissions import get_permissions
+from ag_backend.pubsub import get_pubsub
+from .feed import notification_feed, notification_topic
+
+# entidades que podem ser associadas a uma notificação
+LINKED_MODELS = {"project": Project, "activity": Activity, "report": Report, "task": Task, "document": Document}
 
 
 class NotificationType(DjangoObjectType):
@@ -18,6 +32,31 @@ class NotificationType(DjangoObjectType):
         fields = "__all__"  # sem campos sensíveis, utilizar todos
         filter_fields = ["project_id", "activity_id", "report_id", "task_id", "document_id"]
 
+    @classmethod
+    def get_queryset(cls, queryset, info):
+        # notificações sem projeto próprio seguem o projeto da task, atividade, relatório ou documento
+        return get_permissions(info).filter(queryset.alias(owner_project=owner_project()), "owner_project")
+
+    @bypass_get_queryset
+    def resolve_project(self, info):
+        return get_loaders(info).load(self, "project")
+
+    @bypass_get_queryset
+    def resolve_activity(self, info):
+        return get_loaders(info).load(self, "activity")
+
+    @bypass_get_queryset
+    def resolve_report(self, info):
+        return get_loaders(info).load(self, "report")
+
+    @bypass_get_queryset
+    def resolve_task(self, info):
+        return get_loaders(info).load(self, "task")
+
+    @bypass_get_queryset
+    def resolve_document(self, info):
+        return get_loaders(info).load(self, "document")
+
 
 class CreateNotification(graphene.Mutation):
     class Arguments:
@@ -148,7 +187,285 @@ class DeleteNotification(graphene.Mutation):
             return DeleteNotification(success=False, errors="Notification not found.")
 
 
+def get_link(values):
+    """
+    Returns the ``(name, pk)`` of the single entity linked in ``values`` (``<name>_id`` keys), or ``None``.
+    """
+
+    links = [(name, values.get(f"{name}_id")) for name in LINKED_MODELS if values.get(f"{name}_id")]
+    return (links[0][0], to_pk(links[0][1])) if len(links) == 1 else None
+
+
+def get_link_projects(links):
+    """
+    Maps every ``(name, pk)`` link to the id of its owning project, with one query per linked model.
+    """
+
+    wanted = defaultdict(set)
+    for name, pk in links:
+        wanted[name].add(pk)
+
+    projects = {}
+    for name, pks in wanted.items():
+        column = "pk" if name == "project" else "project_id"
+        rows = LINKED_MODELS[name].objects.filter(pk__in=pks - {None}).values_list("pk", column)
+        projects.update(((name, pk), project_id) for pk, project_id in rows)
+    return projects
+
+
+class NotificationInput(graphene.InputObjectType):
+    title = graphene.String(required=True)
+    message = graphene.String(required=True)
+    project_id = graphene.ID()
+    activity_id = graphene.ID()
+    report_id = graphene.ID()
+    task_id = graphene.ID()
+    document_id = graphene.ID()
+
+
+class NotificationUpdateInput(graphene.InputObjectType):
+    id = graphene.ID(required=True)
+    title = graphene.String()
+    message = graphene.String()
+    read = graphene.Boolean()
+
+
+class BulkCreateNotifications(graphene.Mutation):
+    """
+    Creates many notifications in one request. The linked entities, their projects and the permissions are resolved
+    once for the whole batch and the valid notifications are inserted with a single ``bulk_create``.
+    """
+
+    class Arguments:
+        notifications = graphene.List(graphene.NonNull(NotificationInput), required=True)
+
+    notifications = graphene.List(NotificationType)
+    success = graphene.Boolean()
+    errors = graphene.List(BulkItemError)
+
+    def mutate(self, info, notifications):
+        user = info.context.get("user") if isinstance(info.context, dict) else info.context.user
+        errors = check_bulk_request(user, notifications)
+        if errors:
+            return BulkCreateNotifications(notifications=[], success=False, errors=errors)
+
+        links = [get_link(item) for item in notifications]
+        projects = get_link_projects(link for link in links if link)
+        denied = get_permissions(info).check_projects(projects.values())
+
+        created = []
+        for index, (item, link) in enumerate(zip(notifications, links)):
+            if link is None:
+                errors.append(BulkItemError(index=index, errors="A notification must be associated with exactly one entity."))
+                continue
+            if link not in projects:
+                errors.append(BulkItemError(index=index, errors="Entity not found."))
+                continue
+            if projects[link] in denied:
+                errors.append(BulkItemError(index=index, errors=denied[projects[link]]))
+                continue
+
+            notification = Notification(title=item["title"], message=item["message"], **{f"{link[0]}_id": link[1]})
+            error = clean_instance(notification, exclude=LINKED_MODELS)  # entidades já resolvidas em lote
+            if error:
+                errors.append(BulkItemError(index=index, errors=error))
+                continue
+            created.append(notification)
+
+        with transaction.atomic():  # transação única para todo o lote
+            Notification.objects.bulk_create(created, batch_size=get_bulk_options()["BATCH_SIZE"])
+            record_saved(Notification, created, created=True)  # bulk_create não dispara post_save
+            index_objects(Notification, created)
+        return BulkCreateNotifications(notifications=created, success=not errors, errors=errors)
+
+
+def get_editable_notifications(info, ids, errors):
+    """
+    Loads the notifications in ``ids`` and returns ``(index, notification)`` for the ones the user may change,
+    appending the per-item errors of the others to ``errors``.
+    """
+
+    existing = Notification.objects.in_bulk({to_pk(pk) for pk in ids} - {None})
+    links = {pk: get_link({f"{name}_id": getattr(notification, f"{name}_id") for name in LINKED_MODELS}) for pk, notification in existing.items()}
+    link_projects = get_link_projects(link for link in links.values() if link)
+    projects = {pk: link_projects.get(link) for pk, link in links.items()}
+    permissions = get_permissions(info)
+    denied = permissions.check_projects(set(projects.values()) - {None})
+
+    editable = []
+    for index, pk in enumerate(ids):
+        notification = existing.get(to_pk(pk))
+        if notification is None:
+            errors.append(BulkItemError(index=index, errors="Notification not found."))
+        elif projects[notification.pk] is None and not permissions.unrestricted:  # sem entidade associada, apenas su/staff
+            errors.append(BulkItemError(index=index, errors="Permission denied. Not the project owner."))
+        elif projects[notification.pk] in denied:
+            errors.append(BulkItemError(index=index, errors=denied[projects[notification.pk]]))
+        else:
+            editable.append((index, notification))
+    return editable
+
+
+class BulkUpdateNotifications(graphene.Mutation):
+    """
+    Updates many notifications in one request with a single ``bulk_update``. Marking a notification as read sets
+    ``read_at``.
+    """
+
+    class Arguments:
+        notifications = graphene.List(graphene.NonNull(NotificationUpdateInput), required=True)
+
+    notifications = graphene.List(NotificationType)
+    success = graphene.Boolean()
+    errors = graphene.List(BulkItemError)
+
+    def mutate(self, info, notifications):
+        user = info.context.get("user") if isinstance(info.context, dict) else info.context.user
+        errors = check_bulk_request(user, notifications)
+        if errors:
+            return BulkUpdateNotifications(notifications=[], success=False, errors=errors)
+
+        now = timezone.now()
+        updated, fields = {}, set()
+        for index, notification in get_editable_notifications(info, [item["id"] for item in notifications], errors):
+            data = {key: value for key, value in notifications[index].items() if key != "id"}
+            if "read" in data and data["read"] != notification.read:
+                data["read_at"] = now if data["read"] else None
+
+            for key, value in data.items():
+                setattr(notification, key, value)  # atualizar apenas os campos fornecidos
+            error = clean_instance(notification, exclude=LINKED_MODELS)
+            if error:
+                errors.append(BulkItemError(index=index, errors=error))
+                continue
+
+            fields.update(data)
+            updated[notification.pk] = notification
+
+        if updated and fields:
+            with transaction.atomic():
+                Notification.objects.bulk_update(updated.values(), sorted(fields), batch_size=get_bulk_options()["BATCH_SIZE"])
+                record_saved(Notification, updated.values())
+                index_objects(Notification, updated.values())
+            invalidate_objects(Notification, updated)
+        errors.sort(key=lambda error: error.index)
+        return BulkUpdateNotifications(notifications=list(updated.values()), success=not errors, errors=errors)
+
+
+class BulkDeleteNotifications(graphene.Mutation):
+    class Arguments:
+        ids = graphene.List(graphene.NonNull(graphene.ID), required=True)
+
+    deleted_ids = graphene.List(graphene.ID)
+    success = graphene.Boolean()
+    errors = graphene.List(BulkItemError)
+
+    def mutate(self, info, ids):
+        user = info.context.get("user") if isinstance(info.context, dict) else info.context.user
+        errors = check_bulk_request(user, ids)
+        if errors:
+            return BulkDeleteNotifications(deleted_ids=[], success=False, errors=errors)
+
+        allowed = [notification.pk for _index, notification in get_editable_notifications(info, ids, errors)]
+        with transaction.atomic():  # delete do queryset ainda dispara post_delete, que invalida o cache
+            Notification.objects.filter(pk__in=allowed).delete()
+        return BulkDeleteNotifications(deleted_ids=allowed, success=not errors, errors=errors)
+
+
+class MarkNotificationsRead(graphene.Mutation):
+    """
+    Marks as read the unread notifications in ``ids`` and/or created before ``before`` (optionally only the ones of
+    ``projectId``) with a single ``UPDATE ... WHERE``, adjusting the unread counters of the affected projects in the
+    same transaction.
+    """
+
+    class Arguments:
+        ids = graphene.List(graphene.NonNull(graphene.ID))
+        before = graphene.DateTime()
+        project_id = graphene.ID()
+
+    count = graphene.Int()
+    success = graphene.Boolean()
+    errors = graphene.String()
+
+    def mutate(self, info, ids=None, before=None, project_id=None):
+        user = info.context.get("user") if isinstance(info.context, dict) else info.context.user
+        if not user.is_authenticated:
+            return MarkNotificationsRead(count=0, success=False, errors="Authentication required.")
+        if ids is None and before is None:
+            return MarkNotificationsRead(count=0, success=False, errors="Provide ids or before.")
+
+        queryset = Notification.objects.filter(read=False).annotate(owner_project=owner_project())
+        if ids is not None:
+            queryset = queryset.filter(pk__in={to_pk(pk) for pk in ids} - {None})
+        if before is not None:
+            queryset = queryset.filter(created_at__lt=before)
+        if project_id is not None:
+            queryset = queryset.filter(owner_project=to_pk(project_id))
+        queryset = get_permissions(info).filter(queryset, "owner_project")  # apenas notificações dos projetos do usuário
+
+        with transaction.atomic():
+            # travar as linhas antes de contar, para que uma marcação simultânea não desconte as mesmas duas vezes
+            rows = list(queryset.select_for_update(of=("self",)).values_list("pk", "owner_project"))
+            if not rows:
+                return MarkNotificationsRead(count=0, success=True)
+
+            queryset.filter(pk__lte=max(pk for pk, _project in rows)).update(read=True, read_at=timezone.now())
+
+            unread = defaultdict(Counter)  # update() não passa pelos receivers do rollup
+            for _pk, project in rows:
+                unread[project]["notifications_unread"] -= 1
+            apply_deltas(unread, create_missing=False)
+        invalidate_objects(Notification, [pk for pk, _project in rows])
+        return MarkNotificationsRead(count=len(rows), success=True)
+
+
 class Mutation(graphene.ObjectType):
     create_notification = CreateNotification.Field()
     update_notification = UpdateNotification.Field()
     delete_notification = DeleteNotification.Field()
+    bulk_create_notifications = BulkCreateNotifications.Field()
+    bulk_update_notifications = BulkUpdateNotifications.Field()
+    bulk_delete_notifications = BulkDeleteNotifications.Field()
+    mark_notifications_read = MarkNotificationsRead.Field()
+
+
+def get_notification_topics(permissions, project_id=None):
+    """
+    Pub/sub topics of the notifications the user of ``permissions`` can receive: the given project, every project
+    owned by the user, or the global topic for su/staff.
+    """
+
+    if project_id is not None:
+        if not Project.objects.filter(pk=to_pk(project_id)).exists():
+            raise Exception("Projeto não encontrado.")
+        if not permissions.can_edit(project_id):
+            raise Exception("Você não tem permissão para acessar este projeto.")
+        return [notification_topic(to_pk(project_id))]
+
+    if permissions.unrestricted:
+        return [notification_topic()]
+    return [notification_topic(pk) for pk in sorted(permissions.owned_project_ids)]
+
+
+async def stream_notifications(topics):
+    subscription = get_pubsub().subscribe(topics)
+    try:
+        notification_feed.start()
+        async for row in subscription:
+            yield Notification(**row)
+    finally:
+        subscription.close()
+
+
+class NotificationSubscription(graphene.ObjectType):
+    notification_added = graphene.Field(NotificationType, required=True, project_id=graphene.ID())
+
+    async def subscribe_notification_added(root, info, project_id=None):
+        user = info.context.get("user") if isinstance(info.context, dict) else info.context.user
+        if user is None or not user.is_authenticated:
+            raise Exception("Authentication required.")
+
+        # projetos criados depois da assinatura não entram, o cliente assina novamente
+        topics = await run_in_thread(get_notification_topics)(get_permissions(info), project_id)
+        return stream_notifications(topics)
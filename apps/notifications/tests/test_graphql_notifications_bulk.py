@@ -0,0 +1,63 @@
+import pytest
+from datetime import date, timedelta
+
+from ag_backend.schema import schema
+from apps.notifications.models import Notification
+from apps.projects.models import Project
+from apps.tasks.models import Task
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from graphene.test import Client as GraphQLClient
+
+
+@pytest.mark.django_db
+class NotificationBulkMutationTestCase(TestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = get_user_model().objects.create_user(username="cleiton", password="securepassword")
+        self.project = Project.objects.create(
+            owner=self.user,
+            name="Sample Project",
+            description="Sample Project Description",
+            status="open",
+            start_date=date.today(),
+            estimated_end_date=date.today() + timedelta(days=30),
+        )
+        self.task = Task.objects.create(title="Task", due_date="2030-01-01T10:00:00Z", project=self.project)
+        self.graphql_client = GraphQLClient(schema)
+
+    def execute(self, query, variables):
+        response = self.graphql_client.execute(query, variables=variables, context_value={"user": self.user})
+        if "errors" in response:
+            print("Errors:", response["errors"])
+        return response["data"]
+
+    def test_bulk_create_and_mark_as_read(self):
+        query = """
+            mutation ($notifications: [NotificationInput!]!) {
+                bulkCreateNotifications(notifications: $notifications) { notifications { id } success errors { index errors } }
+            }
+        """
+        notifications = [
+            {"title": "Project", "message": "Project changed", "projectId": self.project.id},
+            {"title": "Task", "message": "Task changed", "taskId": self.task.id},
+            {"title": "Both", "message": "Invalid", "projectId": self.project.id, "taskId": self.task.id},
+            {"title": "Missing", "message": "Invalid", "taskId": 999999},
+        ]
+        result = self.execute(query, {"notifications": notifications})["bulkCreateNotifications"]
+        assert [error["index"] for error in result["errors"]] == [2, 3]
+        assert Notification.objects.filter(task=self.task).count() == 1, "Task notifications are owned by the task's project"
+
+        query = """
+            mutation ($notifications: [NotificationUpdateInput!]!) {
+                bulkUpdateNotifications(notifications: $notifications) { notifications { read readAt } success errors { index errors } }
+            }
+        """
+        ids = Notification.objects.values_list("pk", flat=True)
+        result = self.execute(query, {"notifications": [{"id": pk, "read": True} for pk in ids]})["bulkUpdateNotifications"]
+        assert result["success"] is True
+        assert not Notification.objects.filter(read_at__isnull=True).exists(), "Marking as read should set read_at"
+
+    def tearDown(self):
+        get_user_model().objects.all().delete()
@@ -0,0 +1,85 @@
+import pytest
+from datetime import date, timedelta
+
+from ag_backend.schema import schema
+from apps.notifications.events import process_events
+from apps.notifications.models import Notification
+from apps.projects.models import Project, ProjectStats
+from apps.projects.stats import rebuild_project_stats
+from apps.tasks.models import Task
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from graphene.test import Client as GraphQLClient
+
+
+@pytest.mark.django_db
+class UnreadNotificationTestCase(TestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = get_user_model().objects.create_user(username="cleiton", password="securepassword")
+        self.other = get_user_model().objects.create_user(username="other", password="securepassword")
+        self.project = self.create_project(self.user)
+        self.other_project = self.create_project(self.other)
+        self.task = Task.objects.create(title="Task", due_date="2030-01-01T10:00:00Z", project=self.project)
+        Task.objects.create(title="Foreign", due_date="2030-01-01T10:00:00Z", project=self.other_project)
+        process_events()  # duas notificações de criação, uma em cada projeto
+        Notification.objects.create(title="Direct", message="Message", project=self.project)
+        self.graphql_client = GraphQLClient(schema)
+
+    def create_project(self, owner):
+        return Project.objects.create(
+            owner=owner,
+            name="Sample Project",
+            description="Sample Project Description",
+            status="open",
+            start_date=date.today(),
+            estimated_end_date=date.today() + timedelta(days=30),
+        )
+
+    def unread(self, project):
+        return ProjectStats.objects.get(project=project).notifications_unread
+
+    def execute(self, query):
+        response = self.graphql_client.execute(query, context_value={"user": self.user})
+        if "errors" in response:
+            print("Errors:", response["errors"])
+        return response["data"]
+
+    def test_counter_is_maintained(self):
+        assert (self.unread(self.project), self.unread(self.other_project)) == (2, 1)
+
+        notification = Notification.objects.get(task=self.task)
+        notification.read = True
+        notification.save()
+        assert self.unread(self.project) == 1, "Notifications linked to a task count for the task's project"
+
+        expected = self.unread(self.project)
+        rebuild_project_stats()
+        assert self.unread(self.project) == expected, "Rebuild should match the maintained counter"
+
+        with self.assertNumQueries(1):
+            assert self.execute("{ unreadNotifications }")["unreadNotifications"] == 1
+
+    def test_mark_read_by_ids(self):
+        ids = list(Notification.objects.values_list("pk", flat=True))
+        with CaptureQueriesContext(connection) as queries:
+            data = self.execute(f"mutation {{ markNotificationsRead(ids: {ids}) {{ count success }} }}")
+        assert data["markNotificationsRead"] == {"count": 2, "success": True}, "Notifications of other owners are not touched"
+        assert len([query for query in queries if query["sql"].startswith("UPDATE")]) == 2, "One UPDATE for rows, one for the counter"
+        assert (self.unread(self.project), self.unread(self.other_project)) == (0, 1)
+        assert not Notification.objects.filter(read=True, read_at__isnull=True).exists()
+
+    def test_mark_read_before(self):
+        Notification.objects.filter(title="Direct").update(created_at=timezone.now() - timedelta(days=2))
+        before = (timezone.now() - timedelta(days=1)).isoformat()
+        data = self.execute(f'mutation {{ markNotificationsRead(before: "{before}", projectId: "{self.project.id}") {{ count }} }}')
+        assert data["markNotificationsRead"]["count"] == 1
+        assert self.unread(self.project) == 1
+        assert self.execute(f'{{ unreadNotifications(projectId: "{self.project.id}") }}')["unreadNotifications"] == 1
+
+    def tearDown(self):
+        get_user_model().objects.all().delete()
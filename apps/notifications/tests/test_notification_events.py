@@ -0,0 +1,54 @@
+import pytest
+from datetime import date, timedelta
+
+from apps.notifications.events import process_events
+from apps.notifications.models import Notification, NotificationEvent
+from apps.projects.models import Project
+from apps.tasks.models import Task
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+
+
+@pytest.mark.django_db
+class NotificationEventTestCase(TestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = get_user_model().objects.create_user(username="cleiton", password="securepassword")
+        self.project = Project.objects.create(
+            owner=self.user,
+            name="Sample Project",
+            description="Sample Project Description",
+            status="open",
+            start_date=date.today(),
+            estimated_end_date=date.today() + timedelta(days=30),
+        )
+
+    def test_changes_are_queued_and_processed_in_batch(self):
+        task = Task.objects.create(title="Task", due_date="2030-01-01T10:00:00Z", project=self.project)
+        for index in range(3):
+            task.title = f"Task {index}"
+            task.save()
+        assert NotificationEvent.objects.count() == 4, "Each change should only enqueue an event"
+        assert not Notification.objects.exists(), "Notifications are created by the worker"
+
+        with self.assertNumQueries(9):  # lock dos eventos, existência das tasks e projetos, INSERT, índice de busca, contador, DELETE e o savepoint
+            assert process_events() == 4
+        assert list(Notification.objects.order_by("pk").values_list("title", "task_id")) == [
+            ("Task created", task.pk),
+            ("Task updated", task.pk),
+        ], "Repeated updates of the same task should be coalesced"
+        assert not NotificationEvent.objects.exists()
+
+    def test_deleted_objects(self):
+        task = Task.objects.create(title="Short lived", due_date="2030-01-01T10:00:00Z", project=self.project)
+        task.delete()
+        call_command("process_notification_events", once=True, stdout=open("/dev/null", "w"))
+
+        notification = Notification.objects.get()
+        assert notification.title == "Task deleted" and notification.project_id == self.project.pk
+        assert "Short lived" in notification.message
+
+    def tearDown(self):
+        get_user_model().objects.all().delete()
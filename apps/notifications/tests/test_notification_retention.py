@@ -0,0 +1,78 @@
+import pytest
+from io import StringIO
+from datetime import date, timedelta
+
+from ag_backend.schema import schema
+from apps.notifications.models import ArchivedNotification, Notification
+from apps.notifications.retention import archive_notifications
+from apps.projects.models import Project, ProjectStats
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+from graphene.test import Client as GraphQLClient
+
+
+@pytest.mark.django_db
+class NotificationRetentionTestCase(TestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = get_user_model().objects.create_user(username="cleiton", password="securepassword")
+        self.project = Project.objects.create(
+            owner=self.user,
+            name="Sample Project",
+            description="Sample Project Description",
+            status="open",
+            start_date=date.today(),
+            estimated_end_date=date.today() + timedelta(days=30),
+        )
+        now = timezone.now()
+        for index in range(5):  # lidas há 100 dias, mais antigas primeiro
+            Notification.objects.create(title=f"Old {index}", message="Message", project=self.project, read=True, read_at=now - timedelta(days=100))
+        Notification.objects.create(title="Recent", message="Message", project=self.project, read=True, read_at=now - timedelta(days=1))
+        Notification.objects.create(title="Unread", message="Message", project=self.project)
+        self.graphql_client = GraphQLClient(schema)
+
+    def test_old_read_notifications_are_archived_in_batches(self):
+        old = dict(Notification.objects.filter(title__startswith="Old").values_list("pk", "created_at"))
+
+        assert archive_notifications(days=90, batch_size=2, max_batches=1) == 2
+        assert archive_notifications(days=90, batch_size=2) == 3
+        assert archive_notifications(days=90, batch_size=2) == 0
+
+        assert set(Notification.objects.values_list("title", flat=True)) == {"Recent", "Unread"}
+        assert dict(ArchivedNotification.objects.values_list("pk", "created_at")) == old, "Archived rows keep their id and columns"
+        assert ProjectStats.objects.get(project=self.project).notifications_unread == 1
+
+    def test_command_uses_the_retention_setting(self):
+        with self.settings(NOTIFICATION_RETENTION={"ARCHIVE_AFTER_DAYS": 0, "BATCH_SIZE": 10}):
+            call_command("archive_notifications", stdout=StringIO())
+        assert list(Notification.objects.values_list("title", flat=True)) == ["Unread"]
+
+    def test_all_notifications_only_includes_archived_rows_when_asked(self):
+        archive_notifications(days=90)
+        query = """
+            query ($after: String, $includeArchived: Boolean) {
+                allNotifications(first: 3, after: $after, includeArchived: $includeArchived) {
+                    edges { node { title project { name } } }
+                    pageInfo { hasNextPage endCursor }
+                }
+            }
+        """
+
+        data = self.graphql_client.execute(query, context_value={"user": self.user})["data"]
+        assert [edge["node"]["title"] for edge in data["allNotifications"]["edges"]] == ["Unread", "Recent"]
+
+        titles = []
+        after = None
+        while True:
+            response = self.graphql_client.execute(query, variables={"after": after, "includeArchived": True}, context_value={"user": self.user})
+            connection = response["data"]["allNotifications"]
+            titles += [edge["node"]["title"] for edge in connection["edges"]]
+            assert all(edge["node"]["project"]["name"] == "Sample Project" for edge in connection["edges"])
+            if not connection["pageInfo"]["hasNextPage"]:
+                break
+            after = connection["pageInfo"]["endCursor"]
+
+        assert titles == ["Unread", "Recent", "Old 4", "Old 3", "Old 2", "Old 1", "Old 0"]
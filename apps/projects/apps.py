@@ -0,0 +1,8 @@
+from django.apps import AppConfig
+
+
+class ProjectsConfig(AppConfig):
+    name = "apps.projects"
+
+    def ready(self):
+        from . import stats  # noqa: F401  conectar os receivers do rollup
@@ -0,0 +1,207 @@
+import csv
+import hashlib
+import json
+from collections import Counter
+
+from django.contrib.auth import get_user_model
+from django.db import models, transaction
+from django.db.models import Q
+
+from ag_backend.bulk import clean_instance
+from ag_backend.permissions import invalidate_owned_projects
+from apps.activities.models import Activity
+from apps.notifications.events import enqueue_events
+from apps.search.index import index_objects
+from apps.tasks.models import Task
+
+from .models import ImportCheckpoint, ImportKey, Project
+from .stats import record_saved
+
+# colunas aceitas por tipo de linha: usernames em USER_FIELDS, chaves de linhas anteriores do arquivo em KEY_FIELDS
+COLUMNS = {
+    "project": ["key", "owner", "name", "description", "status", "start_date", "estimated_end_date"],
+    "activity": ["key", "project", "created_by", "name", "description", "priority", "status", "expected_completion_date"],
+    "task": ["project", "activity", "title", "description", "due_date", "completed"],
+}
+MODELS = {"project": Project, "activity": Activity, "task": Task}
+USER_FIELDS = {"owner", "created_by"}
+KEY_FIELDS = {"project", "activity"}
+TRUE_VALUES = {"1", "true", "t", "yes", "sim"}
+
+
+def file_digest(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def read_rows(path, fmt):
+    """
+    Streams ``(line, row)`` from a CSV file with a header or from an NDJSON file. ``row`` is the exception when the
+    line cannot be decoded, so one bad line is rejected instead of aborting the import.
+    """
+
+    with open(path, newline="", encoding="utf-8") as f:
+        if fmt == "csv":
+            reader = csv.DictReader(f)
+            for row in reader:
+                yield reader.line_num, row
+            return
+
+        for line, text in enumerate(f, start=1):
+            if not text.strip():
+                continue
+            try:
+                row = json.loads(text)
+                if not isinstance(row, dict):
+                    raise ValueError("Each line must be a JSON object.")
+            except ValueError as e:
+                row = e
+            yield line, row
+
+
+class ProjectImporter:
+    """
+    Imports projects, activities and tasks in chunks. Each chunk is validated in memory, inserted with one
+    ``bulk_create`` per model and committed together with its ``ImportCheckpoint``, so a restart skips exactly the
+    committed rows. Rows reference owners by username (resolved once per username) and the projects and activities
+    of earlier rows by their ``key`` column, stored as ``ImportKey`` rows: each chunk reads the keys it references
+    and inserts the keys it creates, so the cost of a chunk does not grow with the rows already imported.
+    ``bulk_create`` sends no signals: the ``ProjectStats`` rollup and the notification events are updated here, like
+    in the bulk mutations.
+    """
+
+    def __init__(self, checkpoint, notify=True):
+        self.checkpoint = checkpoint
+        self.keys = {"project": {}, "activity": {}}  # chaves do chunk atual: carregadas e criadas
+        self.notify = notify
+        self.users = {}  # username -> id, None quando não existe
+        self.created = Counter()
+        self.rejected = []
+
+    @classmethod
+    def for_file(cls, path, restart=False, notify=True):
+        digest = file_digest(path)
+        if restart:
+            ImportCheckpoint.objects.filter(digest=digest).delete()
+        checkpoint, _created = ImportCheckpoint.objects.get_or_create(digest=digest, defaults={"source": str(path)[-255:]})
+        return cls(checkpoint, notify=notify)
+
+    def resolve_users(self, rows):
+        usernames = {row.get(name) for _line, row in rows if isinstance(row, dict) for name in USER_FIELDS if row.get(name)}
+        missing = {str(username) for username in usernames} - set(self.users)
+        if missing:
+            self.users.update(dict.fromkeys(missing))
+            self.users.update(get_user_model().objects.filter(username__in=missing).values_list("username", "pk"))
+
+    def load_keys(self, by_kind):
+        # chaves citadas pelas linhas do chunk (colunas key, project e activity), uma consulta por chunk
+        wanted = {kind: set() for kind in self.keys}
+        for kind, kind_rows in by_kind.items():
+            for _line, row in kind_rows:
+                if kind in wanted and row.get("key") not in (None, ""):
+                    wanted[kind].add(str(row["key"]))
+                for name in KEY_FIELDS:
+                    if row.get(name) not in (None, ""):
+                        wanted[name].add(str(row[name]))
+
+        self.keys = {kind: {} for kind in self.keys}
+        condition = Q()
+        for kind, keys in wanted.items():
+            if keys:
+                condition |= Q(kind=kind, key__in=keys)
+        if condition:
+            for kind, key, object_id in ImportKey.objects.filter(condition, checkpoint=self.checkpoint).values_list("kind", "key", "object_id"):
+                self.keys[kind][key] = object_id
+
+    def build(self, kind, row, seen_keys):
+        """
+        Returns ``(instance, None)`` for a valid row or ``(None, error)``.
+        """
+
+        model = MODELS[kind]
+        # o cabeçalho do CSV é comum aos três tipos, apenas colunas preenchidas contam
+        unknown = {name for name, value in row.items() if value not in (None, "")} - set(COLUMNS[kind]) - {"type"}
+        if unknown:
+            return None, f"Unknown columns: {', '.join(sorted(unknown))}."
+
+        key = row.get("key")
+        if key not in (None, ""):
+            key = str(key)
+            if key in self.keys[kind] or key in seen_keys:
+                return None, f'Duplicate {kind} key "{key}".'
+
+        values = {}
+        for name in COLUMNS[kind]:
+            value = row.get(name)
+            if name == "key" or value in (None, ""):  # células vazias do CSV
+                continue
+
+            if name in USER_FIELDS:
+                if self.users.get(str(value)) is None:
+                    return None, f'User "{value}" not found.'
+                values[f"{name}_id"] = self.users[str(value)]
+            elif name in KEY_FIELDS:
+                if str(value) not in self.keys[name]:
+                    return None, f'Unknown {name} key "{value}".'
+                values[f"{name}_id"] = self.keys[name][str(value)]
+            else:
+                if isinstance(model._meta.get_field(name), models.BooleanField) and isinstance(value, str):
+                    value = value.strip().lower() in TRUE_VALUES
+                values[name] = value
+
+        instance = model(**values)
+        # FKs já resolvidas acima, ausentes são apontadas pelo full_clean
+        error = clean_instance(instance, exclude=[name for name in USER_FIELDS | KEY_FIELDS if f"{name}_id" in values])
+        return (None, error) if error else (instance, None)
+
+    def import_chunk(self, rows):
+        """
+        Imports ``rows`` (``(line, row)`` pairs) in one transaction and returns the number of rows consumed.
+        """
+
+        self.resolve_users(rows)
+        by_kind = {kind: [] for kind in MODELS}
+        for line, row in rows:
+            if isinstance(row, Exception):
+                self.rejected.append((line, f"Invalid line: {row}"))
+            elif row.get("type") not in MODELS:
+                self.rejected.append((line, f"Unknown row type {row.get('type')!r}."))
+            else:
+                by_kind[row["type"]].append((line, row))
+
+        self.load_keys(by_kind)
+        new_keys = []
+        with transaction.atomic():
+            # projetos antes das atividades e atividades antes das tarefas, para resolver as chaves do mesmo chunk
+            for kind, kind_rows in by_kind.items():
+                valid, seen_keys = [], set()
+                for line, row in kind_rows:
+                    instance, error = self.build(kind, row, seen_keys)
+                    if error:
+                        self.rejected.append((line, error))
+                        continue
+                    valid.append((row.get("key"), instance))
+                    if row.get("key") not in (None, ""):
+                        seen_keys.add(str(row["key"]))
+
+                created = MODELS[kind].objects.bulk_create([instance for _key, instance in valid])
+                for key, instance in valid:
+                    if key not in (None, ""):
+                        self.keys[kind][str(key)] = instance.pk
+                        new_keys.append(ImportKey(checkpoint=self.checkpoint, kind=kind, key=str(key), object_id=instance.pk))
+                index_objects(MODELS[kind], created)  # bulk_create não dispara post_save
+                if kind == "project":
+                    invalidate_owned_projects(*{project.owner_id for project in created})
+                if kind != "project" and created:
+                    record_saved(MODELS[kind], created, created=True)
+                    if self.notify:
+                        enqueue_events("created", created)
+                self.created[kind] += len(created)
+
+            ImportKey.objects.bulk_create(new_keys)  # apenas as chaves deste chunk
+            self.checkpoint.rows_done += len(rows)
+            self.checkpoint.save(update_fields=["rows_done", "updated_at"])
+        return len(rows)
@@ -0,0 +1,71 @@
+import re
+from itertools import combinations
+
+from django.apps import apps
+from django.core.management.base import BaseCommand
+from graphene_django.registry import get_global_registry
+
+import ag_backend.schema  # noqa: F401  registra os DjangoObjectTypes do schema
+
+
+def uses_sequential_scan(plan, table):
+    """
+    Checks an ``EXPLAIN`` output for a full scan of ``table`` (``Seq Scan`` on PostgreSQL, ``SCAN`` without an index
+    on SQLite).
+    """
+
+    postgres = re.compile(rf"Seq Scan on {re.escape(table)}\b")
+    sqlite = re.compile(rf"\bSCAN (TABLE )?{re.escape(table)}\b(?!.*\bUSING\b)")
+    return any(postgres.search(line) or sqlite.search(line) for line in plan.splitlines())
+
+
+class Command(BaseCommand):
+    help = (
+        "Runs EXPLAIN for the combinations of filter_fields declared by every GraphQL type, using values sampled from "
+        "the database, and reports the ones that still scan the whole table. PostgreSQL prefers sequential scans on "
+        "small tables, so run it against a database with representative data."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--max-fields", type=int, default=2, help="Largest number of filters combined in one query.")
+        parser.add_argument("--type", action="append", dest="types", help="Only check the given GraphQL type (repeatable).")
+        parser.add_argument("--all", action="store_true", help="Also list the combinations that use an index.")
+
+    def handle(self, *args, **options):
+        registry = get_global_registry()
+        checked = sequential = 0
+
+        for model in apps.get_models():
+            object_type = registry.get_type_for_model(model)
+            if object_type is None or not object_type._meta.filter_fields:
+                continue
+            if options["types"] and object_type.__name__ not in options["types"]:
+                continue
+
+            sample = model._default_manager.order_by("-pk").first()
+            if sample is None:
+                self.stdout.write(self.style.WARNING(f"{object_type.__name__}: no rows to sample values from, skipped."))
+                continue
+
+            fields = [model._meta.get_field(name) for name in object_type._meta.filter_fields]
+            for size in range(1, options["max_fields"] + 1):
+                for combination in combinations(fields, size):
+                    lookups = {}
+                    for field in combination:
+                        value = getattr(sample, field.attname)
+                        if value is None:
+                            lookups[f"{field.attname}__isnull"] = True
+                        else:
+                            lookups[field.attname] = value
+
+                    plan = model._default_manager.filter(**lookups).explain()
+                    names = ", ".join(field.attname for field in combination)
+                    checked += 1
+
+                    if uses_sequential_scan(plan, model._meta.db_table):
+                        sequential += 1
+                        self.stdout.write(self.style.WARNING(f"SEQ SCAN  {object_type.__name__}({names})"))
+                    elif options["all"]:
+                        self.stdout.write(f"index     {object_type.__name__}({names})")
+
+        self.stdout.write(self.style.SUCCESS(f"{checked} filter combinations checked, {sequential} still scan the whole table."))
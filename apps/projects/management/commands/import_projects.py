@@ -0,0 +1,51 @@
+import time
+from itertools import islice
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.projects.importer import ProjectImporter, read_rows
+
+
+class Command(BaseCommand):
+    help = (
+        "Imports projects, activities and tasks from a CSV or NDJSON file. Every row has a type column (project, "
+        "activity or task); owners are referenced by username and projects/activities of earlier rows by their key "
+        "column. Rows are validated and inserted in chunks, one transaction per chunk; running the command again on "
+        "the same file resumes after the last committed chunk."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="CSV (with header) or NDJSON file.")
+        parser.add_argument("--format", choices=["csv", "ndjson"], help="Input format (default: from the file extension).")
+        parser.add_argument("--chunk-size", type=int, default=1000, help="Rows validated and committed per transaction.")
+        parser.add_argument("--restart", action="store_true", help="Ignore the checkpoint of a previous run of this file.")
+        parser.add_argument("--skip-notifications", action="store_true", help="Do not queue notification events for the imported rows.")
+
+    def handle(self, *args, **options):
+        path = Path(options["path"])
+        if not path.is_file():
+            raise CommandError(f"File not found: {path}")
+        fmt = options["format"] or ("csv" if path.suffix.lower() == ".csv" else "ndjson")
+
+        importer = ProjectImporter.for_file(path, restart=options["restart"], notify=not options["skip_notifications"])
+        skipped = importer.checkpoint.rows_done
+        if skipped:
+            self.stdout.write(f"Resuming after row {skipped} (checkpoint of a previous run).")
+
+        rows = islice(read_rows(path, fmt), skipped, None)  # linhas já gravadas são apenas lidas
+        started = time.perf_counter()
+        imported = 0
+        while chunk := list(islice(rows, options["chunk_size"])):
+            imported += importer.import_chunk(chunk)
+            elapsed = time.perf_counter() - started
+            self.stdout.write(f"{skipped + imported} rows committed ({imported / elapsed:.0f} rows/s)")
+
+        for line, error in importer.rejected:
+            self.stderr.write(self.style.WARNING(f"line {line}: {error}"))
+
+        elapsed = time.perf_counter() - started
+        created = ", ".join(f"{importer.created[kind]} {kind}(s)" for kind in ("project", "activity", "task"))
+        self.stdout.write(
+            self.style.SUCCESS(f"Imported {created} from {imported} rows in {elapsed:.1f}s ({imported / max(elapsed, 1e-9):.0f} rows/s), {len(importer.rejected)} rejected.")
+        )
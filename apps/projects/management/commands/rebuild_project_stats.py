@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from apps.projects.models import Project
+from apps.projects.stats import rebuild_project_stats
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuilds the ProjectStats rollup from the task, activity, document and report tables. Run it after the "
+        "migration that creates the table, after loading fixtures and whenever the counters drift."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--project", type=int, action="append", dest="projects", help="Only rebuild the given project id (repeatable).")
+        parser.add_argument("--batch-size", type=int, default=1000, help="Projects recomputed per transaction.")
+
+    def handle(self, *args, **options):
+        project_ids = options["projects"] or list(Project.objects.order_by("pk").values_list("pk", flat=True))
+        rebuilt = 0
+
+        for start in range(0, len(project_ids), options["batch_size"]):
+            with transaction.atomic():  # lotes curtos, sem travar as tabelas durante todo o rebuild
+                rebuilt += rebuild_project_stats(project_ids[start : start + options["batch_size"]])
+
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt the stats of {rebuilt} project(s)."))
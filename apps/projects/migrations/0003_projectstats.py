@@ -0,0 +1,39 @@
+# Generated by Django 5.0.8 on 2026-10-18 12:00
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("projects", "0002_project_projects_owner_status_idx_and_more"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ProjectStats",
+            fields=[
+                (
+                    "project",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="stats",
+                        serialize=False,
+                        to="projects.project",
+                    ),
+                ),
+                ("tasks_total", models.IntegerField(default=0)),
+                ("tasks_completed", models.IntegerField(default=0)),
+                ("activities_pending", models.IntegerField(default=0)),
+                ("activities_in_progress", models.IntegerField(default=0)),
+                ("activities_completed", models.IntegerField(default=0)),
+                ("activities_requires_attention", models.IntegerField(default=0)),
+                ("activities_blocked", models.IntegerField(default=0)),
+                ("documents_total", models.IntegerField(default=0)),
+                ("reports_total", models.IntegerField(default=0)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
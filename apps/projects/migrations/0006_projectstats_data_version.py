@@ -0,0 +1,18 @@
+# Generated by Django 5.0.8 on 2026-10-18 12:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("projects", "0005_importcheckpoint"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="projectstats",
+            name="data_version",
+            field=models.PositiveBigIntegerField(default=0),
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.0.8 on 2026-10-18 12:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("projects", "0006_projectstats_data_version"),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name="projectstats",
+            name="data_version",
+        ),
+        migrations.AddField(
+            model_name="projectstats",
+            name="tasks_version",
+            field=models.PositiveBigIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="projectstats",
+            name="activities_version",
+            field=models.PositiveBigIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="projectstats",
+            name="documents_version",
+            field=models.PositiveBigIntegerField(default=0),
+        ),
+    ]
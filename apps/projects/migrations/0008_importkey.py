@@ -0,0 +1,50 @@
+# Generated by Django 5.0.8 on 2026-10-18 12:00
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def move_keys(apps, schema_editor):
+    # chaves dos checkpoints existentes, do JSONField para a tabela
+    ImportCheckpoint = apps.get_model("projects", "ImportCheckpoint")
+    ImportKey = apps.get_model("projects", "ImportKey")
+    for checkpoint in ImportCheckpoint.objects.exclude(keys={}).iterator():
+        ImportKey.objects.bulk_create(
+            [
+                ImportKey(checkpoint=checkpoint, kind=kind, key=key, object_id=object_id)
+                for kind, keys in checkpoint.keys.items()
+                for key, object_id in keys.items()
+            ],
+            batch_size=1000,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("projects", "0007_projectstats_section_versions"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ImportKey",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("kind", models.CharField(choices=[("project", "Project"), ("activity", "Activity")], max_length=10)),
+                ("key", models.CharField(max_length=255)),
+                ("object_id", models.BigIntegerField()),
+                (
+                    "checkpoint",
+                    models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name="import_keys", to="projects.importcheckpoint"),
+                ),
+            ],
+            options={
+                "constraints": [models.UniqueConstraint(fields=("checkpoint", "kind", "key"), name="import_key_unique")],
+            },
+        ),
+        migrations.RunPython(move_keys, migrations.RunPython.noop),
+        migrations.RemoveField(
+            model_name="importcheckpoint",
+            name="keys",
+        ),
+    ]
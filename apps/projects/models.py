@@ -23,5 +23,76 @@ class Project(models.Model):
     start_date = models.DateField()
     estimated_end_date = models.DateField()
 
+    class Meta:
+        indexes = [
+            models.Index(fields=["owner", "status"], name="projects_owner_status_idx"),
+            models.Index(fields=["status", "estimated_end_date"], name="projects_status_end_idx"),
+            models.Index(fields=["name"], name="projects_name_idx"),
+        ]
+
     def __str__(self):
         return self.name
+
+
+class ProjectStats(models.Model):
+    """
+    Rollup of the counters shown by the project dashboards, one row per project. The row is kept up to date
+    incrementally by ``apps.projects.stats`` whenever a task, activity, document, report or notification is saved
+    or deleted, and can be rebuilt from the source tables with the ``rebuild_project_stats`` command.
+    """
+
+    project = models.OneToOneField(Project, on_delete=models.CASCADE, primary_key=True, related_name="stats")
+    tasks_total = models.IntegerField(default=0)
+    tasks_completed = models.IntegerField(default=0)
+    activities_pending = models.IntegerField(default=0)
+    activities_in_progress = models.IntegerField(default=0)
+    activities_completed = models.IntegerField(default=0)
+    activities_requires_attention = models.IntegerField(default=0)
+    activities_blocked = models.IntegerField(default=0)
+    documents_total = models.IntegerField(default=0)
+    reports_total = models.IntegerField(default=0)
+    notifications_unread = models.IntegerField(default=0)
+    # incrementados a cada alteração de tarefas, atividades e documentos, marcas d'água das seções dos relatórios
+    tasks_version = models.PositiveBigIntegerField(default=0)
+    activities_version = models.PositiveBigIntegerField(default=0)
+    documents_version = models.PositiveBigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Stats of project {self.project_id}"
+
+
+class ImportCheckpoint(models.Model):
+    """
+    Progress of an ``import_projects`` run over one input file, identified by the SHA-256 of its content. Updated in
+    the transaction of every chunk, so an interrupted import resumes after the last committed chunk with the keys of
+    the projects and activities already created (``ImportKey``).
+    """
+
+    digest = models.CharField(max_length=64, unique=True)
+    source = models.CharField(max_length=255)
+    rows_done = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.source} ({self.rows_done} rows)"
+
+
+class ImportKey(models.Model):
+    """
+    Id of the project or activity created for the ``key`` column of an imported row. One row per key, inserted with
+    the chunk that created it, so each chunk writes only its own keys and reads only the keys its rows reference.
+    """
+
+    KIND_CHOICES = [("project", "Project"), ("activity", "Activity")]
+
+    checkpoint = models.ForeignKey(ImportCheckpoint, on_delete=models.CASCADE, related_name="import_keys")
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    key = models.CharField(max_length=255)
+    object_id = models.BigIntegerField()
+
+    class Meta:
+        constraints = [models.UniqueConstraint(fields=["checkpoint", "kind", "key"], name="import_key_unique")]
+
+    def __str__(self):
+        return f"{self.kind} {self.key} -> {self.object_id}"
@@ -1,19 +1,71 @@
 import graphene
-from .models import Project
+from .models import Project, ProjectStats
+from apps.tasks.models import Task
 from apps.accounts.models import DefaultAccount
 
+from ag_backend.context import get_request_scoped
+from ag_backend.fields import FilterConnectionField
+from ag_backend.loaders import get_loaders
+from ag_backend.permissions import get_permissions
+
 from django.db import transaction
+from django.db.models import Count
+from django.utils import timezone
 from django.core.exceptions import ObjectDoesNotExist, ValidationError
+from graphene_django import bypass_get_queryset
 from graphene_django.types import DjangoObjectType
 
 
+class ProjectStatsType(DjangoObjectType):
+    progress = graphene.Float(description="Fraction of the tasks already completed, from 0 to 1.")
+    tasks_overdue = graphene.Int(description="Open tasks past their due date.")
+
+    class Meta:
+        model = ProjectStats
+        exclude = ["project"]  # acessado a partir do próprio projeto
+
+    def resolve_progress(self, info):
+        return self.tasks_completed / self.tasks_total if self.tasks_total else 0.0
+
+    def resolve_tasks_overdue(self, info):
+        # depende da hora da consulta, não cabe no rollup: contar pelo índice parcial de tasks abertas, em lote
+        overdue = get_request_scoped(info.context, "project_overdue_tasks", dict)
+        if self.project_id not in overdue:
+            project_ids = {self.project_id} | set(get_loaders(info).seen(Project))
+            counts = Task.objects.filter(project_id__in=project_ids, completed=False, due_date__lt=timezone.now()).values("project_id")
+            counts = dict(counts.annotate(total=Count("pk")).values_list("project_id", "total").order_by())
+            overdue.update((pk, counts.get(pk, 0)) for pk in project_ids)
+        return overdue[self.project_id]
+
+
 class ProjectType(DjangoObjectType):
+    stats = graphene.Field(ProjectStatsType, required=True)
+    # relações reversas resolvidas em lote pelos loaders da requisição
+    tasks = FilterConnectionField("apps.tasks.schema.TaskType", required=True)
+    activities = FilterConnectionField("apps.activities.schema.ActivityType", required=True)
+    documents = FilterConnectionField("apps.documents.schema.DocumentType", required=True)
+    reports = FilterConnectionField("apps.reports.schema.ReportType", required=True)
+    notifications = FilterConnectionField("apps.notifications.schema.NotificationType", required=True)
+
     class Meta:
         model = Project
         interfaces = (graphene.relay.Node,)
         filter_fields = ["owner", "name", "description", "status", "start_date", "estimated_end_date"]
         fields = "__all__"  # sem campos sensíveis, utilizar todos
 
+    @classmethod
+    def get_queryset(cls, queryset, info):
+        return get_permissions(info).filter(queryset, "pk")  # projetos do próprio usuário, todos para su/staff
+
+    @bypass_get_queryset
+    def resolve_owner(self, info):
+        return get_loaders(info).load(self, "owner")
+
+    @bypass_get_queryset
+    def resolve_stats(self, info):
+        # sem linha = nenhuma task/atividade/documento/relatório ainda
+        return get_loaders(info).load(self, "stats") or ProjectStats(project_id=self.pk)
+
 
 class CreateProject(graphene.Mutation):
     class Arguments:
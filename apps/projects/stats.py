@@ -0,0 +1,214 @@
+from collections import Counter, defaultdict
+
+from django.db.models import Count, F, Q
+from django.db.models.functions import Coalesce
+from django.db.models.signals import post_delete, post_init, post_save, pre_save
+from django.utils import timezone
+
+from apps.activities.models import Activity
+from apps.documents.models import Document
+from apps.notifications.models import Notification
+from apps.reports.models import Report
+from apps.tasks.models import Task
+
+from .models import Project, ProjectStats
+
+# campos de cada modelo que alteram os contadores do projeto
+TRACKED_FIELDS = {
+    Task: ("project_id", "completed"),
+    Activity: ("project_id", "status"),
+    Document: ("project_id",),
+    Report: ("project_id",),
+    Notification: ("project_id", "task_id", "activity_id", "report_id", "document_id", "read"),
+}
+# entidades que podem ser donas de uma notificação além do projeto
+NOTIFICATION_LINKS = {"task_id": Task, "activity_id": Activity, "report_id": Report, "document_id": Document}
+ACTIVITY_COUNTERS = {status: f"activities_{status}" for status, _label in Activity.STATUS_CHOICES}
+COUNTER_FIELDS = [
+    "tasks_total",
+    "tasks_completed",
+    *ACTIVITY_COUNTERS.values(),
+    "documents_total",
+    "reports_total",
+    "notifications_unread",
+]
+# alterações nestes modelos mudam uma seção dos relatórios do projeto, versão correspondente em ProjectStats
+VERSION_FIELDS = {Task: "tasks_version", Activity: "activities_version", Document: "documents_version"}
+
+
+def owner_project():
+    """
+    Project of a notification: its own ``project`` or the project of the task, activity, report or document.
+    """
+
+    return Coalesce("project_id", *(f"{attname[:-3]}__project_id" for attname in NOTIFICATION_LINKS))
+
+
+def get_counters(model, state):
+    """
+    Returns the ``ProjectStats`` counters one row of ``model`` with the given field values contributes to.
+    """
+
+    if model is Task:
+        return Counter(tasks_total=1, tasks_completed=int(bool(state.get("completed"))))
+    if model is Activity:
+        return Counter({ACTIVITY_COUNTERS[state["status"]]: 1}) if state.get("status") in ACTIVITY_COUNTERS else Counter()
+    if model is Document:
+        return Counter(documents_total=1)
+    if model is Notification:
+        return Counter(notifications_unread=int(not state.get("read")))
+    return Counter(reports_total=1)
+
+
+def get_project_ids(model, states):
+    """
+    Returns the project of each state in ``states``. Notifications linked to another entity are resolved with one
+    query per linked model.
+    """
+
+    if model is not Notification:
+        return [state.get("project_id") for state in states]
+
+    wanted = defaultdict(set)
+    for state in states:
+        if not state.get("project_id"):
+            for attname in NOTIFICATION_LINKS:
+                if state.get(attname):
+                    wanted[attname].add(state[attname])
+    projects = {
+        (attname, pk): project_id
+        for attname, pks in wanted.items()
+        for pk, project_id in NOTIFICATION_LINKS[attname].objects.filter(pk__in=pks).values_list("pk", "project_id")
+    }
+
+    def project_of(state):
+        if state.get("project_id"):
+            return state["project_id"]
+        return next((projects.get((attname, state[attname])) for attname in NOTIFICATION_LINKS if state.get(attname)), None)
+
+    return [project_of(state) for state in states]
+
+
+def get_state(instance):
+    return {attname: instance.__dict__[attname] for attname in TRACKED_FIELDS[type(instance)] if attname in instance.__dict__}
+
+
+def remember_state(sender, instance, **kwargs):
+    # valores carregados do banco, para calcular a diferença no próximo save
+    instance._stats_state = get_state(instance)
+
+
+def complete_state(sender, instance, raw=False, **kwargs):
+    # campos adiados (.only()) ainda não conhecidos, buscar antes que o save os altere
+    missing = [attname for attname in TRACKED_FIELDS[sender] if attname not in getattr(instance, "_stats_state", {})]
+    if missing and instance.pk is not None and not instance._state.adding and not raw:
+        instance._stats_state.update(sender._default_manager.filter(pk=instance.pk).values(*missing).first() or {})
+
+
+def apply_deltas(deltas, create_missing):
+    """
+    Adds ``{project_id: Counter}`` deltas to the ``ProjectStats`` rows with one ``UPDATE ... SET x = x + n`` per
+    project. Used directly by code that already knows the projects of a batch (e.g. the notification worker).
+    """
+
+    now = timezone.now()
+    for project_id, delta in deltas.items():
+        if project_id is None:  # notificação de um objeto já removido
+            continue
+        changes = {name: F(name) + value for name, value in delta.items() if value}
+        if not changes:
+            continue
+        updated = ProjectStats.objects.filter(project_id=project_id).update(updated_at=now, **changes)
+        if not updated and create_missing:  # primeira alteração do projeto, calcular a linha a partir das tabelas
+            rebuild_project_stats([project_id])
+
+
+def record_saved(model, instances, created=False):
+    """
+    Updates the rollup for ``instances`` of ``model`` that were just inserted (``created``) or updated. Called by
+    the ``post_save`` receiver and by the bulk mutations, since ``bulk_create``/``bulk_update`` send no signals.
+    """
+
+    changes = []
+    deltas = defaultdict(Counter)
+    for instance in instances:
+        old = None if created else getattr(instance, "_stats_state", None)
+        new = {**(old or {}), **get_state(instance)}
+        if model in VERSION_FIELDS:  # qualquer alteração, mesmo sem mudar contadores
+            for project_id in {(old or {}).get("project_id"), new.get("project_id")} - {None}:
+                deltas[project_id][VERSION_FIELDS[model]] += 1
+        if old != new:
+            changes.append((old, new))
+            instance._stats_state = new
+
+    # projetos resolvidos em lote, na mesma ordem (old, new) das alterações
+    project_ids = iter(get_project_ids(model, [state for change in changes for state in change if state is not None]))
+    for old, new in changes:
+        if old is not None:
+            deltas[next(project_ids)].subtract(get_counters(model, old))
+        deltas[next(project_ids)].update(get_counters(model, new))
+    apply_deltas(deltas, create_missing=True)
+
+
+def record_deleted(model, instances):
+    states = [{**get_state(instance), **getattr(instance, "_stats_state", {})} for instance in instances]
+    deltas = defaultdict(Counter)
+    for state, project_id in zip(states, get_project_ids(model, states)):
+        deltas[project_id].subtract(get_counters(model, state))
+        if model in VERSION_FIELDS:
+            deltas[project_id][VERSION_FIELDS[model]] += 1
+    # sem recriar linhas: na exclusão em cascata do projeto a linha já foi removida
+    apply_deltas(deltas, create_missing=False)
+
+
+def rebuild_project_stats(project_ids=None):
+    """
+    Recomputes the ``ProjectStats`` rows of ``project_ids`` (every project when ``None``) from the source tables,
+    with one grouped query per table, and writes them with a single upsert.
+    """
+
+    projects = Project.objects.all() if project_ids is None else Project.objects.filter(pk__in=project_ids)
+    # versões não são recalculadas (ficam fora do update_fields), linhas novas começam em 1 para diferir de "sem linha"
+    versions = {field: 1 for field in VERSION_FIELDS.values()}
+    rows = {pk: ProjectStats(project_id=pk, **versions) for pk in projects.values_list("pk", flat=True)}
+    if not rows:
+        return 0
+
+    tasks = Task.objects.filter(project_id__in=rows).values("project_id").annotate(total=Count("pk"), completed=Count("pk", filter=Q(completed=True)))
+    for row in tasks.order_by():
+        rows[row["project_id"]].tasks_total = row["total"]
+        rows[row["project_id"]].tasks_completed = row["completed"]
+
+    for row in Activity.objects.filter(project_id__in=rows).values("project_id", "status").annotate(total=Count("pk")).order_by():
+        if row["status"] in ACTIVITY_COUNTERS:
+            setattr(rows[row["project_id"]], ACTIVITY_COUNTERS[row["status"]], row["total"])
+
+    for model, counter in ((Document, "documents_total"), (Report, "reports_total")):
+        for row in model.objects.filter(project_id__in=rows).values("project_id").annotate(total=Count("pk")).order_by():
+            setattr(rows[row["project_id"]], counter, row["total"])
+
+    unread = Notification.objects.filter(read=False).annotate(owner_project=owner_project()).filter(owner_project__in=rows)
+    for row in unread.values("owner_project").annotate(total=Count("pk")).order_by():
+        rows[row["owner_project"]].notifications_unread = row["total"]
+
+    now = timezone.now()
+    for stats in rows.values():
+        stats.updated_at = now
+    ProjectStats.objects.bulk_create(rows.values(), update_conflicts=True, unique_fields=["project"], update_fields=[*COUNTER_FIELDS, "updated_at"])
+    return len(rows)
+
+
+def on_save(sender, instance, created, raw=False, **kwargs):
+    if not raw:  # fixtures são recalculadas pelo rebuild_project_stats
+        record_saved(sender, [instance], created=created)
+
+
+def on_delete(sender, instance, **kwargs):
+    record_deleted(sender, [instance])
+
+
+for model in TRACKED_FIELDS:
+    post_init.connect(remember_state, sender=model, dispatch_uid=f"project_stats_init_{model._meta.label_lower}")
+    pre_save.connect(complete_state, sender=model, dispatch_uid=f"project_stats_pre_save_{model._meta.label_lower}")
+    post_save.connect(on_save, sender=model, dispatch_uid=f"project_stats_save_{model._meta.label_lower}")
+    post_delete.connect(on_delete, sender=model, dispatch_uid=f"project_stats_delete_{model._meta.label_lower}")
@@ -0,0 +1,171 @@
+import pytest
+from datetime import date, timedelta
+
+from ag_backend.schema import schema
+from apps.projects.models import Project
+from apps.activities.models import Activity
+from apps.tasks.models import Task
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from graphene.test import Client as GraphQLClient
+from graphql_relay import offset_to_cursor
+
+
+@pytest.mark.django_db
+class ProjectBatchingGraphQLTestCase(TestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = get_user_model().objects.create_superuser(username="admin", password="safe_password", email="admin@example.com")
+        self.graphql_client = GraphQLClient(schema)
+
+        for index in range(5):
+            owner = get_user_model().objects.create_user(username=f"owner{index}", password="securepassword")
+            project = Project.objects.create(
+                owner=owner,
+                name=f"Project {index}",
+                description="Sample Project Description",
+                status="open",
+                start_date=date.today(),
+                estimated_end_date=date.today() + timedelta(days=30),
+            )
+            for position in range(3):
+                activity = Activity.objects.create(
+                    created_by=owner,
+                    project=project,
+                    name=f"Activity {index}.{position}",
+                    description="Sample Activity",
+                    expected_completion_date=date.today() + timedelta(days=10),
+                )
+                Task.objects.create(
+                    title=f"Task {index}.{position}",
+                    due_date=timezone.now() + timedelta(days=5),
+                    project=project,
+                    activity=activity,
+                )
+
+    def test_nested_relations_are_batched(self):
+        query = """
+        {
+            allProjects {
+                edges {
+                    node {
+                        name
+                        owner { username }
+                        tasks {
+                            edges {
+                                node {
+                                    title
+                                    activity { name createdBy { username } }
+                                }
+                            }
+                        }
+                    }
+                }
+            }
+        }
+        """
+        with CaptureQueriesContext(connection) as queries:
+            response = self.graphql_client.execute(query, context_value={"user": self.user})
+
+        if "errors" in response:
+            print("Errors:", response["errors"])
+
+        projects = response["data"]["allProjects"]["edges"]
+        assert len(projects) == 5, "Should return every project"
+        for project in projects:
+            node = project["node"]
+            index = node["name"].split()[-1]
+            assert node["owner"]["username"] == f"owner{index}", "Owner should match the project"
+            titles = [edge["node"]["title"] for edge in node["tasks"]["edges"]]
+            assert titles == [f"Task {index}.{position}" for position in range(3)], "Tasks should be grouped by project"
+            for edge in node["tasks"]["edges"]:
+                assert edge["node"]["activity"]["createdBy"]["username"] == f"owner{index}", "Activity should be resolved"
+
+        # count + página de projetos com owners (select_related) + tasks com activities e criadores (Prefetch)
+        assert len(queries) == 3, "Relations should be loaded with one query per relation, not per row"
+
+    def test_selection_is_planned_with_fragments(self):
+        query = """
+        fragment TaskFields on TaskType {
+            title
+            activity { name }
+        }
+        {
+            allTasks(first: 2) {
+                edges { node { ...TaskFields } }
+            }
+        }
+        """
+        with CaptureQueriesContext(connection) as queries:
+            response = self.graphql_client.execute(query, context_value={"user": self.user})
+
+        if "errors" in response:
+            print("Errors:", response["errors"])
+
+        edges = response["data"]["allTasks"]["edges"]
+        assert [edge["node"]["activity"]["name"] for edge in edges] == ["Activity 0.0", "Activity 0.1"], "Activity should be resolved"
+        assert len(queries) == 1, "Activity should be joined into the page query"
+
+        page_sql = queries.captured_queries[-1]["sql"]
+        assert "JOIN" in page_sql, "Selected foreign keys should use select_related"
+        assert "description" not in page_sql, "Unselected columns should be deferred"
+
+    def test_filtered_reverse_relation_uses_queryset(self):
+        query = """
+        {
+            allProjects(name: "Project 0") {
+                edges {
+                    node {
+                        tasks(title: "Task 0.1") {
+                            edges { node { title } }
+                        }
+                    }
+                }
+            }
+        }
+        """
+        response = self.graphql_client.execute(query, context_value={"user": self.user})
+        if "errors" in response:
+            print("Errors:", response["errors"])
+
+        edges = response["data"]["allProjects"]["edges"][0]["node"]["tasks"]["edges"]
+        assert [edge["node"]["title"] for edge in edges] == ["Task 0.1"], "Filter arguments should still be applied"
+
+    def test_reverse_relation_pages_are_bounded_per_parent(self):
+        query = """
+        query ($first: Int, $after: String) {
+            allProjects {
+                edges { node { name tasks(first: $first, after: $after) { pageInfo { hasNextPage } edges { node { title } } } } }
+            }
+        }
+        """
+        with CaptureQueriesContext(connection) as queries:
+            response = self.graphql_client.execute(query, variables={"first": 1}, context_value={"user": self.user})
+        for edge in response["data"]["allProjects"]["edges"]:
+            index = edge["node"]["name"].split()[-1]
+            tasks = edge["node"]["tasks"]
+            assert [task["node"]["title"] for task in tasks["edges"]] == [f"Task {index}.0"]
+            assert tasks["pageInfo"]["hasNextPage"] is True
+        # prefetch fatiado: no máximo first + 1 tasks de cada projeto
+        assert "ROW_NUMBER()" in queries.captured_queries[-1]["sql"]
+
+        response = self.graphql_client.execute(query, variables={"first": 1, "after": offset_to_cursor(0)}, context_value={"user": self.user})
+        for edge in response["data"]["allProjects"]["edges"]:
+            index = edge["node"]["name"].split()[-1]
+            assert [task["node"]["title"] for task in edge["node"]["tasks"]["edges"]] == [f"Task {index}.1"]
+
+        # sem prefetch (campo de objeto único), a página vem do loader com o mesmo limite por projeto
+        project = Project.objects.get(name="Project 0")
+        query = "query ($id: ID!) { project(id: $id) { tasks(first: 2) { pageInfo { hasNextPage } edges { node { title } } } } }"
+        with CaptureQueriesContext(connection) as queries:
+            response = self.graphql_client.execute(query, variables={"id": str(project.pk)}, context_value={"user": self.user})
+        tasks = response["data"]["project"]["tasks"]
+        assert [task["node"]["title"] for task in tasks["edges"]] == ["Task 0.0", "Task 0.1"] and tasks["pageInfo"]["hasNextPage"] is True
+        assert any("ROW_NUMBER()" in query["sql"] for query in queries.captured_queries)
+
+    def tearDown(self):
+        get_user_model().objects.all().delete()
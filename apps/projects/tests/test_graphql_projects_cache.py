@@ -0,0 +1,113 @@
+import json
+import pytest
+from datetime import date, timedelta
+
+from ag_backend.cache import object_cache
+from ag_backend.schema import schema
+from apps.notifications.models import Notification
+from apps.projects.models import Project
+from apps.reports.models import Report
+from apps.tasks.models import Task
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from graphene.test import Client as GraphQLClient
+
+
+@pytest.mark.django_db
+class ProjectCacheGraphQLTestCase(TestCase):
+    def setUp(self):
+        super().setUp()
+        object_cache.clear()
+        object_cache.reset_stats()
+        self.user = get_user_model().objects.create_user(username="cleiton", password="securepassword")
+        self.other = get_user_model().objects.create_user(username="other", password="securepassword")
+        self.project = Project.objects.create(
+            owner=self.user,
+            name="Sample Project",
+            description="Sample Project Description",
+            status="open",
+            start_date=date.today(),
+            estimated_end_date=date.today() + timedelta(days=30),
+        )
+        self.graphql_client = GraphQLClient(schema)
+        self.query = f'{{ project(id: "{self.project.id}") {{ name }} }}'
+
+    @override_settings(GRAPHQL_PERMISSIONS={"BACKEND": "default", "TIMEOUT": 300})
+    def test_repeated_reads_are_served_from_cache(self):
+        cache.clear()
+        response = self.graphql_client.execute(self.query, context_value={"user": self.user})
+        assert response["data"]["project"]["name"] == "Sample Project"
+
+        # objeto e projetos do usuário (verificação de acesso) vêm dos caches
+        with self.assertNumQueries(0):
+            response = self.graphql_client.execute(self.query, context_value={"user": self.user})
+        assert response["data"]["project"]["name"] == "Sample Project", "Second read should come from the cache"
+        cache.clear()
+
+        stats = object_cache.stats()
+        assert stats["local_hits"] == 1 and stats["local_misses"] == 1, "Counters should track each tier"
+
+    def test_counters_are_exposed_in_debug_responses(self):
+        self.client.force_login(self.user)
+        payload = json.dumps({"query": self.query})
+        assert "caches" not in self.client.post("/graphql/", payload, content_type="application/json").json()["extensions"]
+
+        with override_settings(DEBUG=True):
+            caches = self.client.post("/graphql/", payload, content_type="application/json").json()["extensions"]["caches"]
+        assert caches["objects"]["local_hits"] == 1 and caches["objects"]["local_misses"] == 1
+
+    def test_save_invalidates_cached_object(self):
+        self.graphql_client.execute(self.query, context_value={"user": self.user})
+
+        self.project.name = "Renamed Project"
+        self.project.save()
+
+        response = self.graphql_client.execute(self.query, context_value={"user": self.user})
+        assert response["data"]["project"]["name"] == "Renamed Project", "post_save should invalidate the entry"
+
+        self.project.delete()
+        response = self.graphql_client.execute(self.query, context_value={"user": self.user})
+        assert response["errors"][0]["message"] == "Projeto não encontrado.", "post_delete should invalidate the entry"
+
+    def test_cached_object_still_checks_ownership(self):
+        self.graphql_client.execute(self.query, context_value={"user": self.user})
+        response = self.graphql_client.execute(self.query, context_value={"user": self.other})
+        assert response["data"]["project"] is None, "Cached objects must not bypass the ownership check"
+
+    def test_report_notification_and_user_check_access(self):
+        report = Report.objects.create(title="Weekly", content="Confidential", project=self.project)
+        task = Task.objects.create(title="Task", due_date="2030-01-01T10:00:00Z", project=self.project)
+        notification = Notification.objects.create(title="Notification", message="Confidential", task=task)
+        query = f"""{{
+            report(id: "{report.id}") {{ content }}
+            notification(id: "{notification.id}") {{ message }}
+            user(id: "{self.user.id}") {{ email }}
+        }}"""
+
+        object_cache.clear()
+        with CaptureQueriesContext(connection) as queries:
+            response = self.graphql_client.execute(query, context_value={"user": self.user})
+        assert "errors" not in response, response
+        assert response["data"]["notification"]["message"] == "Confidential", "Owner of the linked task's project"
+        project_queries = [query["sql"] for query in queries.captured_queries if 'FROM "projects_project"' in query["sql"]]
+        assert len(project_queries) == 1 and '"projects_project"."owner_id" =' in project_queries[0], "Checked by the request permissions"
+
+        staff = get_user_model().objects.create_user(username="staff", password="securepassword", is_staff=True)
+        response = self.graphql_client.execute(query, context_value={"user": staff})
+        assert "errors" not in response, response
+
+        response = self.graphql_client.execute(query, context_value={"user": self.other})
+        assert response["data"]["report"] is None and response["data"]["notification"] is None
+        assert response["data"]["user"]["email"] == ""
+
+        response = self.graphql_client.execute(query, context_value={"user": AnonymousUser()})
+        assert response["data"] == {"report": None, "notification": None, "user": None}
+        assert {error["message"] for error in response["errors"]} == {"Autenticação necessária."}
+
+    def tearDown(self):
+        get_user_model().objects.all().delete()
@@ -0,0 +1,84 @@
+import pytest
+from datetime import date, timedelta
+
+from ag_backend.schema import schema
+from apps.activities.models import Activity
+from apps.projects.models import Project, ProjectStats
+from apps.reports.models import Report
+from apps.tasks.models import Task
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+from graphene.test import Client as GraphQLClient
+
+
+@pytest.mark.django_db
+class ProjectStatsTestCase(TestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = get_user_model().objects.create_user(username="cleiton", password="securepassword")
+        self.project = self.create_project("First Project")
+        self.second_project = self.create_project("Second Project")
+        self.graphql_client = GraphQLClient(schema)
+
+    def create_project(self, name):
+        return Project.objects.create(
+            owner=self.user,
+            name=name,
+            description="Sample Project Description",
+            status="open",
+            start_date=date.today(),
+            estimated_end_date=date.today() + timedelta(days=30),
+        )
+
+    def counters(self, project):
+        stats = ProjectStats.objects.get(project=project)
+        return stats.tasks_total, stats.tasks_completed, stats.activities_pending, stats.activities_completed, stats.reports_total
+
+    def test_rollup_follows_saves_and_deletes(self):
+        now = timezone.now()
+        tasks = [Task.objects.create(title=f"Task {index}", due_date=now + timedelta(days=index - 1), project=self.project) for index in range(3)]
+        activity = Activity.objects.create(
+            created_by=self.user, name="Activity", description="Activity", project=self.project, expected_completion_date=date.today()
+        )
+        Report.objects.create(title="Report", content="Content", project=self.project)
+        assert self.counters(self.project) == (3, 0, 1, 0, 1)
+
+        tasks[0].completed = True
+        tasks[0].save()
+        activity.status = "completed"
+        activity.save()
+        assert self.counters(self.project) == (3, 1, 0, 1, 1)
+
+        moved = Task.objects.only("title").get(pk=tasks[1].pk)  # campos do rollup adiados
+        moved.project = self.second_project
+        moved.save()
+        tasks[2].delete()
+        assert self.counters(self.project) == (1, 1, 0, 1, 1)
+        assert self.counters(self.second_project)[:2] == (1, 0), "Moving a task should update both projects"
+
+        expected = {stats.pk: self.counters(stats.project) for stats in ProjectStats.objects.all()}
+        ProjectStats.objects.all().delete()
+        call_command("rebuild_project_stats", stdout=open("/dev/null", "w"))
+        assert {stats.pk: self.counters(stats.project) for stats in ProjectStats.objects.all()} == expected, "Rebuild should match"
+
+    def test_stats_field(self):
+        now = timezone.now()
+        Task.objects.create(title="Done", due_date=now - timedelta(days=2), completed=True, project=self.project)
+        Task.objects.create(title="Overdue", due_date=now - timedelta(days=1), project=self.project)
+        Task.objects.create(title="Open", due_date=now + timedelta(days=1), project=self.project)
+
+        query = "{ allProjects { edges { node { name stats { tasksTotal tasksCompleted tasksOverdue progress } } } } }"
+        with self.assertNumQueries(3):  # count da connection, projetos com o rollup em JOIN e uma contagem de atrasadas
+            response = self.graphql_client.execute(query, context_value={"user": self.user})
+        if "errors" in response:
+            print("Errors:", response["errors"])
+
+        stats = {edge["node"]["name"]: edge["node"]["stats"] for edge in response["data"]["allProjects"]["edges"]}
+        assert stats["First Project"] == {"tasksTotal": 3, "tasksCompleted": 1, "tasksOverdue": 1, "progress": 1 / 3}
+        assert stats["Second Project"] == {"tasksTotal": 0, "tasksCompleted": 0, "tasksOverdue": 0, "progress": 0.0}
+
+    def tearDown(self):
+        get_user_model().objects.all().delete()
@@ -0,0 +1,106 @@
+import json
+import os
+import pytest
+import tempfile
+from io import StringIO
+from types import SimpleNamespace
+from unittest import mock
+
+from ag_backend.permissions import get_permissions
+
+from apps.activities.models import Activity
+from apps.notifications.models import NotificationEvent
+from apps.projects.importer import ProjectImporter
+from apps.projects.models import ImportCheckpoint, ImportKey, Project, ProjectStats
+from apps.tasks.models import Task
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+
+CSV = """type,key,owner,created_by,project,activity,name,title,description,status,priority,start_date,estimated_end_date,expected_completion_date,due_date,completed
+project,p1,cleiton,,,,Alpha,,Alpha project,open,,2030-01-01,2030-06-01,,,
+project,p2,ninguem,,,,Beta,,Beta project,open,,2030-01-01,2030-06-01,,,
+activity,a1,,cleiton,p1,,Design,,Design phase,pending,high,,,2030-02-01,,
+task,,,,p1,a1,,Wireframes,,,,,,,2030-01-15T10:00:00Z,true
+task,,,,p1,,,Kickoff,,,,,,,2030-01-02T10:00:00Z,false
+task,,,,p2,,,Orphan,,,,,,,2030-01-02T10:00:00Z,false
+task,,,,p1,,,Bad date,,,,,,,amanhã,false
+"""
+
+
+@pytest.mark.django_db
+class ImportProjectsTestCase(TestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = get_user_model().objects.create_user(username="cleiton", password="securepassword")
+
+    def write(self, content, suffix):
+        handle, path = tempfile.mkstemp(suffix=suffix)
+        with os.fdopen(handle, "w", encoding="utf-8") as f:
+            f.write(content)
+        self.addCleanup(os.remove, path)
+        return path
+
+    def run_command(self, path, *args):
+        stdout, stderr = StringIO(), StringIO()
+        call_command("import_projects", path, *args, stdout=stdout, stderr=stderr)
+        return stdout.getvalue(), stderr.getvalue()
+
+    def test_csv_import_creates_rows_and_reports_rejections(self):
+        stdout, stderr = self.run_command(self.write(CSV, ".csv"), "--chunk-size", "3")
+
+        project = Project.objects.get()
+        assert (project.name, project.owner_id) == ("Alpha", self.user.id)
+        activity = Activity.objects.get()
+        assert (activity.project_id, activity.created_by_id) == (project.id, self.user.id)
+        assert sorted(Task.objects.values_list("title", "completed", "activity_id")) == [("Kickoff", False, None), ("Wireframes", True, activity.id)]
+
+        assert 'line 3: User "ninguem" not found.' in stderr
+        assert 'line 7: Unknown project key "p2".' in stderr
+        assert "line 8: " in stderr  # due_date inválida
+        assert "Imported 1 project(s), 1 activity(s), 2 task(s) from 7 rows" in stdout and "3 rejected" in stdout
+
+        stats = ProjectStats.objects.get(project=project)
+        assert (stats.tasks_total, stats.tasks_completed, stats.activities_pending) == (2, 1, 1)
+        assert NotificationEvent.objects.count() == 3
+
+    @override_settings(GRAPHQL_PERMISSIONS={"BACKEND": "default", "TIMEOUT": 300})
+    def test_imported_projects_are_editable_by_their_owner(self):
+        cache.clear()
+        assert get_permissions(SimpleNamespace(context={"user": self.user})).owned_project_ids == set()  # guardado no cache compartilhado
+
+        self.run_command(self.write(CSV, ".csv"))
+        project = Project.objects.get()
+        assert get_permissions(SimpleNamespace(context={"user": self.user})).can_edit(project.pk), "bulk_create should invalidate the owner's cache entry"
+        cache.clear()
+
+    def test_interrupted_import_resumes_after_the_last_committed_chunk(self):
+        lines = [{"type": "project", "key": "p1", "owner": "cleiton", "name": "Alpha", "description": "Alpha", "start_date": "2030-01-01", "estimated_end_date": "2030-06-01"}]
+        lines += [{"type": "task", "project": "p1", "title": f"Task {index}", "due_date": "2030-01-02T10:00:00Z"} for index in range(5)]
+        path = self.write("\n".join(json.dumps(line) for line in lines), ".ndjson")
+
+        original = ProjectImporter.import_chunk
+        calls = []
+
+        def fail_on_second_chunk(importer, rows):
+            calls.append(rows)
+            if len(calls) == 2:
+                raise RuntimeError("connection lost")
+            return original(importer, rows)
+
+        with mock.patch.object(ProjectImporter, "import_chunk", fail_on_second_chunk):
+            with pytest.raises(RuntimeError):
+                self.run_command(path, "--chunk-size", "2", "--skip-notifications")
+        assert ImportCheckpoint.objects.get().rows_done == 2
+        assert Task.objects.count() == 1
+        # chaves gravadas na tabela pelo chunk que as criou, lidas de volta ao retomar
+        assert list(ImportKey.objects.values_list("kind", "key", "object_id")) == [("project", "p1", Project.objects.get().id)]
+
+        stdout, _stderr = self.run_command(path, "--chunk-size", "2", "--skip-notifications")
+        assert "Resuming after row 2" in stdout
+        assert Project.objects.count() == 1, "Projects of committed chunks are not created again"
+        assert sorted(Task.objects.values_list("title", flat=True)) == [f"Task {index}" for index in range(5)]
+        assert set(Task.objects.values_list("project_id", flat=True)) == {Project.objects.get().id}
+        assert NotificationEvent.objects.count() == 0
@@ -0,0 +1,214 @@
+from datetime import datetime, time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.db.models import Count, Max, Q
+from django.utils import timezone
+
+from apps.activities.models import Activity
+from apps.documents.models import Document
+from apps.projects.models import ProjectStats
+from apps.search.index import index_objects
+from apps.tasks.models import Task
+from ag_backend.bulk import invalidate_objects
+
+from .models import Report
+
+
+def get_engine_options():
+    options = getattr(settings, "REPORT_ENGINE", {})
+    return {
+        "BACKEND": options.get("BACKEND", "default"),
+        "CACHE_TIMEOUT": options.get("CACHE_TIMEOUT", 86400),
+        "MAX_ROWS": options.get("MAX_ROWS", 500),
+        "BATCH_SIZE": options.get("BATCH_SIZE", 20),
+    }
+
+
+def tasks_section(project_id, today, max_rows):
+    start_of_day = timezone.make_aware(datetime.combine(today, time.min))
+    tasks = Task.objects.filter(project_id=project_id).aggregate(
+        total_tasks=Count("pk"),
+        completed_tasks=Count("pk", filter=Q(completed=True)),
+        overdue_tasks=Count("pk", filter=Q(completed=False, due_date__lt=start_of_day)),
+    )
+    progress = tasks["completed_tasks"] / tasks["total_tasks"] if tasks["total_tasks"] else 0.0
+
+    return "\n".join(
+        [
+            "## Task completion",
+            f"- Total: {tasks['total_tasks']}",
+            f"- Completed: {tasks['completed_tasks']} ({progress:.0%})",
+            f"- Open: {tasks['total_tasks'] - tasks['completed_tasks']}",
+            f"- Overdue: {tasks['overdue_tasks']}",
+        ]
+    )
+
+
+def activities_section(project_id, today, max_rows):
+    activities = Activity.objects.filter(project_id=project_id)
+    by_status = dict(activities.values_list("status").annotate(total=Count("pk")).order_by())
+    overdue = activities.filter(expected_completion_date__lt=today).exclude(status="completed")
+    rows = list(overdue.order_by("expected_completion_date", "pk").values_list("name", "status", "priority", "expected_completion_date")[:max_rows])
+    total = overdue.count() if len(rows) == max_rows else len(rows)
+    statuses = dict(Activity.STATUS_CHOICES)
+
+    lines = ["## Activities"]
+    lines += [f"- {label}: {by_status.get(status, 0)}" for status, label in Activity.STATUS_CHOICES]
+    lines += ["", f"## Overdue activities ({total})"]
+    lines += [f"- {due.isoformat()} {name} [{statuses.get(status, status)}, {priority}]" for name, status, priority, due in rows]
+    if total > len(rows):
+        lines.append(f"- ... {total - len(rows)} more")
+    return "\n".join(lines)
+
+
+def documents_section(project_id, today, max_rows):
+    documents = Document.objects.filter(project_id=project_id)
+    inventory = documents.aggregate(total=Count("pk"), last_upload=Max("uploaded_at"))
+    rows = list(documents.order_by("name", "pk").values_list("name", "file", "uploaded_at")[:max_rows])
+
+    lines = [f"## Documents ({inventory['total']})"]
+    if inventory["last_upload"] is not None:
+        lines.append(f"Last upload: {inventory['last_upload'].isoformat()}")
+    lines += [f"- {name} ({file}), uploaded {uploaded_at.date().isoformat()}" for name, file, uploaded_at in rows]
+    if inventory["total"] > len(rows):
+        lines.append(f"- ... {inventory['total'] - len(rows)} more")
+    return "\n".join(lines)
+
+
+# seções na ordem do conteúdo: função que gera a seção com consultas agregadas, versão em ProjectStats e se a seção
+# depende da data (itens atrasados mudam na virada do dia sem nenhuma escrita)
+SECTIONS = {
+    "tasks": (tasks_section, "tasks_version", True),
+    "activities": (activities_section, "activities_version", True),
+    "documents": (documents_section, "documents_version", False),
+}
+
+
+def get_watermarks(project_id, today=None):
+    """
+    Returns the watermark of each section of the reports of ``project_id``: the ``ProjectStats`` version bumped by
+    every change to the tasks, activities or documents of the project, plus the date for the date-dependent sections.
+    """
+
+    today = today or timezone.localdate()
+    fields = [field for _, field, _ in SECTIONS.values()]
+    versions = ProjectStats.objects.filter(project_id=project_id).values(*fields).first() or {}
+    return {
+        name: f"{versions.get(field, 0)}:{today.isoformat()}" if dated else str(versions.get(field, 0))
+        for name, (_, field, dated) in SECTIONS.items()
+    }
+
+
+def get_watermark(project_id):
+    return "|".join(get_watermarks(project_id).values())
+
+
+def build_sections(project_id, watermarks, bases=(), today=None, max_rows=None):
+    """
+    Returns ``{section: {"watermark", "content"}}`` for ``watermarks``. A section whose watermark matches the one
+    stored in one of ``bases`` (the ``sections`` of earlier reports) is copied from it; only the others run their
+    queries. Without bases every section is recomputed.
+    """
+
+    today = today or timezone.localdate()
+    max_rows = max_rows or get_engine_options()["MAX_ROWS"]
+    sections = {}
+    for name, (builder, _, _) in SECTIONS.items():
+        previous = next((base[name] for base in bases if base.get(name, {}).get("watermark") == watermarks[name]), None)
+        sections[name] = previous or {"watermark": watermarks[name], "content": builder(project_id, today, max_rows)}
+    return sections
+
+
+def render_report(project, sections, today):
+    header = f"# {project.name}\nGenerated on {today.isoformat()}"
+    return "\n\n".join([header, *(sections[name]["content"] for name in SECTIONS)]) + "\n"
+
+
+def get_base_sections(report):
+    """
+    Sections an update of ``report`` can reuse: its own, from its previous generation, and those of the latest report
+    generated for the project.
+    """
+
+    latest = (
+        Report.objects.filter(project_id=report.project_id, status="ready")
+        .exclude(pk=report.pk)
+        .exclude(sections={})
+        .order_by("-generated_at", "-pk")
+        .values_list("sections", flat=True)
+        .first()
+    )
+    return [base for base in (report.sections, latest) if base]
+
+
+def store_report(report, fields):
+    # update() em vez de save(): o post_save enfileiraria um aviso "Report updated" a cada geração do worker
+    Report.objects.filter(pk=report.pk).update(**{field: getattr(report, field) for field in fields})
+    invalidate_objects(Report, [report.pk])
+    if "content" in fields:
+        index_objects(Report, [report], {report.pk: report.project_id})
+
+
+def generate_report(report):
+    """
+    Fills ``report`` with the content for the current watermarks of its project and marks it ready. Reports of the
+    same project and watermarks are identical, so the sections come from the cache when another report was generated
+    for them; otherwise only the sections changed since the last generation of the report (or of the project) are
+    recomputed and merged with the stored ones.
+    """
+
+    options = get_engine_options()
+    cache = caches[options["BACKEND"]]
+    today = timezone.localdate()
+    watermarks = get_watermarks(report.project_id, today)
+    watermark = "|".join(watermarks.values())
+    key = f"reports:sections:{report.project_id}:{watermark}"
+
+    sections = cache.get(key)
+    if sections is None:
+        sections = build_sections(report.project_id, watermarks, get_base_sections(report), today, options["MAX_ROWS"])
+        cache.set(key, sections, options["CACHE_TIMEOUT"])
+
+    report.sections = sections
+    report.watermark = watermark
+    report.content = render_report(report.project, sections, today)
+    report.status = "ready"
+    report.error = ""
+    report.generated_at = timezone.now()
+    store_report(report, ["content", "sections", "status", "watermark", "error", "generated_at"])
+    return report
+
+
+def generate_next_report():
+    """
+    Generates the oldest pending report and returns it, or ``None`` when the queue is empty. The row stays locked
+    (skipped by concurrent workers) until the report is saved, so a worker that dies mid-generation leaves it pending.
+    Errors are stored in ``Report.error`` with the status ``failed``.
+    """
+
+    with transaction.atomic():
+        report = Report.objects.select_for_update(skip_locked=True, of=("self",)).select_related("project").filter(status="pending").order_by("pk").first()
+        if report is None:
+            return None
+        try:
+            with transaction.atomic():  # savepoint, manter o lock para gravar a falha
+                generate_report(report)
+        except Exception as e:
+            report.status = "failed"
+            report.error = str(e) or e.__class__.__name__
+            store_report(report, ["status", "error"])
+    return report
+
+
+def generate_pending_reports(batch_size=None):
+    """
+    Generates up to ``batch_size`` pending reports, one transaction each. Returns how many were processed.
+    """
+
+    batch_size = batch_size or get_engine_options()["BATCH_SIZE"]
+    processed = 0
+    while processed < batch_size and generate_next_report() is not None:
+        processed += 1
+    return processed
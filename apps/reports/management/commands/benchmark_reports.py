@@ -0,0 +1,114 @@
+import statistics
+import time
+from datetime import date, timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from apps.activities.models import Activity
+from apps.documents.models import Document
+from apps.projects.models import Project
+from apps.projects.stats import rebuild_project_stats
+from apps.reports.engine import SECTIONS, build_sections, get_watermarks
+from apps.tasks.models import Task
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark of the report generation: creates a synthetic project with --tasks tasks, --activities activities "
+        "and --documents documents, then compares a full generation with the incremental regeneration after a change "
+        "to one document and to one task. Runs in a transaction that is rolled back at the end; run it against a "
+        "development database."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--tasks", type=int, default=100000, help="Tasks of the synthetic project.")
+        parser.add_argument("--activities", type=int, default=2000, help="Activities of the synthetic project.")
+        parser.add_argument("--documents", type=int, default=500, help="Documents of the synthetic project.")
+        parser.add_argument("--repeat", type=int, default=5, help="Runs of each measurement, the median is reported.")
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            project = self.create_project(options)
+            report = self.run(project, options)
+            transaction.set_rollback(True)  # nada do projeto sintético fica no banco
+
+        for label, value in report:
+            self.stdout.write(f"{label:<36}{value}")
+
+    def create_project(self, options):
+        user = get_user_model().objects.create_user(username=f"benchmark-{time.time_ns()}", password=None)
+        project = Project.objects.create(
+            owner=user,
+            name="Report benchmark",
+            description="Synthetic project of benchmark_reports",
+            status="open",
+            start_date=date.today(),
+            estimated_end_date=date.today() + timedelta(days=365),
+        )
+
+        now = timezone.now()
+        Task.objects.bulk_create(
+            (
+                Task(title=f"Task {index}", due_date=now + timedelta(hours=index % 2000 - 1000), completed=index % 3 == 0, project=project)
+                for index in range(options["tasks"])
+            ),
+            batch_size=5000,
+        )
+        statuses = [status for status, _ in Activity.STATUS_CHOICES]
+        Activity.objects.bulk_create(
+            (
+                Activity(
+                    created_by=user,
+                    name=f"Activity {index}",
+                    description="Synthetic activity",
+                    project=project,
+                    status=statuses[index % len(statuses)],
+                    expected_completion_date=date.today() + timedelta(days=index % 60 - 30),
+                )
+                for index in range(options["activities"])
+            ),
+            batch_size=5000,
+        )
+        Document.objects.bulk_create(
+            (Document(name=f"Document {index}", file=f"document-{index}.pdf", project=project) for index in range(options["documents"])),
+            batch_size=5000,
+        )
+        rebuild_project_stats([project.pk])  # bulk_create não dispara sinais
+        return project
+
+    def measure(self, options, function, *args):
+        timings = []
+        for _ in range(options["repeat"]):
+            started = time.perf_counter()
+            result = function(*args)
+            timings.append(time.perf_counter() - started)
+        return result, statistics.median(timings)
+
+    def run(self, project, options):
+        full, full_time = self.measure(options, build_sections, project.pk, get_watermarks(project.pk))
+        report = [
+            ("tasks / activities / documents", f"{options['tasks']} / {options['activities']} / {options['documents']}"),
+            ("full generation (ms)", f"{full_time * 1000:.1f}"),
+        ]
+
+        document = Document.objects.filter(project=project).first()
+        task = Task.objects.filter(project=project).first()
+        for label, instance, field in (("document", document, "name"), ("task", task, "title")):
+            setattr(instance, field, "Changed")
+            instance.save()  # save normal, os sinais incrementam a versão da seção
+            watermarks = get_watermarks(project.pk)
+            recomputed = [name for name in SECTIONS if full[name]["watermark"] != watermarks[name]]
+
+            incremental, incremental_time = self.measure(options, build_sections, project.pk, watermarks, [full])
+            expected = build_sections(project.pk, watermarks)
+            report += [
+                (f"{label} changed, recomputed", ", ".join(recomputed)),
+                (f"{label} changed, incremental (ms)", f"{incremental_time * 1000:.1f}"),
+                (f"{label} changed, speedup", f"{full_time / incremental_time:.1f}x"),
+                (f"{label} changed, same as full", "yes" if incremental == expected else "NO"),
+            ]
+            full = incremental
+        return report
@@ -0,0 +1,39 @@
+import signal
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from apps.reports.engine import generate_pending_reports
+
+
+class Command(BaseCommand):
+    help = (
+        "Worker that generates the pending reports queued by createReport. Runs until interrupted, polling every "
+        "--interval seconds while the queue is empty; several workers can run side by side."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=None, help="Reports generated between two polls (REPORT_ENGINE BATCH_SIZE).")
+        parser.add_argument("--interval", type=float, default=2.0, help="Seconds to wait when the queue is empty.")
+        parser.add_argument("--once", action="store_true", help="Drain the queue and exit.")
+
+    def handle(self, *args, **options):
+        self.running = True
+        if not options["once"]:
+            signal.signal(signal.SIGTERM, self.stop)  # terminar o report atual antes de sair
+
+        processed = 0
+        while self.running:
+            generated = generate_pending_reports(options["batch_size"])
+            processed += generated
+            if not generated:
+                if options["once"]:
+                    break
+                time.sleep(options["interval"])
+                close_old_connections()  # descartar conexões caídas ou expiradas durante a espera
+
+        self.stdout.write(self.style.SUCCESS(f"Generated {processed} report(s)."))
+
+    def stop(self, *args):
+        self.running = False
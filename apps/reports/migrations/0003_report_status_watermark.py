@@ -0,0 +1,46 @@
+# Generated by Django 5.0.8 on 2026-10-18 12:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("projects", "0006_projectstats_data_version"),
+        ("reports", "0002_report_reports_project_generated_idx"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="report",
+            name="content",
+            field=models.TextField(blank=True, default=""),
+        ),
+        migrations.AddField(
+            model_name="report",
+            name="status",
+            field=models.CharField(
+                choices=[("pending", "Pendente"), ("ready", "Pronto"), ("failed", "Falhou")],
+                default="ready",
+                max_length=20,
+            ),
+        ),
+        migrations.AddField(
+            model_name="report",
+            name="watermark",
+            field=models.CharField(blank=True, default="", max_length=64),
+        ),
+        migrations.AddField(
+            model_name="report",
+            name="error",
+            field=models.TextField(blank=True, default=""),
+        ),
+        migrations.AddIndex(
+            model_name="report",
+            index=models.Index(
+                condition=models.Q(("status", "pending")),
+                fields=["id"],
+                name="reports_pending_idx",
+            ),
+        ),
+    ]
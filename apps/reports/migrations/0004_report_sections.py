@@ -0,0 +1,24 @@
+# Generated by Django 5.0.8 on 2026-10-18 12:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("projects", "0007_projectstats_section_versions"),
+        ("reports", "0003_report_status_watermark"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="report",
+            name="watermark",
+            field=models.CharField(blank=True, default="", max_length=128),
+        ),
+        migrations.AddField(
+            model_name="report",
+            name="sections",
+            field=models.JSONField(blank=True, default=dict),
+        ),
+    ]
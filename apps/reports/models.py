@@ -9,11 +9,25 @@ class Report(models.Model):
     and project association.
     """
 
+    STATUS_CHOICES = [("pending", "Pendente"), ("ready", "Pronto"), ("failed", "Falhou")]
+
     title = models.CharField(max_length=255)
-    content = models.TextField()
+    content = models.TextField(blank=True, default="")
     generated_at = models.DateTimeField(auto_now_add=True)
     project = models.ForeignKey(Project, on_delete=models.CASCADE, related_name="reports")
+    # pending = aguardando o worker generate_reports, reports enviados com conteúdo pelo cliente já nascem ready
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default="ready")
+    watermark = models.CharField(max_length=128, blank=True, default="")  # versão dos dados do projeto usada na geração
+    # {seção: {"watermark", "content"}} dos reports gerados, base da regeneração incremental
+    sections = models.JSONField(blank=True, default=dict)
+    error = models.TextField(blank=True, default="")
     #cleiton = models.ForeignKey(Cleiton, on_delete=models.CASCADE, related_name="reports")
 
+    class Meta:
+        indexes = [
+            models.Index(fields=["project", "generated_at"], name="reports_project_generated_idx"),
+            models.Index(fields=["id"], condition=models.Q(status="pending"), name="reports_pending_idx"),  # fila do worker
+        ]
+
     def __str__(self):
         return self.title
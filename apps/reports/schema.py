@@ -1,50 +1,73 @@
 import graphene
 from django.db import transaction
+from graphene_django import bypass_get_queryset
 from graphene_django.types import DjangoObjectType
 from django.core.exceptions import ObjectDoesNotExist, ValidationError
 
+from .engine import store_report
 from .models import Report
-from apps.projects.models import Project
+from ag_backend.fields import FilterConnectionField
+from ag_backend.bulk import to_pk
+from ag_backend.loaders import get_loaders
+from ag_backend.permissions import get_permissions
 
 
 class ReportType(DjangoObjectType):
+    notifications = FilterConnectionField("apps.notifications.schema.NotificationType", required=True)
+
     class Meta:
         model = Report
         interfaces = (graphene.relay.Node,)
-        filter_fields = ["title", "content", "project", "generated_at"]
+        filter_fields = ["title", "content", "project", "generated_at", "status"]
         fields = "__all__"  # sem campos sensíveis, utilizar todos
 
+    @classmethod
+    def get_queryset(cls, queryset, info):
+        return get_permissions(info).filter(queryset, "project")
+
+    @bypass_get_queryset
+    def resolve_project(self, info):
+        return get_loaders(info).load(self, "project")
+
 
 class CreateReport(graphene.Mutation):
+    """
+    Creates a report. Without ``content`` the report is created ``PENDING`` and returned immediately; the
+    ``generate_reports`` worker fills it from the project data (task completion, overdue activities, documents).
+    """
+
     class Arguments:
         title = graphene.String(required=True)
-        content = graphene.String(required=True)
+        content = graphene.String()
         project_id = graphene.ID(required=True)
-        generated_at = graphene.DateTime(required=True)
+        generated_at = graphene.DateTime()
 
     report = graphene.Field(ReportType)
     success = graphene.Boolean()
     errors = graphene.String()
 
     def mutate(self, info, **kwargs):
-        user = info.context.user
+        user = info.context.get("user") if isinstance(info.context, dict) else info.context.user
         if not user.is_authenticated:
             return CreateReport(report=None, success=False, errors="Authentication required.")
 
-        try:  # criar report com tratamento de validação e erros
-            project_id = kwargs.pop("project_id")
-            project = Project.objects.get(pk=project_id)
+        project_id = kwargs.pop("project_id")
+        error = get_permissions(info).check_project(project_id)
+        if error:
+            return CreateReport(report=None, success=False, errors=error)
 
-            if project.cleiton.user != user and not (user.is_superuser or user.is_staff):
-                return CreateReport(report=None, success=False, errors="Permission denied. Not the project owner.")
+        try:  # criar report com tratamento de validação e erros
+            if kwargs.get("content") is None:  # gerado no servidor pelo worker, responder sem esperar
+                kwargs.pop("content", None)
+                kwargs["status"] = "pending"
+            if kwargs.get("generated_at") is None:
+                kwargs.pop("generated_at", None)
 
             with transaction.atomic():  # transação atômica para garantir a integridade da manipulação no banco
-                report = Report(project=project, **kwargs)
-                report.full_clean()  # validar antes de salvar
+                report = Report(project_id=to_pk(project_id), **kwargs)
+                report.full_clean(exclude=["project"])  # validar antes de salvar, projeto já conferido
                 report.save()
             return CreateReport(report=report, success=True)
-        except ObjectDoesNotExist:
-            return CreateReport(report=None, success=False, errors="Project not found.")
         except ValidationError as e:
             return CreateReport(report=None, success=False, errors=str(e))
 
@@ -62,32 +85,63 @@ class UpdateReport(graphene.Mutation):
     errors = graphene.String()
 
     def mutate(self, info, id, **kwargs):
-        user = info.context.user
+        user = info.context.get("user") if isinstance(info.context, dict) else info.context.user
         if not user.is_authenticated:
             return UpdateReport(report=None, success=False, errors="Authentication required.")
 
         try:  # update report com tratamento de validação e erros
             report = Report.objects.get(pk=id)
-            project = Project.objects.get(pk=kwargs["project_id"])
-            cleiton = Cleiton.objects.get(pk=kwargs["cleiton_id"])
-
-            if project.cleiton != cleiton or project.cleiton.user != user:
-                return UpdateReport(report=None, success=False, errors="Permission denied. Not the project owner or mismatched author.")
+            project_id = to_pk(kwargs["project_id"])
+            # dono do projeto atual e do projeto de destino, uma única verificação
+            denied = get_permissions(info).check_projects({report.project_id, project_id})
+            if denied:
+                return UpdateReport(report=None, success=False, errors=denied.get(project_id) or denied[report.project_id])
 
             with transaction.atomic():  # utilizar transação atômica para garantir a integridade da manipulação no banco
                 for key, value in kwargs.items():
                     if key in ["title", "content", "generated_at"]:
                         setattr(report, key, value)  # atualizar apenas os campos fornecidos
-                report.project = project  # se necessário, ajustar qual o projeto referente ao report
-                report.full_clean()  # validar mudanças antes de salvar
+                report.project_id = project_id  # se necessário, ajustar qual o projeto referente ao report
+                report.full_clean(exclude=["project"])  # validar mudanças antes de salvar
                 report.save()
             return UpdateReport(report=report, success=True)
         except ObjectDoesNotExist:
-            return UpdateReport(report=None, success=False, errors="Report or project not found.")
+            return UpdateReport(report=None, success=False, errors="Report not found.")
         except ValidationError as e:
             return UpdateReport(report=None, success=False, errors=str(e))
 
 
+class RegenerateReport(graphene.Mutation):
+    """
+    Queues a generated report for regeneration against the current project data. The worker only recomputes the
+    sections whose inputs changed since the report was generated.
+    """
+
+    class Arguments:
+        id = graphene.ID(required=True)
+
+    report = graphene.Field(ReportType)
+    success = graphene.Boolean()
+    errors = graphene.String()
+
+    def mutate(self, info, id):
+        user = info.context.get("user") if isinstance(info.context, dict) else info.context.user
+        if not user.is_authenticated:
+            return RegenerateReport(report=None, success=False, errors="Authentication required.")
+
+        try:
+            report = Report.objects.get(pk=id)
+            error = get_permissions(info).check_project(report.project_id)
+            if error:
+                return RegenerateReport(report=None, success=False, errors=error)
+
+            report.status = "pending"
+            store_report(report, ["status"])  # sem post_save: pedir a geração não é uma alteração do relatório
+            return RegenerateReport(report=report, success=True)
+        except ObjectDoesNotExist:
+            return RegenerateReport(report=None, success=False, errors="Report not found.")
+
+
 class DeleteReport(graphene.Mutation):
     class Arguments:
         id = graphene.ID(required=True)
@@ -96,14 +150,15 @@ class DeleteReport(graphene.Mutation):
     errors = graphene.String()
 
     def mutate(self, info, id):
-        user = info.context.user
+        user = info.context.get("user") if isinstance(info.context, dict) else info.context.user
         if not user.is_authenticated:
             return DeleteReport(success=False, errors="Authentication required.")
 
         try:  # deletar report com tratamento de validação e erros
             report = Report.objects.get(pk=id)
-            if report.project.cleiton.user != user and not (user.is_superuser or user.is_staff):
-                return DeleteReport(success=False, errors="Permission denied. Not the project owner.")
+            error = get_permissions(info).check_project(report.project_id)
+            if error:
+                return DeleteReport(success=False, errors=error)
 
             with transaction.atomic():  # utilizar transação atômica para garantir a integridade da manipulação no banco
                 report.delete()
@@ -115,4 +170,5 @@ class DeleteReport(graphene.Mutation):
 class Mutation(graphene.ObjectType):
     create_report = CreateReport.Field()
     update_report = UpdateReport.Field()
+    regenerate_report = RegenerateReport.Field()
     delete_report = DeleteReport.Field()
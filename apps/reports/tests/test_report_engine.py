@@ -0,0 +1,153 @@
+import re
+import pytest
+from io import StringIO
+from unittest import mock
+from datetime import date, timedelta
+
+from ag_backend.cache import object_cache
+from ag_backend.schema import schema
+from apps.activities.models import Activity
+from apps.documents.models import Document
+from apps.notifications.models import NotificationEvent
+from apps.projects.models import Project
+from apps.reports import engine
+from apps.reports.models import Report
+from apps.search.models import SearchEntry
+from apps.tasks.models import Task
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+from graphene.test import Client as GraphQLClient
+
+
+@pytest.mark.django_db
+class ReportEngineTestCase(TestCase):
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        self.user = get_user_model().objects.create_user(username="cleiton", password="securepassword")
+        self.project = Project.objects.create(
+            owner=self.user,
+            name="Sample Project",
+            description="Sample Project Description",
+            status="open",
+            start_date=date.today(),
+            estimated_end_date=date.today() + timedelta(days=30),
+        )
+        now = timezone.now()
+        self.task = Task.objects.create(title="Done", due_date=now - timedelta(days=3), completed=True, project=self.project)
+        Task.objects.create(title="Late", due_date=now - timedelta(days=2), project=self.project)
+        Task.objects.create(title="Open", due_date=now + timedelta(days=2), project=self.project)
+        Activity.objects.create(
+            created_by=self.user,
+            name="Review contract",
+            description="Description",
+            project=self.project,
+            status="in_progress",
+            expected_completion_date=date.today() - timedelta(days=1),
+        )
+        Document.objects.create(name="Contract", file="contract.pdf", project=self.project)
+        self.graphql_client = GraphQLClient(schema)
+
+    def create_report(self, title="Weekly"):
+        mutation = """
+            mutation ($projectId: ID!, $title: String!) {
+                createReport(projectId: $projectId, title: $title) { success errors report { id status content } }
+            }
+        """
+        response = self.graphql_client.execute(mutation, variables={"projectId": str(self.project.pk), "title": title}, context_value={"user": self.user})
+        assert "errors" not in response, response
+        return response["data"]["createReport"]
+
+    def test_create_report_returns_pending_and_worker_generates_it(self):
+        result = self.create_report()
+        assert result["success"] is True
+        assert result["report"]["status"] == "PENDING"
+        assert result["report"]["content"] == ""
+
+        call_command("generate_reports", "--once", stdout=StringIO())
+
+        report = Report.objects.get()
+        assert report.status == "ready"
+        assert report.watermark == engine.get_watermark(self.project.pk)
+        assert "- Completed: 1 (33%)" in report.content
+        assert "- Overdue: 1" in report.content
+        assert "Review contract" in report.content
+        assert "Contract (contract.pdf)" in report.content
+
+    def test_generation_does_not_notify_but_refreshes_cache_and_search(self):
+        self.create_report()
+        report = Report.objects.get()
+        object_cache.set(report)
+        NotificationEvent.objects.all().delete()
+
+        builders, patch = self.count_builds(documents=RuntimeError("database unavailable"))
+        with patch:
+            engine.generate_pending_reports()
+        assert object_cache.get(Report, report.pk).status == "failed", "Cached copy is invalidated"
+        assert not NotificationEvent.objects.exists(), "Worker generation is not a user change"
+
+        mutation = "mutation ($id: ID!) { regenerateReport(id: $id) { success report { status } } }"
+        response = self.graphql_client.execute(mutation, variables={"id": str(report.pk)}, context_value={"user": self.user})
+        assert response["data"]["regenerateReport"] == {"success": True, "report": {"status": "PENDING"}}
+        assert object_cache.get(Report, report.pk).status == "pending"
+        engine.generate_pending_reports()
+        assert object_cache.get(Report, report.pk).status == "ready"
+        assert "Review contract" in SearchEntry.objects.get(kind="report", object_id=report.pk).body
+        assert not NotificationEvent.objects.exists()
+
+    def count_builds(self, **side_effects):
+        builders = {name: mock.Mock(wraps=builder, side_effect=side_effects.get(name)) for name, (builder, *_) in engine.SECTIONS.items()}
+        patched = {name: (builders[name], *rest) for name, (_, *rest) in engine.SECTIONS.items()}
+        return builders, mock.patch.dict(engine.SECTIONS, patched)
+
+    def test_only_changed_sections_are_regenerated(self):
+        self.create_report("First")
+        engine.generate_pending_reports()
+
+        cache.clear()  # outro processo: reaproveitar as seções do último report do projeto
+        self.create_report("Second")
+        builders, patch = self.count_builds()
+        with patch:
+            engine.generate_pending_reports()
+        assert [builder.call_count for builder in builders.values()] == [0, 0, 0]
+        first, second = Report.objects.order_by("pk")
+        assert second.watermark == first.watermark and second.content == first.content
+
+        self.task.title = "Renamed"  # sem alterar contadores, ainda assim muda a versão da seção de tarefas
+        self.task.completed = False
+        self.task.save()
+        mutation = "mutation ($id: ID!) { regenerateReport(id: $id) { success report { status } } }"
+        response = self.graphql_client.execute(mutation, variables={"id": str(first.pk)}, context_value={"user": self.user})
+        assert response["data"]["regenerateReport"] == {"success": True, "report": {"status": "PENDING"}}
+        builders, patch = self.count_builds()
+        with patch:
+            engine.generate_pending_reports()
+        assert {name: builder.call_count for name, builder in builders.items()} == {"tasks": 1, "activities": 0, "documents": 0}
+
+        first.refresh_from_db()
+        assert first.watermark != second.watermark
+        assert "- Completed: 0 (0%)" in first.content and "Review contract" in first.content
+        assert first.content == engine.render_report(self.project, engine.build_sections(self.project.pk, engine.get_watermarks(self.project.pk)), date.today())
+
+    def test_failed_generation_is_recorded(self):
+        self.create_report()
+        builders, patch = self.count_builds(documents=RuntimeError("database unavailable"))
+        with patch:
+            assert engine.generate_pending_reports() == 1
+
+        report = Report.objects.get()
+        assert report.status == "failed"
+        assert report.error == "database unavailable"
+        assert engine.generate_pending_reports() == 0
+
+    def test_benchmark_command(self):
+        stdout = StringIO()
+        call_command("benchmark_reports", "--tasks", "300", "--activities", "20", "--documents", "10", "--repeat", "1", stdout=stdout)
+        output = stdout.getvalue()
+        assert re.search(r"document changed, recomputed +documents\r?\n", output)
+        assert "NO" not in output
+        assert Task.objects.count() == 3, "Synthetic project is rolled back"
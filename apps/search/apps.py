@@ -0,0 +1,12 @@
+from django.apps import AppConfig
+from django.db.models.signals import post_migrate
+
+
+class SearchConfig(AppConfig):
+    name = "apps.search"
+
+    def ready(self):
+        from . import index  # conectar os receivers que mantêm o índice
+
+        # o índice full-text depende do banco, criado depois do migrate (também com --nomigrations nos testes)
+        post_migrate.connect(index.on_post_migrate, sender=self, dispatch_uid="search_install_backend")
@@ -0,0 +1,253 @@
+import re
+import unicodedata
+
+from django.conf import settings
+from django.db import connections, DEFAULT_DB_ALIAS, router
+from django.db.models import F, Q
+from django.db.models.functions import Collate
+from django.db.models.signals import post_delete, post_save
+from django.utils import timezone
+
+from apps.accounts.models import DefaultAccount
+from apps.activities.models import Activity
+from apps.documents.models import Document
+from apps.notifications.models import Notification
+from apps.projects.models import Project
+from apps.projects.stats import owner_project
+from apps.reports.models import Report
+from apps.tasks.models import Task
+
+from .models import SearchEntry
+
+# modelo -> (kind, campo do título, campos do corpo)
+SOURCES = {
+    Project: ("project", "name", ("description",)),
+    Activity: ("activity", "name", ("description",)),
+    Task: ("task", "title", ("description",)),
+    Document: ("document", "name", ("file",)),
+    Report: ("report", "title", ("content",)),
+    Notification: ("notification", "title", ("message",)),
+    DefaultAccount: ("user", "username", ("first_name", "last_name", "email")),
+}
+KINDS = {kind: model for model, (kind, _title, _body) in SOURCES.items()}
+TERM_RE = re.compile(r"\w+")
+
+
+def get_search_options():
+    options = getattr(settings, "SEARCH_INDEX", {})
+    return {
+        "BATCH_SIZE": options.get("BATCH_SIZE", 500),
+        "MAX_BODY_LENGTH": options.get("MAX_BODY_LENGTH", 100000),
+        "AUTOCOMPLETE_LIMIT": options.get("AUTOCOMPLETE_LIMIT", 10),
+        "AUTOCOMPLETE_MAX_LIMIT": options.get("AUTOCOMPLETE_MAX_LIMIT", 50),
+    }
+
+
+def title_key(text):
+    # minúsculas, sem acentos e espaços repetidos: "Projeto  Ágil" -> "projeto agil"
+    text = unicodedata.normalize("NFKD", text.casefold())
+    return " ".join("".join(char for char in text if not unicodedata.combining(char)).split())[:255]
+
+
+def entry_project_ids(model, instances):
+    """
+    Returns ``{pk: project_id}`` of the instances, the project whose owner can see their search entries.
+    """
+
+    if model is Project:
+        return {instance.pk: instance.pk for instance in instances}
+    if model is DefaultAccount:
+        return {}
+    project_ids = {instance.pk: instance.project_id for instance in instances}
+    if model is Notification:  # notificações sem projeto pertencem ao projeto da entidade ligada
+        missing = [pk for pk, project_id in project_ids.items() if project_id is None]
+        if missing:
+            rows = Notification.objects.filter(pk__in=missing).annotate(owner_project=owner_project()).values_list("pk", "owner_project")
+            project_ids.update(rows)
+    return project_ids
+
+
+def index_objects(model, instances, project_ids=None):
+    """
+    Creates or updates the search entries of ``instances`` with one upsert per batch. Called by the ``post_save``
+    receiver and, since ``bulk_create``/``bulk_update`` send no signals, by the bulk mutations and the importer.
+    ``project_ids`` (``{pk: project_id}``) spares the lookup of the project when the caller already knows it.
+    """
+
+    instances = [instance for instance in instances if instance.pk is not None]
+    if not instances:
+        return
+    kind, title_field, body_fields = SOURCES[model]
+    options = get_search_options()
+    project_ids = project_ids if project_ids is not None else entry_project_ids(model, instances)
+    now = timezone.now()
+    entries = [
+        SearchEntry(
+            kind=kind,
+            object_id=instance.pk,
+            project_id=project_ids.get(instance.pk),
+            title=str(getattr(instance, title_field) or "")[:255],
+            title_key=title_key(str(getattr(instance, title_field) or "")),
+            body="\n".join(str(getattr(instance, field) or "") for field in body_fields)[: options["MAX_BODY_LENGTH"]],
+            updated_at=now,
+        )
+        for instance in instances
+    ]
+    SearchEntry.objects.bulk_create(
+        entries,
+        batch_size=options["BATCH_SIZE"],
+        update_conflicts=True,
+        unique_fields=["kind", "object_id"],
+        update_fields=["project", "title", "title_key", "body", "updated_at"],
+    )
+
+
+def remove_objects(model, pks):
+    SearchEntry.objects.filter(kind=SOURCES[model][0], object_id__in=list(pks)).delete()
+
+
+def rebuild_search_index(models=None, batch_size=None):
+    """
+    Reindexes every instance of ``models`` (all the indexed models by default) and removes the entries of objects
+    that no longer exist. Returns ``{kind: indexed}``.
+    """
+
+    batch_size = batch_size or get_search_options()["BATCH_SIZE"]
+    indexed = {}
+    for model in models or SOURCES:
+        kind = SOURCES[model][0]
+        SearchEntry.objects.filter(kind=kind).exclude(object_id__in=model._default_manager.values("pk")).delete()
+        indexed[kind] = 0
+        batch = []
+        for instance in model._default_manager.order_by("pk").iterator(chunk_size=batch_size):
+            batch.append(instance)
+            if len(batch) == batch_size:
+                index_objects(model, batch)
+                indexed[kind] += len(batch)
+                batch = []
+        index_objects(model, batch)
+        indexed[kind] += len(batch)
+    return indexed
+
+
+def install_search_backend(using=DEFAULT_DB_ALIAS):
+    """
+    Creates the full-text index of ``SearchEntry`` for the database ``using``: a generated ``tsvector`` column
+    with a GIN index on PostgreSQL, an external content FTS5 table kept by triggers on SQLite. Other databases fall
+    back to ``icontains`` lookups. Also creates the index of the ``autocomplete`` prefix lookups over
+    ``(kind, title_key)``, in byte order (``COLLATE "C"`` on PostgreSQL) so a prefix is one contiguous range of the
+    index whatever the collation of the database. Idempotent, run after every ``migrate``.
+    """
+
+    connection = connections[using]
+    table = SearchEntry._meta.db_table
+    with connection.cursor() as cursor:
+        if connection.vendor == "postgresql":
+            # título com peso A, corpo com peso B; configuração simple, sem stemming de um idioma específico
+            cursor.execute(
+                f"ALTER TABLE {table} ADD COLUMN IF NOT EXISTS vector tsvector GENERATED ALWAYS AS ("
+                "setweight(to_tsvector('simple', coalesce(title, '')), 'A') || setweight(to_tsvector('simple', coalesce(body, '')), 'B')"
+                ") STORED"
+            )
+            cursor.execute(f"CREATE INDEX IF NOT EXISTS search_entry_vector_idx ON {table} USING GIN (vector)")
+            cursor.execute(f'CREATE INDEX IF NOT EXISTS search_entry_title_key_idx ON {table} (kind, title_key COLLATE "C", id)')
+        elif connection.vendor == "sqlite":
+            cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'search_fts'")
+            if cursor.fetchone() is None:
+                cursor.execute(
+                    f"CREATE VIRTUAL TABLE search_fts USING fts5(title, body, content='{table}', content_rowid='id', "
+                    "tokenize='unicode61 remove_diacritics 2')"
+                )
+                cursor.execute("INSERT INTO search_fts(search_fts) VALUES ('rebuild')")  # entradas já existentes
+            delete = "INSERT INTO search_fts(search_fts, rowid, title, body) VALUES ('delete', old.id, old.title, old.body);"
+            insert = "INSERT INTO search_fts(rowid, title, body) VALUES (new.id, new.title, new.body);"
+            cursor.execute(f"CREATE TRIGGER IF NOT EXISTS search_fts_insert AFTER INSERT ON {table} BEGIN {insert} END")
+            cursor.execute(f"CREATE TRIGGER IF NOT EXISTS search_fts_delete AFTER DELETE ON {table} BEGIN {delete} END")
+            cursor.execute(f"CREATE TRIGGER IF NOT EXISTS search_fts_update AFTER UPDATE ON {table} BEGIN {delete} {insert} END")
+        if connection.vendor != "postgresql":  # comparação binária por padrão no SQLite
+            cursor.execute(f"CREATE INDEX IF NOT EXISTS search_entry_title_key_idx ON {table} (kind, title_key, id)")
+
+
+def search_entries(query, kinds=None):
+    """
+    Returns the entries matching ``query`` annotated with ``rank`` (higher is better), best first. PostgreSQL
+    accepts the ``websearch_to_tsquery`` syntax (quotes, ``or``, ``-``); on SQLite every word must match.
+    """
+
+    terms = TERM_RE.findall(query)
+    queryset = SearchEntry.objects.all()
+    if not terms:
+        return queryset.none()
+    if kinds:
+        queryset = queryset.filter(kind__in=kinds)
+
+    table = SearchEntry._meta.db_table
+    vendor = connections[router.db_for_read(SearchEntry)].vendor
+    if vendor == "postgresql":
+        tsquery = "websearch_to_tsquery('simple', %s)"
+        queryset = queryset.extra(
+            select={"rank": f"ts_rank({table}.vector, {tsquery})"},
+            select_params=[query],
+            where=[f"{table}.vector @@ {tsquery}"],
+            params=[query],
+        )
+    elif vendor == "sqlite":
+        # cada palavra entre aspas, nada da consulta é interpretado como sintaxe do FTS5
+        match = " ".join(f'"{term}"' for term in terms)
+        queryset = queryset.extra(
+            select={"rank": "-bm25(search_fts, 10.0, 1.0)"},  # bm25 menor é melhor, título pesa mais que o corpo
+            tables=["search_fts"],
+            where=[f"search_fts.rowid = {table}.id", "search_fts MATCH %s"],
+            params=[match],
+        )
+    else:
+        condition = Q()
+        for term in terms:
+            condition &= Q(title__icontains=term) | Q(body__icontains=term)
+        queryset = queryset.filter(condition).extra(select={"rank": "0"})
+    return queryset.order_by("-rank", "pk")
+
+
+def autocomplete_entries(prefix, kind):
+    """
+    Returns the entries of ``kind`` whose title starts with ``prefix``, ignoring case and accents, in alphabetical
+    (byte) order of the normalized title: an exact match comes first, then the longer titles. The filter is a range
+    ``[prefix, prefix + U+10FFFF)`` over the ``search_entry_title_key_idx`` index, which also gives the order, so a
+    limited page reads only its own rows of the index.
+    """
+
+    key = title_key(prefix)
+    if not key:
+        return SearchEntry.objects.none()
+    column = F("title_key")
+    if connections[router.db_for_read(SearchEntry)].vendor == "postgresql":
+        column = Collate("title_key", "C")  # mesma ordem do índice, independente da collation do banco
+    return (
+        SearchEntry.objects.filter(kind=kind)
+        .alias(sort_key=column)
+        .filter(sort_key__gte=key, sort_key__lt=key + "\U0010ffff")
+        .order_by("sort_key", "pk")
+    )
+
+
+def on_save(sender, instance, created, raw=False, update_fields=None, **kwargs):
+    if raw:
+        return
+    _kind, title_field, body_fields = SOURCES[sender]
+    # saves parciais que não tocam o texto (status, read, last_login...) não reindexam
+    if update_fields is not None and not {title_field, *body_fields, "project"} & set(update_fields):
+        return
+    index_objects(sender, [instance])
+
+
+def on_delete(sender, instance, **kwargs):
+    remove_objects(sender, [instance.pk])
+
+
+def on_post_migrate(sender, using=DEFAULT_DB_ALIAS, **kwargs):
+    install_search_backend(using)
+
+
+for model in SOURCES:
+    post_save.connect(on_save, sender=model, dispatch_uid=f"search_index_save_{model._meta.label_lower}")
+    post_delete.connect(on_delete, sender=model, dispatch_uid=f"search_index_delete_{model._meta.label_lower}")
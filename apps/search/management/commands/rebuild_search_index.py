@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from apps.search.index import KINDS, install_search_backend, rebuild_search_index
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuilds the full-text search index from the indexed models: creates the database index if it is missing, "
+        "reindexes every object and removes the entries of deleted objects. Run it after changes made without "
+        "signals (raw SQL, QuerySet.update)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--kind", action="append", choices=sorted(KINDS), help="Kind to reindex, repeatable. All by default.")
+        parser.add_argument("--batch-size", type=int, help="Objects reindexed per upsert (default SEARCH_INDEX).")
+
+    def handle(self, *args, **options):
+        install_search_backend()
+        models = [KINDS[kind] for kind in options["kind"]] if options["kind"] else None
+        for kind, indexed in rebuild_search_index(models, options["batch_size"]).items():
+            self.stdout.write(f"Indexed {indexed} {kind} object(s).")
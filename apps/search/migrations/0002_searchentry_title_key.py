@@ -0,0 +1,35 @@
+# Generated by Django 5.0.8 on 2026-10-18 12:00
+
+import unicodedata
+
+from django.db import migrations, models
+
+
+def fill_title_keys(apps, schema_editor):
+    # mesma normalização de apps.search.index.title_key
+    SearchEntry = apps.get_model("search", "SearchEntry")
+    entries = []
+    for entry in SearchEntry.objects.only("title").iterator(chunk_size=1000):
+        text = unicodedata.normalize("NFKD", entry.title.casefold())
+        entry.title_key = " ".join("".join(char for char in text if not unicodedata.combining(char)).split())[:255]
+        entries.append(entry)
+        if len(entries) == 1000:
+            SearchEntry.objects.bulk_update(entries, ["title_key"])
+            entries = []
+    SearchEntry.objects.bulk_update(entries, ["title_key"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("search", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="searchentry",
+            name="title_key",
+            field=models.CharField(blank=True, default="", max_length=255),
+        ),
+        migrations.RunPython(fill_title_keys, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,39 @@
+from django.db import models
+
+from apps.projects.models import Project
+
+
+class SearchEntry(models.Model):
+    """
+    Searchable text of one project, activity, task, document, report, notification or user, kept up to date by the
+    receivers of ``apps.search.index``. The full-text index over ``title``/``body`` is not part of the model: it is
+    created for the database in use (a ``tsvector`` column with a GIN index on PostgreSQL, an FTS5 table on SQLite)
+    by ``install_search_backend`` after ``migrate``, as is the byte-ordered index on ``title_key`` that answers the
+    prefix lookups of ``autocomplete``.
+    """
+
+    KIND_CHOICES = [
+        ("project", "Projeto"),
+        ("activity", "Atividade"),
+        ("task", "Tarefa"),
+        ("document", "Documento"),
+        ("report", "Relatório"),
+        ("notification", "Notificação"),
+        ("user", "Usuário"),
+    ]
+
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    object_id = models.BigIntegerField()
+    # projeto usado na visibilidade dos resultados, vazio para usuários
+    project = models.ForeignKey(Project, on_delete=models.CASCADE, null=True, blank=True, related_name="+")
+    title = models.CharField(max_length=255)
+    # título em minúsculas e sem acentos, chave do autocomplete por prefixo
+    title_key = models.CharField(max_length=255, blank=True, default="")
+    body = models.TextField(blank=True, default="")
+    updated_at = models.DateTimeField()
+
+    class Meta:
+        constraints = [models.UniqueConstraint(fields=["kind", "object_id"], name="search_entry_object_unique")]
+
+    def __str__(self):
+        return f"{self.kind} {self.object_id}"
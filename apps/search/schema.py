@@ -0,0 +1,126 @@
+from functools import partial
+
+import graphene
+from django.db.models import Q
+from graphene.relay.connection import connection_adapter, page_info_adapter
+from graphene_django.settings import graphene_settings
+from graphql_relay import connection_from_array_slice
+
+from ag_backend.loaders import get_loaders
+from apps.accounts.schema import UserType
+from apps.activities.schema import ActivityType
+from apps.documents.schema import DocumentType
+from apps.notifications.schema import NotificationType
+from apps.projects.schema import ProjectType
+from apps.reports.schema import ReportType
+from apps.tasks.schema import TaskType
+
+from .index import autocomplete_entries, get_search_options, KINDS, search_entries, title_key
+
+class SearchKind(graphene.Enum):
+    PROJECT = "project"
+    ACTIVITY = "activity"
+    TASK = "task"
+    DOCUMENT = "document"
+    REPORT = "report"
+    NOTIFICATION = "notification"
+    USER = "user"
+
+
+class SearchObject(graphene.Union):
+    class Meta:
+        types = (ProjectType, ActivityType, TaskType, DocumentType, ReportType, NotificationType, UserType)
+
+
+class SearchResultType(graphene.ObjectType):
+    kind = SearchKind(required=True)
+    rank = graphene.Float(required=True)
+    title = graphene.String(required=True)
+    object = graphene.Field(SearchObject)
+
+    def resolve_object(self, info):
+        return self.search_object
+
+
+class SearchResultConnection(graphene.relay.Connection):
+    total_count = graphene.Int(required=True)
+
+    class Meta:
+        node = SearchResultType
+
+    def resolve_total_count(self, info):
+        return self.length
+
+
+def visible_entries(user, queryset):
+    # entradas dos projetos do usuário e a própria conta, todas para su/staff
+    if user.is_superuser or user.is_staff:
+        return queryset
+    return queryset.filter(Q(project__owner_id=user.id) | Q(kind="user", object_id=user.id))
+
+
+def resolve_search(info, query, types=None, **args):
+    """
+    Ranked page of the entries matching ``query`` the user can see. The objects of the page are loaded with one
+    query per kind and kept in the request's loader registry, so their relations batch with the rest of the page.
+    """
+
+    user = info.context.get("user") if isinstance(info.context, dict) else info.context.user
+    max_limit = graphene_settings.RELAY_CONNECTION_MAX_LIMIT
+    if (args.get("first") or 0) > max_limit or (args.get("last") or 0) > max_limit:
+        raise Exception(f"Requesting more than {max_limit} records on the `search` connection is not allowed.")
+    if not args.get("first") and not args.get("last"):
+        args["first"] = max_limit
+
+    kinds = [kind.value for kind in types or []]
+    queryset = visible_entries(user, search_entries(query, kinds))
+    count = queryset.count()
+    connection = connection_from_array_slice(
+        queryset,
+        args,
+        slice_start=0,
+        array_length=count,
+        connection_type=partial(connection_adapter, SearchResultConnection),
+        edge_type=SearchResultConnection.Edge,
+        page_info_type=page_info_adapter,
+    )
+    connection.length = count
+    load_objects(info, [edge.node for edge in connection.edges])
+    return connection
+
+
+def resolve_autocomplete(info, prefix, kind, first=None):
+    """
+    Titles of ``kind`` starting with ``prefix`` (case and accents ignored), alphabetical with an exact match first;
+    ``rank`` is the fraction of the title the prefix covers. Users are listed to everyone, like ``allUsers``; the
+    other kinds are restricted to the user's projects as in ``search``.
+    """
+
+    user = info.context.get("user") if isinstance(info.context, dict) else info.context.user
+    options = get_search_options()
+    first = min(first or options["AUTOCOMPLETE_LIMIT"], options["AUTOCOMPLETE_MAX_LIMIT"])
+
+    queryset = autocomplete_entries(prefix, kind.value)
+    if kind.value != "user" or not user.is_authenticated:
+        queryset = visible_entries(user, queryset)
+    entries = list(queryset[:first])
+    key_length = len(title_key(prefix))
+    for entry in entries:
+        entry.rank = key_length / max(len(entry.title_key), 1)
+    return load_objects(info, entries)
+
+
+def load_objects(info, entries):
+    # objetos da página com uma consulta por kind, registrados nos loaders da requisição
+    ids = {}
+    for entry in entries:
+        ids.setdefault(entry.kind, []).append(entry.object_id)
+    objects = {}
+    loaders = get_loaders(info)
+    for kind, object_ids in ids.items():
+        loaded = KINDS[kind]._default_manager.in_bulk(object_ids)
+        loaders.remember(loaded.values())
+        objects.update(((kind, pk), obj) for pk, obj in loaded.items())
+    for entry in entries:
+        entry.search_object = objects.get((entry.kind, entry.object_id))  # None se o objeto sumiu antes do índice
+    return entries
@@ -0,0 +1,140 @@
+import pytest
+from io import StringIO
+from datetime import date, timedelta
+
+from ag_backend.schema import schema
+from apps.activities.models import Activity
+from apps.documents.models import Document
+from apps.projects.models import Project
+from apps.search.index import autocomplete_entries
+from apps.search.models import SearchEntry
+from apps.tasks.models import Task
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.utils import timezone
+from graphene.test import Client as GraphQLClient
+from graphql_relay import to_global_id
+
+SEARCH_QUERY = """
+    query ($query: String!, $types: [SearchKind!], $first: Int, $after: String) {
+        search(query: $query, types: $types, first: $first, after: $after) {
+            totalCount
+            pageInfo { hasNextPage endCursor }
+            edges { node { kind title rank object { __typename ... on TaskType { id completed } ... on ProjectType { name } } } }
+        }
+    }
+"""
+
+
+@pytest.mark.django_db
+class SearchTestCase(TestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = get_user_model().objects.create_user(username="cleiton", password="securepassword")
+        self.other = get_user_model().objects.create_user(username="outro", password="securepassword")
+        self.project = self.create_project(self.user, "Warehouse migration", "Move the inventory to the new warehouse")
+        self.graphql_client = GraphQLClient(schema)
+
+    def create_project(self, owner, name, description):
+        return Project.objects.create(
+            owner=owner,
+            name=name,
+            description=description,
+            status="open",
+            start_date=date.today(),
+            estimated_end_date=date.today() + timedelta(days=30),
+        )
+
+    def search(self, query, user=None, **variables):
+        response = self.graphql_client.execute(SEARCH_QUERY, variables={"query": query, **variables}, context_value={"user": user or self.user})
+        assert "errors" not in response, response
+        return response["data"]["search"]
+
+    def test_results_are_ranked_and_paginated(self):
+        Task.objects.create(title="Label pallets", description="Before the warehouse move", due_date=timezone.now(), project=self.project)
+        task = Task.objects.create(title="Warehouse inventory count", due_date=timezone.now(), project=self.project)
+        Document.objects.create(name="Floor plan", file="warehouse.pdf", project=self.project)
+
+        result = self.search("warehouse", first=2)
+        assert result["totalCount"] == 4 and result["pageInfo"]["hasNextPage"] is True
+        titles = [edge["node"]["title"] for edge in result["edges"]]
+        assert set(titles) == {"Warehouse migration", "Warehouse inventory count"}  # título pesa mais que o corpo
+        ranks = [edge["node"]["rank"] for edge in result["edges"]]
+        assert ranks == sorted(ranks, reverse=True)
+
+        rest = self.search("warehouse", first=2, after=result["pageInfo"]["endCursor"])
+        assert {edge["node"]["title"] for edge in rest["edges"]} == {"Label pallets", "Floor plan"}
+
+        result = self.search("inventory COUNT", types=["TASK"])
+        assert result["totalCount"] == 1
+        node = result["edges"][0]["node"]
+        assert (node["kind"], node["title"]) == ("TASK", "Warehouse inventory count")
+        assert node["object"] == {"__typename": "TaskType", "id": to_global_id("TaskType", task.pk), "completed": False}
+
+    def test_index_follows_changes_and_visibility(self):
+        activity = Activity.objects.create(
+            created_by=self.user,
+            name="Review contract",
+            description="Signed copy",
+            project=self.project,
+            status="pending",
+            expected_completion_date=date.today(),
+        )
+        self.create_project(self.other, "Foreign contract", "Not visible")
+
+        assert [edge["node"]["title"] for edge in self.search("contract")["edges"]] == ["Review contract"]
+        assert self.search("contract", user=get_user_model().objects.create_user(username="staff", password="x", is_staff=True))["totalCount"] == 2
+
+        activity.name = "Review lease"
+        activity.save()
+        assert self.search("contract")["totalCount"] == 0
+        assert self.search("lease")["totalCount"] == 1
+        activity.delete()
+        assert self.search("lease")["totalCount"] == 0
+
+        # sintaxe do FTS5 na consulta é tratada como texto
+        assert self.search('lease" OR "x')["totalCount"] == 0
+        assert self.search("***")["totalCount"] == 0
+
+    def test_bulk_mutation_and_rebuild_command(self):
+        mutation = """
+            mutation ($projectId: ID!) {
+                bulkCreateTasks(tasks: [{title: "Quarterly audit", dueDate: "2030-01-01T00:00:00Z", completed: false, projectId: $projectId}]) { success errors { index } }
+            }
+        """
+        response = self.graphql_client.execute(mutation, variables={"projectId": str(self.project.pk)}, context_value={"user": self.user})
+        assert response["data"]["bulkCreateTasks"]["success"] is True
+        assert self.search("audit")["totalCount"] == 1
+
+        Project.objects.filter(pk=self.project.pk).update(name="Renamed")  # sem sinais
+        SearchEntry.objects.filter(kind="task").delete()
+        stdout = StringIO()
+        call_command("rebuild_search_index", stdout=stdout)
+        assert "Indexed 1 task object(s)." in stdout.getvalue()
+        assert self.search("audit")["totalCount"] == 1
+        assert [edge["node"]["object"] for edge in self.search("renamed")["edges"]] == [{"__typename": "ProjectType", "name": "Renamed"}]
+
+    def test_autocomplete_by_prefix(self):
+        for username in ("ana", "anabela", "Anderson", "bruno"):
+            get_user_model().objects.create_user(username=username, password="securepassword")
+        self.create_project(self.user, "Ágil rollout", "Description")
+        self.create_project(self.other, "Agenda", "Not visible")
+
+        query = "query ($prefix: String!, $kind: SearchKind!, $first: Int) { autocomplete(prefix: $prefix, kind: $kind, first: $first) { title rank } }"
+
+        def execute(**variables):
+            return self.graphql_client.execute(query, variables=variables, context_value={"user": self.user})["data"]["autocomplete"]
+
+        assert [result["title"] for result in execute(prefix="AN", kind="USER")] == ["ana", "anabela", "anderson"]
+        assert execute(prefix="ana", kind="USER", first=1) == [{"title": "ana", "rank": 1.0}]
+        assert [result["title"] for result in execute(prefix="agi", kind="PROJECT")] == ["Ágil rollout"]
+        assert execute(prefix="  ", kind="USER") == []
+
+        # intervalo e ordem resolvidos pelo índice, sem varrer a tabela nem ordenar
+        sql, params = autocomplete_entries("an", "user")[:10].query.sql_with_params()
+        with connection.cursor() as cursor:
+            plan = " ".join(str(row) for row in cursor.execute(f"EXPLAIN QUERY PLAN {sql}", params).fetchall())
+        assert "search_entry_title_key_idx (kind=? AND title_key>? AND title_key<?)" in plan and "TEMP B-TREE" not in plan
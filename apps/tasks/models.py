@@ -24,5 +24,13 @@ class Task(models.Model):
         blank=True,
     )
 
+    class Meta:
+        indexes = [
+            models.Index(fields=["project", "due_date"], name="tasks_project_due_idx"),
+            models.Index(fields=["activity", "completed"], name="tasks_activity_completed_idx"),
+            models.Index(fields=["due_date", "id"], name="tasks_due_id_idx"),  # ordem do keyset de allTasks
+            models.Index(fields=["project", "due_date"], condition=models.Q(completed=False), name="tasks_open_due_idx"),
+        ]
+
     def __str__(self):
         return self.title
@@ -1,20 +1,57 @@
 import graphene
 from django.db import transaction
+from graphene_django import bypass_get_queryset
 from graphene_django.types import DjangoObjectType
 from django.core.exceptions import ObjectDoesNotExist, ValidationError
 
 from .models import Task
-from apps.projects.models import Project
+from apps.projects.stats import record_saved
+from apps.notifications.events import enqueue_events
+from apps.search.index import index_objects
 from apps.activities.models import Activity
+from ag_backend.bulk import BulkItemError, check_bulk_request, clean_instance, get_bulk_options, invalidate_objects, to_pk
+from ag_backend.fields import FilterConnectionField
+from ag_backend.loaders import get_loaders
+from ag_backend.permissions import get_permissions
 
 
 class TaskType(DjangoObjectType):
+    notifications = FilterConnectionField("apps.notifications.schema.NotificationType", required=True)
+
     class Meta:
         model = Task
         interfaces = (graphene.relay.Node,)
         filter_fields = ["title", "description", "due_date", "completed", "project_id", "activity_id"]
         fields = "__all__"  # sem campos sensíveis, utilizar todos
 
+    @classmethod
+    def get_queryset(cls, queryset, info):
+        return get_permissions(info).filter(queryset, "project")
+
+    @bypass_get_queryset
+    def resolve_project(self, info):
+        return get_loaders(info).load(self, "project")
+
+    @bypass_get_queryset
+    def resolve_activity(self, info):
+        return get_loaders(info).load(self, "activity")
+
+
+class HistogramBucket(graphene.Enum):
+    DAY = "day"
+    WEEK = "week"
+    MONTH = "month"
+
+
+class TaskDueBucket(graphene.ObjectType):
+    """
+    Tasks due within the bucket starting at ``start`` (in the server timezone).
+    """
+
+    start = graphene.Date(required=True)
+    count = graphene.Int(required=True)
+    completed = graphene.Int(required=True)
+
 
 class CreateTask(graphene.Mutation):
     class Arguments:
@@ -30,24 +67,26 @@ class CreateTask(graphene.Mutation):
     errors = graphene.String()
 
     def mutate(self, info, **kwargs):
-        user = info.context.user
+        user = info.context.get("user") if isinstance(info.context, dict) else info.context.user
         if not user.is_authenticated:
             return CreateTask(task=None, success=False, errors="Authentication required.")
 
-        try:  # criar task com tratamento de validação e erros
-            project = Project.objects.get(pk=kwargs.pop("project_id"))
-            if project.cleiton.user != user and not (user.is_superuser or user.is_staff):
-                return CreateTask(task=None, success=False, errors="Permission denied. Not the project owner.")
+        project_id = kwargs.pop("project_id")
+        error = get_permissions(info).check_project(project_id)
+        if error:
+            return CreateTask(task=None, success=False, errors=error)
 
+        try:  # criar task com tratamento de validação e erros
             with transaction.atomic():  # transação atômica para garantir a integridade da manipulação no banco
-                task = Task(project=project, **kwargs)
-                if "activity_id" in kwargs:
-                    task.activity = Activity.objects.get(pk=kwargs.pop("activity_id"))
-                task.full_clean()  # validar antes de salvar
+                activity_id = kwargs.pop("activity_id", None)
+                task = Task(project_id=to_pk(project_id), **kwargs)
+                if activity_id:
+                    task.activity = Activity.objects.get(pk=activity_id)
+                task.full_clean(exclude=["project"])  # validar antes de salvar, projeto já conferido
                 task.save()
             return CreateTask(task=task, success=True)
         except ObjectDoesNotExist:
-            return CreateTask(task=None, success=False, errors="Project or activity not found.")
+            return CreateTask(task=None, success=False, errors="Activity not found.")
         except ValidationError as e:
             return CreateTask(task=None, success=False, errors=str(e))
 
@@ -66,25 +105,27 @@ class UpdateTask(graphene.Mutation):
     errors = graphene.String()
 
     def mutate(self, info, id, **kwargs):
-        user = info.context.user
+        user = info.context.get("user") if isinstance(info.context, dict) else info.context.user
         if not user.is_authenticated:
             return UpdateTask(task=None, success=False, errors="Authentication required.")
 
         try:  # update de task com tratamento de validação e erros
             task = Task.objects.get(pk=id)
-            project = Project.objects.get(pk=kwargs.pop("project_id", task.project_id))
-            if project.cleiton.user != user and not (user.is_superuser or user.is_staff):
-                return UpdateTask(task=None, success=False, errors="Permission denied. Not the project owner.")
+            project_id = to_pk(kwargs.pop("project_id", task.project_id))
+            # dono do projeto atual e do projeto de destino, uma única verificação
+            denied = get_permissions(info).check_projects({task.project_id, project_id})
+            if denied:
+                return UpdateTask(task=None, success=False, errors=denied.get(project_id) or denied[task.project_id])
 
             with transaction.atomic():  # transação atômica para garantir a integridade da manipulação no banco
                 for key, value in kwargs.items():
                     setattr(task, key, value)  # atualizar apenas os campos fornecidos
-                task.project = project  # se necessário, ajustar qual o projeto referente a atividade
-                task.full_clean()  # validar mudanças antes de salvar
+                task.project_id = project_id  # se necessário, ajustar qual o projeto referente a atividade
+                task.full_clean(exclude=["project"])  # validar mudanças antes de salvar
                 task.save()
             return UpdateTask(task=task, success=True)
         except ObjectDoesNotExist:
-            return UpdateTask(task=None, success=False, errors="Task or project not found.")
+            return UpdateTask(task=None, success=False, errors="Task not found.")
         except ValidationError as e:
             return UpdateTask(task=None, success=False, errors=str(e))
 
@@ -94,18 +135,212 @@ class DeleteTask(graphene.Mutation):
         id = graphene.ID(required=True)
 
     success = graphene.Boolean()
+    errors = graphene.String()
 
     def mutate(self, info, id):
         try:  # deletar task com tratamento de validação e erros
             with transaction.atomic():  # utilizar transação atômica para garantir a integridade da manipulação no banco
                 task = Task.objects.get(pk=id)
+                error = get_permissions(info).check_project(task.project_id)
+                if error:
+                    return DeleteTask(success=False, errors=error)
                 task.delete()
             return DeleteTask(success=True)
         except ObjectDoesNotExist:
             return DeleteTask(success=False, errors="Task not found.")
 
 
+class TaskInput(graphene.InputObjectType):
+    title = graphene.String(required=True)
+    description = graphene.String()
+    due_date = graphene.DateTime(required=True)
+    completed = graphene.Boolean(required=True)
+    project_id = graphene.ID(required=True)
+    activity_id = graphene.ID()
+
+
+class TaskUpdateInput(graphene.InputObjectType):
+    id = graphene.ID(required=True)
+    title = graphene.String()
+    description = graphene.String()
+    due_date = graphene.DateTime()
+    completed = graphene.Boolean()
+    project_id = graphene.ID()
+    activity_id = graphene.ID()
+
+
+def get_activities(items, activity_ids=()):
+    """
+    Returns ``{activity_id: project_id}`` for the existing activities referenced by ``items`` or in ``activity_ids``.
+    """
+
+    activity_ids = ({to_pk(item["activity_id"]) for item in items if item.get("activity_id")} | set(activity_ids)) - {None}
+    return dict(Activity.objects.filter(pk__in=activity_ids).values_list("pk", "project_id")) if activity_ids else {}
+
+
+class BulkCreateTasks(graphene.Mutation):
+    """
+    Creates many tasks in one request. Projects, activities and permissions are resolved once for the whole batch
+    and the valid tasks are inserted with a single ``bulk_create``; invalid items are reported by index.
+    """
+
+    class Arguments:
+        tasks = graphene.List(graphene.NonNull(TaskInput), required=True)
+
+    tasks = graphene.List(TaskType)
+    success = graphene.Boolean()
+    errors = graphene.List(BulkItemError)
+
+    def mutate(self, info, tasks):
+        user = info.context.get("user") if isinstance(info.context, dict) else info.context.user
+        errors = check_bulk_request(user, tasks)
+        if errors:
+            return BulkCreateTasks(tasks=[], success=False, errors=errors)
+
+        denied = get_permissions(info).check_projects(item["project_id"] for item in tasks)
+        activities = get_activities(tasks)
+
+        created = []
+        for index, item in enumerate(tasks):
+            data = dict(item)
+            project_id = to_pk(data.pop("project_id"))
+            activity_id = data.pop("activity_id", None)
+
+            if project_id in denied:
+                errors.append(BulkItemError(index=index, errors=denied[project_id]))
+                continue
+            if activity_id and to_pk(activity_id) not in activities:
+                errors.append(BulkItemError(index=index, errors="Activity not found."))
+                continue
+            if activity_id and activities[to_pk(activity_id)] != project_id:
+                errors.append(BulkItemError(index=index, errors="Activity belongs to another project."))
+                continue
+
+            task = Task(project_id=project_id, activity_id=to_pk(activity_id) if activity_id else None, **data)
+            error = clean_instance(task, exclude=("project", "activity"))  # chaves já resolvidas em lote
+            if error:
+                errors.append(BulkItemError(index=index, errors=error))
+                continue
+            created.append(task)
+
+        with transaction.atomic():  # transação única para todo o lote
+            Task.objects.bulk_create(created, batch_size=get_bulk_options()["BATCH_SIZE"])
+            record_saved(Task, created, created=True)  # bulk_create não dispara post_save
+            enqueue_events("created", created)
+            index_objects(Task, created)
+        return BulkCreateTasks(tasks=created, success=not errors, errors=errors)
+
+
+class BulkUpdateTasks(graphene.Mutation):
+    """
+    Updates many tasks in one request with a single ``bulk_update`` over the union of the provided fields.
+    """
+
+    class Arguments:
+        tasks = graphene.List(graphene.NonNull(TaskUpdateInput), required=True)
+
+    tasks = graphene.List(TaskType)
+    success = graphene.Boolean()
+    errors = graphene.List(BulkItemError)
+
+    def mutate(self, info, tasks):
+        user = info.context.get("user") if isinstance(info.context, dict) else info.context.user
+        errors = check_bulk_request(user, tasks)
+        if errors:
+            return BulkUpdateTasks(tasks=[], success=False, errors=errors)
+
+        existing = Task.objects.in_bulk({to_pk(item["id"]) for item in tasks} - {None})
+        project_ids = {task.project_id for task in existing.values()} | {to_pk(item["project_id"]) for item in tasks if item.get("project_id")}
+        denied = get_permissions(info).check_projects(project_ids)
+        activities = get_activities(tasks, [task.activity_id for task in existing.values()])
+
+        updated, fields = {}, set()
+        for index, item in enumerate(tasks):
+            data = dict(item)
+            task = existing.get(to_pk(data.pop("id")))
+            if task is None:
+                errors.append(BulkItemError(index=index, errors="Task not found."))
+                continue
+
+            new_project_id = data.pop("project_id", None)
+            project_id = to_pk(new_project_id) if new_project_id else task.project_id
+            # dono do projeto atual e do projeto de destino
+            error = denied.get(project_id) or denied.get(task.project_id)
+            if error:
+                errors.append(BulkItemError(index=index, errors=error))
+                continue
+
+            activity_id = task.activity_id
+            if "activity_id" in data:
+                activity_id = data.pop("activity_id")
+                if activity_id and to_pk(activity_id) not in activities:
+                    errors.append(BulkItemError(index=index, errors="Activity not found."))
+                    continue
+                activity_id = to_pk(activity_id) if activity_id else None
+                fields.add("activity")
+            # a atividade, nova ou atual, deve ser do projeto final da task
+            if activity_id is not None and activities.get(activity_id) != project_id:
+                errors.append(BulkItemError(index=index, errors="Activity belongs to another project."))
+                continue
+            task.activity_id = activity_id
+
+            task.project_id = project_id
+            for key, value in data.items():
+                setattr(task, key, value)  # atualizar apenas os campos fornecidos
+            error = clean_instance(task, exclude=("project", "activity"))
+            if error:
+                errors.append(BulkItemError(index=index, errors=error))
+                continue
+
+            fields.update(data, ["project"])
+            updated[task.pk] = task
+
+        if updated:
+            with transaction.atomic():
+                Task.objects.bulk_update(updated.values(), sorted(fields), batch_size=get_bulk_options()["BATCH_SIZE"])
+                record_saved(Task, updated.values())
+                enqueue_events("updated", updated.values())
+                index_objects(Task, updated.values())
+            invalidate_objects(Task, updated)
+        return BulkUpdateTasks(tasks=list(updated.values()), success=not errors, errors=errors)
+
+
+class BulkDeleteTasks(graphene.Mutation):
+    class Arguments:
+        ids = graphene.List(graphene.NonNull(graphene.ID), required=True)
+
+    deleted_ids = graphene.List(graphene.ID)
+    success = graphene.Boolean()
+    errors = graphene.List(BulkItemError)
+
+    def mutate(self, info, ids):
+        user = info.context.get("user") if isinstance(info.context, dict) else info.context.user
+        errors = check_bulk_request(user, ids)
+        if errors:
+            return BulkDeleteTasks(deleted_ids=[], success=False, errors=errors)
+
+        existing = dict(Task.objects.filter(pk__in={to_pk(pk) for pk in ids} - {None}).values_list("pk", "project_id"))
+        denied = get_permissions(info).check_projects(existing.values())
+
+        allowed = []
+        for index, pk in enumerate(ids):
+            pk = to_pk(pk)
+            if pk not in existing:
+                errors.append(BulkItemError(index=index, errors="Task not found."))
+            elif existing[pk] in denied:
+                errors.append(BulkItemError(index=index, errors=denied[existing[pk]]))
+            else:
+                allowed.append(pk)
+
+        with transaction.atomic():  # delete do queryset ainda dispara post_delete, que invalida o cache
+            Task.objects.filter(pk__in=allowed).delete()
+        return BulkDeleteTasks(deleted_ids=allowed, success=not errors, errors=errors)
+
+
 class Mutation(graphene.ObjectType):
     create_task = CreateTask.Field()
     update_task = UpdateTask.Field()
     delete_task = DeleteTask.Field()
+    bulk_create_tasks = BulkCreateTasks.Field()
+    bulk_update_tasks = BulkUpdateTasks.Field()
+    bulk_delete_tasks = BulkDeleteTasks.Field()
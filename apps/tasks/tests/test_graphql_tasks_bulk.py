@@ -0,0 +1,132 @@
+import pytest
+from datetime import date, timedelta
+
+from ag_backend.schema import schema
+from apps.activities.models import Activity
+from apps.projects.models import Project, ProjectStats
+from apps.projects.stats import rebuild_project_stats
+from apps.tasks.models import Task
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from graphene.test import Client as GraphQLClient
+
+
+@pytest.mark.django_db
+class TaskBulkMutationTestCase(TestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = get_user_model().objects.create_user(username="cleiton", password="securepassword")
+        self.other = get_user_model().objects.create_user(username="other", password="securepassword")
+        self.project = self.create_project(self.user)
+        self.other_project = self.create_project(self.other)
+        rebuild_project_stats()
+        self.graphql_client = GraphQLClient(schema)
+
+    def create_project(self, owner):
+        return Project.objects.create(
+            owner=owner,
+            name="Sample Project",
+            description="Sample Project Description",
+            status="open",
+            start_date=date.today(),
+            estimated_end_date=date.today() + timedelta(days=30),
+        )
+
+    def execute(self, query, variables):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.graphql_client.execute(query, variables=variables, context_value={"user": self.user})
+        if "errors" in response:
+            print("Errors:", response["errors"])
+        # savepoints das transações aninhadas não contam
+        return response["data"], [query for query in queries.captured_queries if "SAVEPOINT" not in query["sql"]]
+
+    def test_bulk_create_with_per_item_errors(self):
+        query = """
+            mutation ($tasks: [TaskInput!]!) {
+                bulkCreateTasks(tasks: $tasks) { tasks { title } success errors { index errors } }
+            }
+        """
+        due_date = "2030-01-01T10:00:00+00:00"
+        tasks = [{"title": f"Task {index}", "dueDate": due_date, "completed": False, "projectId": self.project.id} for index in range(50)]
+        tasks[3]["projectId"] = self.other_project.id  # sem permissão
+        tasks[7]["projectId"] = 999999  # projeto inexistente
+        tasks[9]["title"] = "x" * 300  # excede max_length
+
+        data, queries = self.execute(query, {"tasks": tasks})
+        result = data["bulkCreateTasks"]
+        assert result["success"] is False
+        assert [error["index"] for error in result["errors"]] == [3, 7, 9], "Invalid items should be reported by index"
+        assert "Permission denied" in result["errors"][0]["errors"]
+        assert len(result["tasks"]) == 47 and Task.objects.filter(project=self.project).count() == 47
+        assert len(queries) == 5, "Projects should be resolved once, tasks, events and search entries inserted in one statement each, stats updated once"
+        assert ProjectStats.objects.get(project=self.project).tasks_total == 47
+
+    def test_bulk_update_and_delete(self):
+        tasks = [Task.objects.create(title=f"Task {index}", due_date="2030-01-01T10:00:00Z", project=self.project) for index in range(10)]
+        foreign = Task.objects.create(title="Foreign", due_date="2030-01-01T10:00:00Z", project=self.other_project)
+
+        query = """
+            mutation ($tasks: [TaskUpdateInput!]!) {
+                bulkUpdateTasks(tasks: $tasks) { tasks { title completed } success errors { index errors } }
+            }
+        """
+        items = [{"id": task.id, "completed": True} for task in tasks] + [{"id": foreign.id, "title": "Hijacked"}]
+        data, queries = self.execute(query, {"tasks": items})
+        result = data["bulkUpdateTasks"]
+        assert result["errors"] == [{"index": 10, "errors": "Permission denied. Not the project owner."}]
+        assert Task.objects.filter(project=self.project, completed=True).count() == 10
+        assert Task.objects.get(pk=foreign.pk).title == "Foreign"
+        assert len(queries) == 6, "Updates should be written with a single bulk_update"
+        assert ProjectStats.objects.get(project=self.project).tasks_completed == 10, "bulk_update should update the rollup"
+
+        query = """
+            mutation ($ids: [ID!]!) {
+                bulkDeleteTasks(ids: $ids) { deletedIds success errors { index errors } }
+            }
+        """
+        data, _queries = self.execute(query, {"ids": [tasks[0].id, tasks[1].id, foreign.id, 999999]})
+        result = data["bulkDeleteTasks"]
+        assert result["deletedIds"] == [str(tasks[0].id), str(tasks[1].id)]
+        assert [error["index"] for error in result["errors"]] == [2, 3]
+        assert Task.objects.filter(project=self.project).count() == 8
+        assert ProjectStats.objects.get(project=self.project).tasks_total == 8
+
+    def test_activities_of_other_projects_are_rejected(self):
+        foreign = Activity.objects.create(
+            created_by=self.other, name="Foreign", description="Description", project=self.other_project, expected_completion_date=date.today()
+        )
+        own = Activity.objects.create(created_by=self.user, name="Own", description="Description", project=self.project, expected_completion_date=date.today())
+        due_date = "2030-01-01T10:00:00+00:00"
+
+        query = """
+            mutation ($tasks: [TaskInput!]!) {
+                bulkCreateTasks(tasks: $tasks) { tasks { title } success errors { index errors } }
+            }
+        """
+        tasks = [
+            {"title": "Own", "dueDate": due_date, "completed": False, "projectId": self.project.id, "activityId": own.id},
+            {"title": "Attached", "dueDate": due_date, "completed": False, "projectId": self.project.id, "activityId": foreign.id},
+        ]
+        result = self.execute(query, {"tasks": tasks})[0]["bulkCreateTasks"]
+        assert result["errors"] == [{"index": 1, "errors": "Activity belongs to another project."}]
+        assert list(Task.objects.values_list("title", flat=True)) == ["Own"]
+
+        query = """
+            mutation ($tasks: [TaskUpdateInput!]!) {
+                bulkUpdateTasks(tasks: $tasks) { tasks { title } success errors { index errors } }
+            }
+        """
+        task = Task.objects.get()
+        second = Task.objects.create(title="Second", due_date=due_date, project=self.project, activity=own)
+        third = self.create_project(self.user)
+        items = [{"id": task.id, "activityId": foreign.id}, {"id": second.id, "projectId": third.id}]  # a atividade atual fica em outro projeto
+        result = self.execute(query, {"tasks": items})[0]["bulkUpdateTasks"]
+        assert [error["index"] for error in result["errors"]] == [0, 1]
+        assert {error["errors"] for error in result["errors"]} == {"Activity belongs to another project."}
+        assert Task.objects.filter(activity=own, project=self.project).count() == 2
+
+    def tearDown(self):
+        get_user_model().objects.all().delete()
@@ -0,0 +1,78 @@
+import pytest
+from datetime import date, timedelta
+
+from ag_backend.schema import schema
+from apps.projects.models import Project
+from apps.tasks.models import Task
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from graphene.test import Client as GraphQLClient
+
+
+@pytest.mark.django_db
+class TaskKeysetPaginationTestCase(TestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = get_user_model().objects.create_superuser(username="admin", password="safe_password", email="admin@example.com")
+        self.project = Project.objects.create(
+            owner=self.user,
+            name="Sample Project",
+            description="Sample Project Description",
+            status="open",
+            start_date=date.today(),
+            estimated_end_date=date.today() + timedelta(days=30),
+        )
+        now = timezone.now()
+        # datas fora de ordem e repetidas para exercitar o desempate pela pk
+        for index, days in enumerate([3, 1, 2, 1, 5]):
+            Task.objects.create(title=f"Task {index}", due_date=now + timedelta(days=days), project=self.project)
+        self.graphql_client = GraphQLClient(schema)
+
+    def fetch_page(self, arguments):
+        query = f"""
+        {{
+            allTasks({arguments}) {{
+                edges {{ cursor node {{ title }} }}
+                pageInfo {{ hasNextPage hasPreviousPage startCursor endCursor }}
+            }}
+        }}
+        """
+        with CaptureQueriesContext(connection) as queries:
+            response = self.graphql_client.execute(query, context_value={"user": self.user})
+        if "errors" in response:
+            print("Errors:", response["errors"])
+        return response["data"]["allTasks"], queries
+
+    def test_forward_pagination_by_due_date(self):
+        page, queries = self.fetch_page("first: 2")
+        assert [edge["node"]["title"] for edge in page["edges"]] == ["Task 1", "Task 3"], "Should be ordered by (due_date, id)"
+        assert page["pageInfo"]["hasNextPage"] is True
+        assert page["pageInfo"]["hasPreviousPage"] is False
+        assert not any("COUNT(" in query["sql"] or "OFFSET" in query["sql"] for query in queries.captured_queries), "No COUNT/OFFSET"
+
+        page, queries = self.fetch_page(f'first: 2, after: "{page["pageInfo"]["endCursor"]}"')
+        assert [edge["node"]["title"] for edge in page["edges"]] == ["Task 2", "Task 0"], "Should continue after the cursor"
+        assert page["pageInfo"]["hasPreviousPage"] is True
+
+        page, queries = self.fetch_page(f'first: 2, after: "{page["pageInfo"]["endCursor"]}"')
+        assert [edge["node"]["title"] for edge in page["edges"]] == ["Task 4"], "Should return the last row"
+        assert page["pageInfo"]["hasNextPage"] is False
+
+    def test_backward_pagination(self):
+        page, queries = self.fetch_page("last: 2")
+        assert [edge["node"]["title"] for edge in page["edges"]] == ["Task 0", "Task 4"], "Should return the last rows in order"
+        assert page["pageInfo"]["hasPreviousPage"] is True
+
+        page, queries = self.fetch_page(f'last: 2, before: "{page["pageInfo"]["startCursor"]}"')
+        assert [edge["node"]["title"] for edge in page["edges"]] == ["Task 3", "Task 2"], "Should continue before the cursor"
+
+    def test_invalid_cursor(self):
+        response = self.graphql_client.execute('{ allTasks(first: 2, after: "bm9wZQ==") { edges { cursor } } }', context_value={"user": self.user})
+        assert response["errors"][0]["message"] == "Invalid cursor.", "Malformed cursors should be rejected"
+
+    def tearDown(self):
+        get_user_model().objects.all().delete()